@@ -1,33 +1,34 @@
-import os
 from typing import Dict, Any, Optional
 from abc import ABC, abstractmethod
 
+from core.tracing import tracer
+
 
 class BaseAgent(ABC):
    
     def __init__(self, name: str, model: str = "gemini-pro"):
         self.name = name
         self.model = model
-        
-        # Try to initialize AI client
-        self.ai_client = self._initialize_ai_client()
+    
+    @property
+    def ai_client(self):
+        """Process-wide AI client, created lazily on first use and shared by all agents."""
+        return self._initialize_ai_client()
     
     def _initialize_ai_client(self):
-        """Initialize AI client"""
-        google_key = os.getenv("GOOGLE_API_KEY", "")
-        if google_key and google_key != "your_key_here":
-            try:
-                from integrations.gemini import GeminiClient
-                return GeminiClient(google_key)
-            except ImportError:
-                print(f"[AGENT] google-generativeai not installed")
-        print(f"[AGENT] No AI API key found")
-        return None
+        """Resolve the shared AI client from the registry"""
+        from integrations.gemini import get_ai_client
+        return get_ai_client()
     
     @abstractmethod
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         pass
     
+    async def run(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute under an agent span (timed and attached to the incident's trace)."""
+        with tracer.span("agent", self.name):
+            return await self.execute(context)
+    
     def call_llm(self, prompt: str, 
                  temperature: float = 0.7,
                  max_tokens: int = 1000) -> Optional[str]:
@@ -37,6 +38,15 @@ class BaseAgent(ABC):
         print(f"[{self.name}] No AI client available")
         return None
     
+    async def call_llm_async(self, prompt: str,
+                             temperature: float = 0.7,
+                             max_tokens: int = 1000) -> Optional[str]:
+        if self.ai_client:
+            return await self.ai_client.generate_content_async(prompt, temperature, max_tokens)
+        
+        print(f"[{self.name}] No AI client available")
+        return None
+    
     def call_llm_json(self, prompt: str,
                      temperature: float = 0.3,
                      max_tokens: int = 1000) -> Optional[Dict[str, Any]]:
@@ -44,4 +54,13 @@ class BaseAgent(ABC):
             return self.ai_client.generate_json(prompt, temperature, max_tokens)
         
         print(f"[{self.name}] No AI client available")
-        return None
\ No newline at end of file
+        return None
+    
+    async def call_llm_json_async(self, prompt: str,
+                                  temperature: float = 0.3,
+                                  max_tokens: int = 1000) -> Optional[Dict[str, Any]]:
+        if self.ai_client:
+            return await self.ai_client.generate_json_async(prompt, temperature, max_tokens)
+        
+        print(f"[{self.name}] No AI client available")
+        return None
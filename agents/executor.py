@@ -1,4 +1,5 @@
 # agents/executor.py
+import os
 from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
 
@@ -8,8 +9,10 @@ from core.models import (
     IncidentType
 )
 from core.guardrails import GuardrailEngine
+from core.runbooks import runbook_index
+from core.tracing import tracer
+from core.visuals import incident_cards
 from integrations.retool import RetoolClient
-from integrations.freepik import FreepikClient
 
 
 class ExecutorAgent(BaseAgent):
@@ -19,7 +22,6 @@ class ExecutorAgent(BaseAgent):
         super().__init__("Executor")
         self.guardrails = guardrail_engine
         self.retool = RetoolClient()
-        self.freepik = FreepikClient()
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Propose mitigation based on validated hypothesis + evidence + runbooks."""
@@ -58,7 +60,7 @@ class ExecutorAgent(BaseAgent):
 
         # Approval request to Retool if required
         if mitigation.requires_approval:
-            print(f"\n Mitigation requires approval - Calling Retool API...")
+            print(f"\n Mitigation requires approval - Queueing Retool approval request...")
             mitigation_dict = {
                 "type": mitigation.type.value,
                 "description": mitigation.description,
@@ -67,24 +69,18 @@ class ExecutorAgent(BaseAgent):
             }
             approval_sent = self.retool.send_approval_request(incident.id, mitigation_dict)
             if approval_sent:
-                print(f"Retool approval workflow triggered successfully!")
-
-        # Visualization (demo)
-        incident_data = {
-            "id": incident.id,
-            "service": incident.service_name,
-            "severity": incident.severity.value,
-            "type": incident.incident_type.value,
-        }
-        visual_url = self.freepik.generate_incident_card(incident_data)
-        print(f"Generated incident visualization: {visual_url}")
+                print(f"Retool approval request queued for delivery")
+
+        # Visualization (demo) is post-processing: the card is attached to the incident when ready
+        card_status = incident_cards.submit(incident)
+        print(f"Incident visualization {card_status}")
 
         return {
             "mitigation": mitigation,
             "guardrail_check": guardrail_check,
             "status": "proposed",
             "requires_approval": mitigation.requires_approval,
-            "visual_url": visual_url,
+            "visual_url": incident.visual_url,  # set now only if the card was cached
         }
 
     def _propose_mitigation(self, incident_type: IncidentType, root_cause: str, context: Dict[str, Any]) -> Mitigation:
@@ -99,7 +95,7 @@ class ExecutorAgent(BaseAgent):
 
         # Context: runbooks (Scout already stores them in context)
         runbooks = context.get("runbooks", {}) or {}
-        rb_text = self._flatten_runbooks(runbooks)
+        rb_text = self._flatten_runbooks(runbooks, query=f"{incident_type.value} {root_cause}")
 
         # Determine "preferences" from runbook text (tie-breakers)
         prefer_rollback = "rollback" in rb_text or "roll back" in rb_text
@@ -206,16 +202,17 @@ class ExecutorAgent(BaseAgent):
 
     async def apply_mitigation(self, mitigation: Mitigation, service_name: str) -> Dict[str, Any]:
         """Execute the mitigation (simulated) and update context-like state if provided."""
-        print(f"[EXECUTOR] Applying {mitigation.type.value} to {service_name}")
-        print(f"[EXECUTOR] Parameters: {mitigation.parameters}")
+        with tracer.span("action", "apply_mitigation", mitigation_type=mitigation.type.value):
+            print(f"[EXECUTOR] Applying {mitigation.type.value} to {service_name}")
+            print(f"[EXECUTOR] Parameters: {mitigation.parameters}")
 
-        applied_at = datetime.now(timezone.utc).isoformat()
-        return {
-            "success": True,
-            "mitigation_type": mitigation.type.value,
-            "applied_at": applied_at,
-            "message": f"Successfully applied {mitigation.type.value}",
-        }
+            applied_at = datetime.now(timezone.utc).isoformat()
+            return {
+                "success": True,
+                "mitigation_type": mitigation.type.value,
+                "applied_at": applied_at,
+                "message": f"Successfully applied {mitigation.type.value}",
+            }
 
     def _mentions_deploy(self, text: str) -> bool:
         t = (text or "").lower()
@@ -300,8 +297,15 @@ class ExecutorAgent(BaseAgent):
 
         return "noncritical-feature", "safe-fallback"
 
-    def _flatten_runbooks(self, runbooks: Dict[str, Any]) -> str:
-        """Flatten runbook dict to lowercase text for simple keyword biasing."""
+    def _flatten_runbooks(self, runbooks: Dict[str, Any], query: str = "") -> str:
+        """Flatten runbook dict to lowercase text for simple keyword biasing.
+
+        With a query, only the indexed sections relevant to it are used.
+        """
+        if query and len(runbook_index):
+            sections = runbook_index.search(query, k=int(os.getenv("RUNBOOK_TOP_K", "3")))
+            if sections:
+                return " ".join(f"{s.title} {s.text}" for _, s in sections).lower()
         parts = []
         for k, v in (runbooks or {}).items():
             if k in ("source", "full_content"):
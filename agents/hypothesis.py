@@ -2,6 +2,7 @@ import json
 from typing import Dict, Any, List
 from .base import BaseAgent
 from core.models import Hypothesis, IncidentType, Evidence
+from core.llm_cache import llm_cache, evidence_fingerprint
 
 
 class HypothesisAgent(BaseAgent):
@@ -46,9 +47,55 @@ class HypothesisAgent(BaseAgent):
                                 triage_reasoning: str) -> List[Hypothesis]:
         """Generate hypotheses using Gemini AI."""
         
+        # Recurring incidents with the same normalized inputs reuse the earlier answer;
+        # the triage reasoning is in the prompt, so a speculative run on the
+        # provisional reasoning doesn't share an entry with the confirmed one
+        cache_key = evidence_fingerprint(
+            "hypothesis", evidence,
+            incident_type=incident_type.value, triage_reasoning=triage_reasoning,
+        )
+        result = llm_cache.get(cache_key)
+        cache_miss = result is None
+        
+        if cache_miss:
+            prompt = self._build_prompt(incident_type, evidence, triage_reasoning)
+            result = await self.ai_client.generate_json_async(
+                prompt=prompt,
+                temperature=0.4,  # Moderate creativity
+                max_tokens=1500
+            )
+        else:
+            print(f"[HYPOTHESIS] Using cached Gemini hypotheses")
+        
+        if not result or "hypotheses" not in result:
+            return None
+        
+        # Convert to Hypothesis objects
+        hypotheses = []
+        for h in result["hypotheses"]:
+            try:
+                hypotheses.append(Hypothesis(
+                    description=h.get("description", "Unknown"),
+                    confidence=float(h.get("confidence", 0.5)),
+                    evidence_needed=h.get("evidence_needed", []),
+                    validation_criteria=h.get("validation_criteria", "Manual validation")
+                ))
+            except Exception as e:
+                print(f"   ⚠️  [HYPOTHESIS] Skipping malformed hypothesis: {e}")
+                continue
+        
+        if hypotheses and cache_miss:
+            llm_cache.set(cache_key, result)
+        
+        return hypotheses if hypotheses else None
+    
+    def _build_prompt(self, incident_type: IncidentType,
+                      evidence: Evidence,
+                      triage_reasoning: str) -> str:
+        """Build the hypothesis-generation prompt."""
         metrics = evidence.metrics
         
-        prompt = f"""You are an expert Site Reliability Engineer investigating a production incident.
+        return f"""You are an expert Site Reliability Engineer investigating a production incident.
 
 INCIDENT TYPE: {incident_type.value}
 
@@ -63,7 +110,7 @@ CURRENT METRICS:
 - Memory usage: {metrics.get('memory_usage')}%
 - Queue depth: {metrics.get('queue_depth')}
 
-RECENT ERROR LOGS:
+LOG PATTERNS (most severe and frequent first; "(xN)" = N similar lines):
 {chr(10).join(evidence.logs[:5])}
 
 RECENT DEPLOYMENTS:
@@ -107,32 +154,6 @@ Respond ONLY with valid JSON (no markdown, no code blocks):
     }}
   ]
 }}"""
-
-        # Call Gemini API
-        result = self.ai_client.generate_json(
-            prompt=prompt,
-            temperature=0.4,  # Moderate creativity
-            max_tokens=1500
-        )
-        
-        if not result or "hypotheses" not in result:
-            return None
-        
-        # Convert to Hypothesis objects
-        hypotheses = []
-        for h in result["hypotheses"]:
-            try:
-                hypotheses.append(Hypothesis(
-                    description=h.get("description", "Unknown"),
-                    confidence=float(h.get("confidence", 0.5)),
-                    evidence_needed=h.get("evidence_needed", []),
-                    validation_criteria=h.get("validation_criteria", "Manual validation")
-                ))
-            except Exception as e:
-                print(f"   ⚠️  [HYPOTHESIS] Skipping malformed hypothesis: {e}")
-                continue
-        
-        return hypotheses if hypotheses else None
     
     def _generate_with_rules(self, incident_type: IncidentType,
                             evidence: Evidence) -> List[Hypothesis]:
@@ -110,7 +110,7 @@ class PostcheckAgent(BaseAgent):
         ]
         
         for event in incident.timeline:
-            lines.append(f"- **{event['stage']}**: {event['message']}")
+            lines.append(f"- **{event.stage}**: {event.message}")
         
         # Get root cause findings
         most_likely = context.get('most_likely_cause')
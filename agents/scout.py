@@ -1,9 +1,13 @@
 """Scout Agent: Gathers evidence about an incident."""
-from typing import Dict, Any, Optional
+import asyncio
+import os
+from typing import Dict, Any, Optional, Tuple, List, Awaitable
 from datetime import datetime, timedelta
 
 from .base import BaseAgent
+from core.logs import LogDigest
 from core.models import Evidence, IncidentType
+from core.topology import dependencies
 from integrations.jina import DocumentFetcher, LogFetcher
 
 
@@ -15,6 +19,14 @@ class ScoutAgent(BaseAgent):
         self.doc_fetcher = DocumentFetcher()  # GitHub-based runbooks
         self.log_fetcher = LogFetcher()       # GitHub-based logs
 
+        # Per-source deadlines (seconds); a source that misses its deadline
+        # is reported as missing instead of holding up the whole Scout run.
+        self.source_deadlines = {
+            "logs": float(os.getenv("SCOUT_LOGS_DEADLINE", "4.0")),
+            "deploys": float(os.getenv("SCOUT_DEPLOYS_DEADLINE", "2.0")),
+            "runbooks": float(os.getenv("SCOUT_RUNBOOKS_DEADLINE", "4.0")),
+        }
+
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Gather all available evidence about the incident."""
         incident = context.get("incident")
@@ -32,39 +44,80 @@ class ScoutAgent(BaseAgent):
         )
         context["scout_inferred_incident_type"] = incident_type_str  # helpful for debugging
 
-        # Gather logs from GitHub
-        logs = await self._gather_logs(incident.service_name, incident_type_str)
-
-        # Check recent deployments (simulated)
-        recent_deploys = await self._check_recent_deploys(incident.service_name)
+        # Gather logs, deploys and runbooks concurrently, each under its own deadline
+        gathered, missing_sources = await self._gather_sources({
+            "logs": self._gather_logs(incident.service_name, incident_type_str),
+            "deploys": self._check_recent_deploys(incident.service_name),
+            "runbooks": self._fetch_runbooks(incident.service_name, incident_type_str),
+        })
+        log_digest = gathered.get("logs")
+        logs = log_digest.lines() if log_digest else []
+        recent_deploys = gathered.get("deploys") or []
+        runbooks = gathered.get("runbooks") or self.doc_fetcher._get_default_runbooks()
 
         # Check dependencies (simulated)
         dependencies = self._check_dependencies(incident.service_name)
 
-        # Fetch runbooks from GitHub
-        runbooks = await self._fetch_runbooks(incident.service_name, incident_type_str)
-
         evidence = Evidence(
             metrics=metrics_evidence,
             logs=logs,
+            log_stats=log_digest.stats() if log_digest else {},
             recent_deploys=recent_deploys,
             traces=[],  # Would integrate with Jaeger/Zipkin in production
-            dependencies=dependencies
+            dependencies=dependencies,
+            missing_sources=missing_sources,
         )
 
         # Add runbook info to context
         context["runbooks"] = runbooks
 
+        lines_read = log_digest.lines_read if log_digest else 0
+        summary = (
+            f"Digested {lines_read} log lines into {len(logs)} patterns, "
+            f"found {len(recent_deploys)} recent deploys, "
+            f"fetched runbooks for type='{incident_type_str}'"
+        )
+        if missing_sources:
+            summary += f" (partial evidence, missing: {', '.join(missing_sources)})"
+
         return {
             "evidence": evidence,
             "runbooks": runbooks,
-            "summary": (
-                f"Collected {len(logs)} log entries, "
-                f"found {len(recent_deploys)} recent deploys, "
-                f"fetched runbooks for type='{incident_type_str}'"
-            )
+            "missing_sources": missing_sources,
+            "summary": summary,
         }
 
+    async def _gather_sources(
+        self,
+        sources: Dict[str, Awaitable[Any]],
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Run evidence sources in parallel; collect whatever finishes in time.
+
+        Returns the results keyed by source name and the list of sources that
+        missed their deadline or failed.
+        """
+        names = list(sources.keys())
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(sources[name], timeout=self.source_deadlines.get(name, 5.0))
+                for name in names
+            ),
+            return_exceptions=True,
+        )
+
+        gathered: Dict[str, Any] = {}
+        missing: List[str] = []
+        for name, result in zip(names, results):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"[SCOUT] Source '{name}' missed its {self.source_deadlines.get(name, 5.0):.1f}s deadline")
+                missing.append(name)
+            elif isinstance(result, Exception):
+                print(f"[SCOUT] Source '{name}' failed: {result}")
+                missing.append(name)
+            else:
+                gathered[name] = result
+        return gathered, missing
+
     def _gather_metrics(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Process and structure metrics data."""
         return {
@@ -141,10 +194,10 @@ class ScoutAgent(BaseAgent):
 
         return IncidentType.UNKNOWN
 
-    async def _gather_logs(self, service_name: str, incident_type: Optional[str] = None) -> list:
-        """Fetch logs for demo from GitHub."""
+    async def _gather_logs(self, service_name: str, incident_type: Optional[str] = None) -> LogDigest:
+        """Stream logs for demo from GitHub into a ranked template digest."""
         incident_type = incident_type or "latency_spike"
-        return self.log_fetcher.fetch_logs(service_name, incident_type)
+        return await self.log_fetcher.fetch_log_digest_async(service_name, incident_type)
 
     async def _check_recent_deploys(self, service_name: str) -> list:
         """Check for recent deployments (simulated)."""
@@ -161,23 +214,18 @@ class ScoutAgent(BaseAgent):
 
     def _check_dependencies(self, service_name: str) -> list:
         """Check service dependencies (simulated)."""
-        dependencies_map = {
-            "api-service": ["database", "redis-cache", "auth-service"],
-            "database": [],
-            "redis-cache": [],
-            "auth-service": ["database"],
-        }
-        return dependencies_map.get(service_name, [])
+        return list(dependencies(service_name))
 
     async def _fetch_runbooks(self, service_name: str, incident_type: str = "latency_spike") -> Dict[str, str]:
-        """Fetch runbooks from GitHub for demo."""
-        try:
-            runbooks = self.doc_fetcher.fetch_runbook(service_name, incident_type)
-            if runbooks.get("source") != "Default Demo Runbooks":
-                print(f"Fetched runbooks from {runbooks.get('source')}")
-            else:
-                print(f"Using default runbooks")
-            return runbooks
-        except Exception as e:
-            print(f"Runbook fetch failed: {e}, using defaults")
-            return self.doc_fetcher._get_default_runbooks()
+        """Fetch runbooks from GitHub for demo.
+
+        A failed fetch raises, so Scout reports runbooks as a missing source
+        (and falls back to the default runbooks) instead of treating the
+        defaults as fetched evidence.
+        """
+        runbooks = await self.doc_fetcher.fetch_runbook_async(service_name, incident_type, fallback=False)
+        if runbooks.get("source") != "Default Demo Runbooks":
+            print(f"Fetched runbooks from {runbooks.get('source')}")
+        else:
+            print(f"Using default runbooks")
+        return runbooks
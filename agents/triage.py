@@ -1,7 +1,10 @@
 import json
+import os
 from typing import Dict, Any, Optional
 from .base import BaseAgent
 from core.models import IncidentType, Evidence
+from core.llm_cache import llm_cache, evidence_fingerprint
+from core.runbooks import runbook_index, symptom_query
 
 
 class TriageAgent(BaseAgent):
@@ -9,6 +12,7 @@ class TriageAgent(BaseAgent):
 
     def __init__(self):
         super().__init__("Triage", model="gemini-2.0-flash")
+        self.runbook_top_k = int(os.getenv("RUNBOOK_TOP_K", "3"))
 
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Classify the incident type based on evidence + runbooks."""
@@ -49,12 +53,22 @@ class TriageAgent(BaseAgent):
     def _format_runbook_context(
         self,
         runbooks: Dict[str, Any],
-        max_chars: int = 1200
+        max_chars: int = 1200,
+        query: str = "",
     ) -> str:
 
         if not runbooks:
             return "No runbook content available."
 
+        # Prefer the indexed sections that match the symptoms over a blind prefix.
+        # They can come from any incident type's runbook (that is what helps
+        # classification), so each is labelled with its own runbook rather than
+        # with the source of the runbook Scout fetched.
+        if query and len(runbook_index):
+            relevant = runbook_index.context(query, k=self.runbook_top_k, max_chars=max_chars)
+            if relevant:
+                return f"Most relevant runbook sections:\n\n{relevant}"
+
         source = runbooks.get("source", "Unknown")
         # Try to include whichever section looks like the runbook body
         # Exclude metadata keys
@@ -102,12 +116,65 @@ class TriageAgent(BaseAgent):
         context: Dict[str, Any],
     ) -> Optional[Dict[str, Any]]:
         """Use Google Gemini for classification, including runbook guidance."""
-        metrics = evidence.metrics
         baseline = context.get("baseline_metrics", {})
 
-        runbook_snippet = self._format_runbook_context(runbooks, max_chars=1200)
+        runbook_snippet = self._format_runbook_context(
+            runbooks, max_chars=1200, query=symptom_query(evidence, baseline),
+        )
+
+        # Recurring incidents with the same normalized inputs reuse the earlier answer;
+        # the runbook text in the prompt is part of the key, since the index can change
+        cache_key = evidence_fingerprint("triage", evidence, baseline, runbooks, runbook_context=runbook_snippet)
+        result = llm_cache.get(cache_key)
+        cache_miss = result is None
+
+        if cache_miss:
+            prompt = self._build_gemini_prompt(evidence, runbook_snippet, baseline)
+            result = await self.ai_client.generate_json_async(
+                prompt=prompt,
+                temperature=0.3,
+                max_tokens=1000,
+            )
+        else:
+            print("[TRIAGE] Using cached Gemini classification")
+
+        if not result:
+            return None
+
+        if "type" not in result or "confidence" not in result or "reasoning" not in result:
+            print(f"[TRIAGE] Missing required fields in Gemini response: {result}")
+            return None
+
+        if cache_miss:
+            llm_cache.set(cache_key, result)
 
-        prompt = f"""You are an expert Site Reliability Engineer (SRE) analyzing a production incident.
+        type_map = {
+            "latency_spike": IncidentType.LATENCY_SPIKE,
+            "error_rate_increase": IncidentType.ERROR_RATE,
+            "resource_saturation": IncidentType.RESOURCE_SATURATION,
+            "queue_depth_growth": IncidentType.QUEUE_DEPTH,
+        }
+
+        incident_type = type_map.get(result["type"], IncidentType.UNKNOWN)
+        if incident_type == IncidentType.UNKNOWN:
+            print(f"[TRIAGE] Unknown incident type from Gemini: {result['type']}")
+
+        return {
+            "type": incident_type,
+            "confidence": float(result["confidence"]),
+            "reasoning": result["reasoning"],
+        }
+
+    def _build_gemini_prompt(
+        self,
+        evidence: Evidence,
+        runbook_snippet: str,
+        baseline: Dict[str, Any],
+    ) -> str:
+        """Build the classification prompt from evidence, baseline and the runbook context."""
+        metrics = evidence.metrics
+
+        return f"""You are an expert Site Reliability Engineer (SRE) analyzing a production incident.
 Your task is to classify the incident type based on all available evidence.
 
 CURRENT METRICS:
@@ -125,7 +192,7 @@ BASELINE METRICS (normal operating state):
 - CPU usage: {baseline.get('cpu_usage', 'unknown')}%
 - Queue depth: {baseline.get('queue_depth', 'unknown')}
 
-RECENT ERROR LOGS:
+LOG PATTERNS (most severe and frequent first; "(xN)" = N similar lines):
 {chr(10).join(evidence.logs[:8])}
 
 RECENT DEPLOYMENTS:
@@ -155,36 +222,6 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
 {{"type": "latency_spike", "confidence": 0.92, "reasoning": "Detailed explanation based on evidence"}}
 """
 
-        result = self.ai_client.generate_json(
-            prompt=prompt,
-            temperature=0.3,
-            max_tokens=1000,
-        )
-
-        if not result:
-            return None
-
-        if "type" not in result or "confidence" not in result or "reasoning" not in result:
-            print(f"[TRIAGE] Missing required fields in Gemini response: {result}")
-            return None
-
-        type_map = {
-            "latency_spike": IncidentType.LATENCY_SPIKE,
-            "error_rate_increase": IncidentType.ERROR_RATE,
-            "resource_saturation": IncidentType.RESOURCE_SATURATION,
-            "queue_depth_growth": IncidentType.QUEUE_DEPTH,
-        }
-
-        incident_type = type_map.get(result["type"], IncidentType.UNKNOWN)
-        if incident_type == IncidentType.UNKNOWN:
-            print(f"[TRIAGE] Unknown incident type from Gemini: {result['type']}")
-
-        return {
-            "type": incident_type,
-            "confidence": float(result["confidence"]),
-            "reasoning": result["reasoning"],
-        }
-
     def _classify_with_rules(
         self,
         evidence: Evidence,
@@ -207,8 +244,10 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
         current_queue = metrics.get("queue_depth", 0)
         baseline_queue = baseline.get("queue_depth", 100)
 
-        # Quick runbook reference for reasoning (not used for decision)
-        rb_source = (runbooks or {}).get("source", "none")
+        # Quick runbook reference for reasoning (not used for decision). Triage
+        # without an AI client runs alongside Scout, before runbooks are fetched,
+        # so only mention them when they were actually passed in.
+        runbook_note = f" Runbook source: {runbooks['source']}." if runbooks and runbooks.get("source") else ""
 
         if current_latency > max(baseline_latency * 2, 1000):
             increase_pct = ((current_latency - baseline_latency) / baseline_latency * 100) if baseline_latency > 0 else 0
@@ -216,8 +255,8 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
                 "type": IncidentType.LATENCY_SPIKE,
                 "confidence": 0.9,
                 "reasoning": (
-                    f"P99 latency elevated to {current_latency}ms (baseline: {baseline_latency}ms, +{increase_pct:.0f}%). "
-                    f"Runbook source: {rb_source}."
+                    f"P99 latency elevated to {current_latency}ms (baseline: {baseline_latency}ms, +{increase_pct:.0f}%)."
+                    f"{runbook_note}"
                 )
             }
 
@@ -227,8 +266,8 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
                 "type": IncidentType.ERROR_RATE,
                 "confidence": 0.95,
                 "reasoning": (
-                    f"Error rate elevated to {current_error}% (baseline: {baseline_error}%, +{increase_pct:.0f}%). "
-                    f"Runbook source: {rb_source}."
+                    f"Error rate elevated to {current_error}% (baseline: {baseline_error}%, +{increase_pct:.0f}%)."
+                    f"{runbook_note}"
                 )
             }
 
@@ -239,8 +278,8 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
                 "type": IncidentType.RESOURCE_SATURATION,
                 "confidence": 0.85,
                 "reasoning": (
-                    f"{resource_type} utilization critically high at {usage}%. "
-                    f"Runbook source: {rb_source}."
+                    f"{resource_type} utilization critically high at {usage}%."
+                    f"{runbook_note}"
                 )
             }
 
@@ -250,8 +289,8 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
                 "type": IncidentType.QUEUE_DEPTH,
                 "confidence": 0.8,
                 "reasoning": (
-                    f"Queue depth elevated to {current_queue} (baseline: {baseline_queue}, +{increase_pct:.0f}%). "
-                    f"Runbook source: {rb_source}."
+                    f"Queue depth elevated to {current_queue} (baseline: {baseline_queue}, +{increase_pct:.0f}%)."
+                    f"{runbook_note}"
                 )
             }
 
@@ -259,7 +298,7 @@ Respond ONLY with a valid JSON object in this exact format (no markdown, no extr
             "type": IncidentType.UNKNOWN,
             "confidence": 0.5,
             "reasoning": (
-                "No clear pattern detected in metrics; manual investigation recommended. "
-                f"Runbook source: {rb_source}."
+                "No clear pattern detected in metrics; manual investigation recommended."
+                f"{runbook_note}"
             ),
         }
\ No newline at end of file
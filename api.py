@@ -1,16 +1,26 @@
 import datetime
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Response, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import json
 import os
 import time
 import datetime
 from fastapi import HTTPException
-from core.models import Incident, AgentStage
+from pydantic import ValidationError
+from core.models import Alert, Incident, AgentStage, IncidentType
+from core.ids import new_incident_id
 from core.state import incident_store
+from core.events import event_bus
+from core.tracing import tracer, export_otlp
 from core.pipeline import IncidentPipeline
+from core.scheduler import SEVERITY_ORDER, scheduler_from_env
+from core.correlation import correlator_from_env, fold_alert
+from core.serialization import dumps, incident_encoder, parse_fields
 from simulator.scenarios import IncidentSimulator
 from dotenv import load_dotenv
 load_dotenv()
@@ -32,8 +42,117 @@ app.add_middleware(
 
 # Global instances
 pipeline = IncidentPipeline()
+scheduler = scheduler_from_env(pipeline)
+correlator = correlator_from_env()
+incident_store.add_listener(correlator.on_store_event)
 simulator = IncidentSimulator()
 
+# Upper bound on alerts accepted by one POST /api/incidents/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+
+# Serialized response bodies keyed by request, valid while their ETag matches
+_response_cache: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+_RESPONSE_CACHE_SIZE = 512
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _conditional_json(request: Request, etag: str, build: Callable[[], Any]) -> Response:
+    """Answer 304 if the client's copy is current; otherwise serve the cached body for this ETag."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    cache_key = str(request.url.include_query_params())
+    cached = _response_cache.get(cache_key)
+    if cached and cached[0] == etag:
+        _response_cache.move_to_end(cache_key)
+        body = cached[1]
+    else:
+        body = dumps(build())
+        _response_cache[cache_key] = (etag, body)
+        _response_cache.move_to_end(cache_key)
+        while len(_response_cache) > _RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _store_etag(kind: str) -> str:
+    return f'W/"{kind}-{incident_store.epoch}-{incident_store.version}"'
+
+
+def _incident_etag(incident: Incident, kind: str = "incident") -> str:
+    return f'"{kind}-{incident.id}-{incident.version}"'
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    scheduler.start()
+
+
+@app.on_event("startup")
+async def resume_interrupted_incidents():
+    """Optionally re-queue incidents a previous process left mid-pipeline."""
+    if os.getenv("PIPELINE_RESUME_ON_STARTUP", "").lower() not in ("1", "true", "yes"):
+        return
+    for incident in incident_store.get_active_incidents():
+        if incident.stage == AgentStage.EXECUTOR and incident.proposed_mitigation and not incident.mitigation_approved:
+            continue  # paused for approval, not interrupted
+        print(f"[PIPELINE] Re-queueing interrupted incident {incident.id} ({incident.stage.value})")
+        scheduler.resume(incident)
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+
+
+@app.on_event("startup")
+async def start_outbox():
+    """Start delivering queued Retool messages (including ones left by a previous process)."""
+    from core.outbox import outbox
+    outbox.start()
+
+
+@app.on_event("shutdown")
+async def stop_outbox():
+    from core.outbox import outbox
+    await outbox.stop()
+
+
+@app.on_event("shutdown")
+async def stop_incident_cards():
+    from core.visuals import incident_cards
+    await incident_cards.stop()
+
+
+@app.on_event("shutdown")
+async def close_http_transport():
+    from integrations.http import http_transport
+    await http_transport.aclose()
+
+
+@app.on_event("startup")
+async def prewarm_ai_client():
+    """Optionally open the shared AI client's connections before the first incident."""
+    if os.getenv("AI_CLIENT_PREWARM", "").lower() in ("1", "true", "yes"):
+        from integrations.gemini import warm_up_ai_client
+        asyncio.create_task(warm_up_ai_client())
+
+
+@app.on_event("startup")
+async def preload_runbooks():
+    """Optionally warm the runbook cache so the first incidents don't wait on GitHub."""
+    if os.getenv("RUNBOOK_PRELOAD", "").lower() in ("1", "true", "yes"):
+        asyncio.create_task(pipeline.scout.doc_fetcher.preload())
+
 
 @app.get("/")
 async def root():
@@ -54,10 +173,51 @@ async def health_check():
 async def simulate_incident(
     incident_type: Optional[str] = None,
     auto_approve: bool = True,
-    background_tasks: BackgroundTasks = None
+    correlate: bool = True,
 ):
     try:
         incident, current_metrics, baseline_metrics = simulator.generate_incident(incident_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Duplicate or related alerts join an open incident instead of starting another pipeline
+    alert_type = incident.alert_type or "unknown"
+    if correlate:
+        correlation = correlator.correlate(incident.service_name, alert_type)
+        parent = incident_store.get_incident(correlation.parent_id) if correlation.parent_id else None
+        if parent is not None:
+            fold_alert(parent, {
+                "service_name": incident.service_name,
+                "alert_type": alert_type,
+                "severity": incident.severity.value,
+            }, correlation)
+            incident_store.update_incident(parent.id, parent)
+            return {
+                "incident_id": parent.id,
+                "service": incident.service_name,
+                "severity": parent.severity.value,
+                "status": correlation.status,
+                "related_via": correlation.related_via,
+                "message": "Alert folded into an open incident"
+            }
+        if correlation.parent_id:
+            correlator.close(correlation.parent_id)  # parent no longer exists
+
+    # Admission control: don't even store incidents the queue can't take
+    if not scheduler.can_admit(incident.severity):
+        scheduler.rejected += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": "5"},
+            content={
+                "status": "rejected",
+                "severity": incident.severity.value,
+                "message": "Pipeline queue is full",
+                "queue_depth": scheduler.depth,
+            },
+        )
+
+    try:
         # Persist metrics on the incident (for HITL approve flow)
         incident.current_metrics = current_metrics
         incident.baseline_metrics = baseline_metrics
@@ -66,51 +226,233 @@ async def simulate_incident(
         # Store once
         incident_store.create_incident(incident)
 
-        # Run pipeline in background
-        background_tasks.add_task(
-            pipeline.run,
-            incident,
-            current_metrics,
-            baseline_metrics,
-            auto_approve
-        )
+        # Queue the pipeline run (bounded worker pool, most severe first)
+        admission = scheduler.submit(incident, current_metrics, baseline_metrics, auto_approve)
+        correlator.track(incident.id, incident.service_name, alert_type)
         return {
             "incident_id": incident.id,
             "service": incident.service_name,
-            "status": "processing",
-            "message": "Incident pipeline started"
+            "severity": incident.severity.value,
+            "status": admission["status"],
+            "queue_position": admission.get("position"),
+            "queue_depth": admission["queue_depth"],
+            "message": "Incident pipeline queued"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/incidents")
-async def list_incidents(limit: int = 50):
-    """List recent incidents."""
-    incidents = incident_store.list_incidents(limit)
+def _parse_alert_batch(request: Request, body: bytes) -> List[Any]:
+    """Split a batch body into raw items: a JSON array, or NDJSON (one alert per line).
+
+    A malformed NDJSON line becomes an error string in its slot so the rest of
+    the batch still goes through; a malformed array rejects the whole request.
+    """
+    text = body.decode("utf-8", errors="replace").strip()
+    content_type = request.headers.get("content-type", "")
+    if text.startswith("[") and "ndjson" not in content_type:
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON array: {e}")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of alerts")
+        return items
+
+    items = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            items.append(f"Invalid JSON line: {e}")
+    return items
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'alert'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+@app.post("/api/incidents/batch")
+async def ingest_incident_batch(
+    request: Request,
+    auto_approve: bool = True,
+    correlate: bool = True,
+):
+    """Ingest many alerts at once (JSON array or NDJSON).
+
+    All items are validated and correlated in one pass, new incidents are
+    written to the store in a single transaction and queued on the scheduler.
+    The response lists, per input item, the incident it ended up in and its
+    status: queued, duplicate, correlated, rejected (queue full) or invalid.
+    """
+    items = _parse_alert_batch(request, await request.body())
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} alerts")
+
+    results: List[Dict[str, Any]] = []
+    new_incidents: Dict[str, Incident] = {}  # opened by this batch, in arrival order
+    folded_parents: Dict[str, Incident] = {}  # existing incidents that absorbed alerts
+
+    # Pass 1: validate and correlate (later items may fold into incidents opened earlier in the batch)
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            results.append({"index": index, "status": "invalid", "error": item})
+            continue
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "invalid", "error": "Alert must be a JSON object"})
+            continue
+        try:
+            alert = Alert(**item)
+        except ValidationError as e:
+            results.append({"index": index, "status": "invalid", "error": _validation_message(e)})
+            continue
+
+        if correlate:
+            correlation = correlator.correlate(alert.service_name, alert.alert_type)
+            parent_id = correlation.parent_id
+            parent = None
+            if parent_id:
+                parent = new_incidents.get(parent_id) or folded_parents.get(parent_id) or incident_store.get_incident(parent_id)
+            if parent is not None:
+                fold_alert(parent, {
+                    "service_name": alert.service_name,
+                    "alert_type": alert.alert_type,
+                    "severity": alert.severity.value,
+                }, correlation)
+                if parent.id not in new_incidents:
+                    folded_parents[parent.id] = parent
+                results.append({
+                    "index": index,
+                    "incident_id": parent.id,
+                    "status": correlation.status,
+                    "related_via": correlation.related_via,
+                })
+                continue
+            if parent_id:
+                correlator.close(parent_id)  # parent no longer exists
+
+        incident = Incident(
+            id=new_incident_id(),
+            service_name=alert.service_name,
+            severity=alert.severity,
+            alert_type=alert.alert_type,
+            start_time=alert.start_time or datetime.datetime.utcnow(),
+            current_metrics=alert.current_metrics,
+            baseline_metrics=alert.baseline_metrics,
+        )
+        new_incidents[incident.id] = incident
+        if correlate:
+            correlator.track(incident.id, incident.service_name, alert.alert_type)
+        results.append({"index": index, "incident_id": incident.id, "status": "new"})
+
+    # Pass 2: admission. Most severe first, so a later item in this batch never
+    # sheds an earlier one; nothing awaits between submit and the store write
+    # below, so no worker can pick up a job before its incident exists.
+    admissions: Dict[str, Dict[str, Any]] = {}
+    by_severity = sorted(
+        new_incidents.values(),
+        key=lambda i: SEVERITY_ORDER.index(i.severity),
+    )
+    for incident in by_severity:
+        incident.pipeline_start_ts = time.time()
+        admissions[incident.id] = scheduler.submit(
+            incident, incident.current_metrics, incident.baseline_metrics, auto_approve,
+        )
+    admitted = [i for i in new_incidents.values() if admissions[i.id]["status"] == "queued"]
+    for incident_id, admission in admissions.items():
+        if admission["status"] == "rejected":
+            correlator.close(incident_id)
+
+    # Pass 3: one store transaction for the new incidents; folded parents are regular updates
+    incident_store.create_incidents(admitted)
+    for parent in folded_parents.values():
+        incident_store.update_incident(parent.id, parent)
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        incident_id = result.get("incident_id")
+        if incident_id in admissions:
+            admission = admissions[incident_id]
+            if result["status"] == "new" or admission["status"] == "rejected":
+                result["status"] = admission["status"]
+            if admission["status"] == "queued":
+                result["queue_position"] = scheduler.position(incident_id)
+            else:
+                result.pop("incident_id")  # never stored
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
     return {
-        "incidents": [inc.dict() for inc in incidents],
-        "count": len(incidents)
+        "received": len(items),
+        "created": len(admitted),
+        "counts": counts,
+        "queue_depth": scheduler.depth,
+        "items": results,
     }
 
 
+@app.get("/api/incidents")
+async def list_incidents(
+    request: Request,
+    limit: int = 50,
+    service: Optional[str] = None,
+    stage: Optional[AgentStage] = None,
+    incident_type: Optional[IncidentType] = None,
+    since: Optional[datetime.datetime] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """List recent incidents (newest first, keyset-paginated via `cursor`).
+
+    Returns compact summaries by default; `fields` instead projects the full
+    incidents to a comma-separated list of fields.
+    """
+    etag = _store_etag("incidents")
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    try:
+        projection = parse_fields(fields)
+        # Full documents only when specific fields were asked for; summaries otherwise
+        query = incident_store.query_incidents if projection else incident_store.query_summaries
+        incidents, next_cursor = query(
+            limit=limit, service=service, stage=stage,
+            incident_type=incident_type, since=since, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _conditional_json(request, etag, lambda: {
+        "incidents": incident_encoder.encode_many(incidents, projection),
+        "count": len(incidents),
+        "next_cursor": next_cursor,
+    })
+
+
 @app.get("/api/incidents/{incident_id}")
-async def get_incident(incident_id: str):
-    """Get a specific incident."""
+async def get_incident(incident_id: str, request: Request, fields: Optional[str] = None):
+    """Get a specific incident (optionally projected to a comma-separated list of `fields`)."""
     incident = incident_store.get_incident(incident_id)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
-    return incident.dict()
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _conditional_json(request, _incident_etag(incident), lambda: incident_encoder.encode(incident, projection))
 
 
 @app.get("/api/incidents/{incident_id}/summary")
-async def get_incident_summary(incident_id: str):
+async def get_incident_summary(incident_id: str, request: Request):
     """Get incident summary/report."""
     incident = incident_store.get_incident(incident_id)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
     
-    return {
+    return _conditional_json(request, _incident_etag(incident, "summary"), lambda: {
         "incident_id": incident.id,
         "service": incident.service_name,
         "type": incident.incident_type.value,
@@ -118,7 +460,42 @@ async def get_incident_summary(incident_id: str):
         "summary": incident.incident_summary,
         "timeline": incident.timeline,
         "metrics": incident.metrics.dict()
-    }
+    })
+
+@app.get("/api/incidents/{incident_id}/timeline")
+async def get_incident_timeline(incident_id: str, request: Request, start: int = 0, limit: int = 200):
+    """Page through the full timeline, including events spilled out of memory to the store."""
+    if start < 0 or limit <= 0:
+        raise HTTPException(status_code=400, detail="start must be >= 0 and limit > 0")
+    incident = incident_store.get_incident(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    etag = _incident_etag(incident, "timeline")
+    page = None
+    if start < incident.timeline_offset and incident_store.backend and not _etag_matches(request, etag):
+        # Spilled events are read after waiting for the store's writer thread; keep that off the loop
+        page = await asyncio.to_thread(incident_store.get_timeline, incident_id, start, limit)
+
+    def build():
+        events, total = page or incident_store.get_timeline(incident_id, start, limit)
+        return {
+            "incident_id": incident_id,
+            "start": start,
+            "total": total,
+            "events": events,
+        }
+    return _conditional_json(request, etag, build)
+
+
+@app.get("/api/incidents/{incident_id}/trace")
+async def get_incident_trace(incident_id: str):
+    """Export the incident's spans as OpenTelemetry (OTLP/JSON) trace data."""
+    incident = incident_store.get_incident(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return export_otlp(incident)
+
 
 @app.post("/api/incidents/{incident_id}/approve")
 async def approve_mitigation(incident_id: str):
@@ -164,7 +541,6 @@ async def approve_mitigation(incident_id: str):
 
     # 3) Update incident state
     incident.applied_mitigation = incident.proposed_mitigation
-    incident.stage = AgentStage.POSTCHECK
 
     start_ts = getattr(incident.metrics, "pipeline_start_ts", 0.0) or approved_at_ts
     if not incident.metrics.time_to_mitigation_seconds:
@@ -181,53 +557,218 @@ async def approve_mitigation(incident_id: str):
     )
     incident_store.update_incident(incident_id, incident)
 
-    context = {
-    "incident": incident,
-    "current_metrics": incident.current_metrics,
-    "baseline_metrics": incident.baseline_metrics,
-    "most_likely_cause": None
+    # Continue from the checkpoints (only postcheck and completion are left) on the
+    # worker pool, like any other run; the mitigation itself is already applied
+    admission = scheduler.resume(incident)
+    response = {
+        "incident_id": incident_id,
+        "status": "applied",
+        "approved": True,
+        "applied_mitigation": incident.applied_mitigation.dict(),
+        "postcheck": admission["status"],
+        "queue_position": admission.get("position"),
     }
+    if admission["status"] == "rejected":
+        response["detail"] = "Pipeline queue is full; POST /resume to run the postcheck later"
+    return response
 
-    incident = await pipeline._run_postcheck(incident, context)
-
-    # Mark completion
-    incident.stage = AgentStage.COMPLETED if incident.metrics_recovered else AgentStage.FAILED
-    incident.end_time = datetime.datetime.utcnow()
-    incident.metrics.mitigation_success = incident.metrics_recovered
-    incident.add_timeline_event(
-        "completed" if incident.metrics_recovered else "failed",
-        "Incident completed after human approval"
-        if incident.metrics_recovered
-        else "Incident failed after human approval",
-    )
 
-    incident_store.update_incident(incident_id, incident)
 
+@app.post("/api/incidents/{incident_id}/resume")
+async def resume_incident(incident_id: str):
+    """Queue an interrupted incident to continue from its last completed stage."""
+    incident = incident_store.get_incident(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    if incident.stage == AgentStage.COMPLETED:
+        return {"incident_id": incident_id, "status": "already_completed"}
+
+    admission = scheduler.resume(incident)
+    if admission["status"] == "rejected":
+        raise HTTPException(status_code=429, detail="Pipeline queue is full", headers={"Retry-After": "5"})
+    if admission["status"] in ("running", "already_queued"):
+        raise HTTPException(status_code=409, detail=f"Incident pipeline is {admission['status'].replace('_', ' ')}")
     return {
         "incident_id": incident_id,
-        "status": "applied" if incident.metrics_recovered else "applied_but_not_recovered",
-        "approved": True,
-        "applied_mitigation": incident.applied_mitigation.dict(),
-        "metrics_recovered": incident.metrics_recovered,
+        "status": "queued",
+        "completed_stages": incident.completed_stages,
+        "queue_position": admission.get("position"),
     }
 
 
+@app.post("/api/incidents/{incident_id}/cancel")
+async def cancel_incident(incident_id: str):
+    """Drop a queued or in-flight pipeline run (cancels pending LLM and HTTP calls)."""
+    incident = incident_store.get_incident(incident_id)
+    if not incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    cancelled = scheduler.cancel(incident_id)
+    return {
+        "incident_id": incident_id,
+        "status": "cancelled" if cancelled else "not_running",
+    }
+
 
 @app.get("/api/statistics")
-async def get_statistics():
+async def get_statistics(request: Request):
     """Get overall system statistics."""
-    stats = incident_store.get_statistics()
-    return stats
+    # Sliding windows move with the clock, so the ETag also rolls every minute
+    etag = f'W/"stats-{incident_store.epoch}-{incident_store.version}-{int(time.time() // 60)}"'
+    return _conditional_json(request, etag, incident_store.get_statistics)
+
+
+@app.get("/api/scheduler")
+async def get_scheduler_stats():
+    """Get pipeline queue depth, wait times and worker utilisation."""
+    return scheduler.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency histograms and pipeline gauges in Prometheus text format."""
+    sched = scheduler.stats()
+    lines = tracer.render_prometheus()
+    lines += [
+        "# HELP incident_pipeline_queue_depth Pipeline runs waiting for a worker",
+        "# TYPE incident_pipeline_queue_depth gauge",
+    ]
+    lines += [
+        f'incident_pipeline_queue_depth{{severity="{severity}"}} {depth}'
+        for severity, depth in sched["queue_depth_by_severity"].items()
+    ]
+    lines += [
+        "# HELP incident_pipeline_in_flight Pipeline runs currently executing",
+        "# TYPE incident_pipeline_in_flight gauge",
+        f"incident_pipeline_in_flight {sched['in_flight']}",
+        "# HELP incident_pipeline_rejected_total Incidents refused by admission control",
+        "# TYPE incident_pipeline_rejected_total counter",
+        f"incident_pipeline_rejected_total {sched['rejected']}",
+        "# HELP incidents_active Incidents not yet completed or failed",
+        "# TYPE incidents_active gauge",
+        f"incidents_active {incident_store.get_statistics()['active']}",
+    ]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/correlation")
+async def get_correlation_stats():
+    """Get alert deduplication / correlation counters."""
+    return correlator.stats()
+
+
+@app.get("/api/cache/llm")
+async def get_llm_cache_stats():
+    """Get LLM response cache hit/miss counters."""
+    from core.llm_cache import llm_cache
+    return llm_cache.stats()
+
+
+@app.get("/api/cache/runbooks")
+async def get_runbook_cache_stats():
+    """Get runbook cache hit/revalidation counters."""
+    from core.http_cache import runbook_cache
+    return runbook_cache.stats()
+
+
+@app.get("/api/http/pools")
+async def get_http_pool_stats():
+    """Get per-host concurrency and connection pool utilization of the shared HTTP transport."""
+    from integrations.http import http_transport
+    return http_transport.stats()
+
+
+@app.get("/api/outbox")
+async def get_outbox_stats():
+    """Get outbox backlog, delivery lag and failure counters per endpoint."""
+    from core.outbox import outbox
+    return outbox.stats()
+
+
+@app.get("/api/outbox/dead-letters")
+async def get_outbox_dead_letters(limit: int = 50):
+    """Get messages that ran out of delivery attempts."""
+    from core.outbox import outbox
+    return outbox.outbox.dead_letters(limit)
+
+
+@app.get("/api/visuals")
+async def get_incident_card_stats():
+    """Get the background incident-card queue's cache, dedupe and drop counters."""
+    from core.visuals import incident_cards
+    return incident_cards.stats()
+
+
+@app.get("/api/cache/serialization")
+async def get_serialization_cache_stats():
+    """Get encoded-incident cache hit/miss counters."""
+    return incident_encoder.stats()
 
 
 @app.get("/api/active")
-async def get_active_incidents():
-    """Get all active incidents."""
-    incidents = incident_store.get_active_incidents()
-    return {
-        "incidents": [inc.dict() for inc in incidents],
-        "count": len(incidents)
-    }
+async def get_active_incidents(
+    request: Request,
+    limit: int = 100,
+    service: Optional[str] = None,
+    stage: Optional[AgentStage] = None,
+    incident_type: Optional[IncidentType] = None,
+    since: Optional[datetime.datetime] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """Get active incidents as summaries (newest first, keyset-paginated via `cursor`, or projected by `fields`)."""
+    etag = _store_etag("active")
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    try:
+        projection = parse_fields(fields)
+        query = incident_store.query_incidents if projection else incident_store.query_summaries
+        incidents, next_cursor = query(
+            limit=limit, service=service, stage=stage,
+            incident_type=incident_type, since=since, cursor=cursor,
+            active_only=True,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _conditional_json(request, etag, lambda: {
+        "incidents": incident_encoder.encode_many(incidents, projection),
+        "count": len(incidents),
+        "next_cursor": next_cursor,
+    })
+
+
+@app.get("/api/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = None,
+    incident_id: Optional[str] = None,
+):
+    """Server-Sent Events stream of incident deltas (created / stage / timeline).
+    
+    Reconnecting clients resume via the `Last-Event-ID` header (or the
+    `last_event_id` query param). A `resync` event means the client fell
+    behind (or sent an id from before a restart) and should reload state
+    over REST before reconnecting.
+    """
+    if last_event_id is None:
+        last_event_id = request.headers.get("last-event-id") or None
+
+    async def event_source():
+        async for event in event_bus.stream(last_event_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            if incident_id and event["data"].get("incident_id") not in (None, incident_id):
+                continue
+            payload = json.dumps(event["data"], default=str)
+            yield f"id: {event_bus.format_id(event['id'])}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/dashboard/retool")
@@ -0,0 +1,201 @@
+"""Ingestion-side alert deduplication and correlation.
+
+Before an alert becomes a new incident (and a full pipeline run), it is
+matched against recently opened incidents. An alert with the same
+fingerprint (service, alert type, time window) is a duplicate. An alert on
+the same service, or on a service linked to it through the dependency graph,
+is folded into that incident as a related symptom. Open correlation groups
+live in an in-memory index that evicts them once they have been quiet for
+the correlation window, so lookups stay O(related services) at high alert rates.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .models import AgentStage, Incident, IncidentSeverity
+from .topology import related_services
+
+Fingerprint = Tuple[str, str, int]
+
+_SEVERITY_RANK = {
+    IncidentSeverity.LOW: 0,
+    IncidentSeverity.MEDIUM: 1,
+    IncidentSeverity.HIGH: 2,
+    IncidentSeverity.CRITICAL: 3,
+}
+
+
+@dataclass
+class CorrelationGroup:
+    """An open parent incident and the alerts folded into it."""
+    incident_id: str
+    services: Set[str]
+    fingerprints: Set[Fingerprint]
+    first_seen: float
+    last_seen: float
+    alerts: int = 1
+
+
+@dataclass
+class CorrelationResult:
+    """Where an incoming alert belongs."""
+    status: str  # "new", "duplicate" or "correlated"
+    parent_id: Optional[str] = None
+    fingerprint: Optional[Fingerprint] = None
+    related_via: Optional[str] = None
+
+
+class AlertCorrelator:
+    """Index of open correlation groups keyed by fingerprint and by service."""
+
+    def __init__(self, window_seconds: float = 300.0, max_hops: int = 2):
+        self.window_seconds = window_seconds
+        self.max_hops = max_hops
+
+        # Ordered by last activity, so expired groups are always at the front
+        self._groups: "OrderedDict[str, CorrelationGroup]" = OrderedDict()
+        self._by_fingerprint: Dict[Fingerprint, str] = {}
+        self._by_service: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.alerts = 0
+        self.duplicates = 0
+        self.correlated = 0
+        self.evicted = 0
+
+    def fingerprint(self, service: str, alert_type: str, ts: float) -> Fingerprint:
+        return (service, alert_type, int(ts // self.window_seconds))
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._groups:
+            incident_id, group = next(iter(self._groups.items()))
+            if group.last_seen >= cutoff:
+                break
+            self._drop(incident_id)
+            self.evicted += 1
+
+    def _drop(self, incident_id: str):
+        group = self._groups.pop(incident_id, None)
+        if group is None:
+            return
+        for fp in group.fingerprints:
+            if self._by_fingerprint.get(fp) == incident_id:
+                del self._by_fingerprint[fp]
+        for service in group.services:
+            if self._by_service.get(service) == incident_id:
+                del self._by_service[service]
+
+    def _touch(self, group: CorrelationGroup, service: str, fp: Fingerprint, now: float):
+        group.last_seen = now
+        group.alerts += 1
+        group.services.add(service)
+        group.fingerprints.add(fp)
+        self._by_fingerprint[fp] = group.incident_id
+        self._by_service[service] = group.incident_id
+        self._groups.move_to_end(group.incident_id)
+
+    def correlate(self, service: str, alert_type: str, now: Optional[float] = None) -> CorrelationResult:
+        """Match an alert to an open group; folds it into the group when it matches."""
+        now = time.time() if now is None else now
+        fp = self.fingerprint(service, alert_type, now)
+        with self._lock:
+            self.alerts += 1
+            self._evict(now)
+
+            parent_id = self._by_fingerprint.get(fp)
+            if parent_id is not None:
+                self.duplicates += 1
+                self._touch(self._groups[parent_id], service, fp, now)
+                return CorrelationResult("duplicate", parent_id, fp)
+
+            # Prefer a group on the same service, then the most recently active related one
+            candidates = []
+            for other in related_services(service, self.max_hops):
+                group_id = self._by_service.get(other)
+                if group_id is not None:
+                    candidates.append((other == service, self._groups[group_id].last_seen, other, group_id))
+            if candidates:
+                _, _, via, group_id = max(candidates)
+                self.correlated += 1
+                self._touch(self._groups[group_id], service, fp, now)
+                return CorrelationResult("correlated", group_id, fp, related_via=via)
+
+            return CorrelationResult("new", None, fp)
+
+    def track(self, incident_id: str, service: str, alert_type: str, now: Optional[float] = None):
+        """Open a correlation group for a newly created incident."""
+        now = time.time() if now is None else now
+        fp = self.fingerprint(service, alert_type, now)
+        with self._lock:
+            self._groups[incident_id] = CorrelationGroup(incident_id, {service}, {fp}, now, now)
+            self._by_fingerprint[fp] = incident_id
+            self._by_service[service] = incident_id
+
+    def close(self, incident_id: str):
+        """Stop folding alerts into an incident (it finished or was dropped)."""
+        with self._lock:
+            self._drop(incident_id)
+
+    def on_store_event(self, event_type: str, data: Dict[str, Any]):
+        """IncidentStore listener: close groups whose incident reached a final stage."""
+        if event_type == "stage" and data.get("stage") in (AgentStage.COMPLETED.value, AgentStage.FAILED.value):
+            self.close(data["incident_id"])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "window_seconds": self.window_seconds,
+                "max_hops": self.max_hops,
+                "open_groups": len(self._groups),
+                "alerts": self.alerts,
+                "duplicates": self.duplicates,
+                "correlated": self.correlated,
+                "evicted": self.evicted,
+            }
+
+
+def fold_alert(parent: Incident, alert: Dict[str, Any], result: CorrelationResult, max_details: int = 100):
+    """Record a duplicate/related alert on its parent incident (escalating severity if needed).
+
+    Only the first `max_details` folded alerts are kept in detail (and on the
+    timeline); beyond that just `alert_count` grows, so a storm can't bloat the incident.
+    """
+    parent.alert_count += 1
+    severity = alert.get("severity")
+    if severity is not None and _SEVERITY_RANK[IncidentSeverity(severity)] > _SEVERITY_RANK[parent.severity]:
+        parent.severity = IncidentSeverity(severity)
+    if len(parent.correlated_alerts) >= max_details:
+        return
+
+    parent.correlated_alerts.append({
+        **alert,
+        "status": result.status,
+        "related_via": result.related_via,
+        "received_at": datetime.utcnow().isoformat(),
+    })
+    message = (
+        f"Duplicate {alert.get('alert_type')} alert on {alert.get('service_name')}"
+        if result.status == "duplicate"
+        else f"Related {alert.get('alert_type')} alert on {alert.get('service_name')} folded in"
+    )
+    parent.add_timeline_event("correlated", message, {
+        "service": alert.get("service_name"),
+        "alert_type": alert.get("alert_type"),
+        "related_via": result.related_via,
+        "total_alerts": parent.alert_count,
+    })
+
+
+def correlator_from_env() -> AlertCorrelator:
+    """Build the correlator configured by CORRELATION_WINDOW / CORRELATION_MAX_HOPS."""
+    return AlertCorrelator(
+        window_seconds=float(os.getenv("CORRELATION_WINDOW", "300")),
+        max_hops=int(os.getenv("CORRELATION_MAX_HOPS", "2")),
+    )
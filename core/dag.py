@@ -0,0 +1,91 @@
+"""Dependency-driven execution of pipeline stages.
+
+Each stage declares the context keys it reads and the keys it writes. The
+graph starts a stage as soon as all of its inputs are available, so stages
+that don't depend on each other overlap instead of running in a fixed order.
+A stage that finishes without producing its outputs (e.g. the executor
+pausing for approval) simply leaves its dependants unstarted, and a stage
+whose outputs are already in the context is not run again.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+@dataclass
+class StageNode:
+    """One pipeline stage: an async callable from context to outputs."""
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+class StageGraph:
+    """A validated DAG of StageNodes."""
+
+    def __init__(self, nodes: Iterable[StageNode], seeds: Iterable[str] = ()):
+        self.nodes: List[StageNode] = list(nodes)
+        self.seeds: Set[str] = set(seeds)
+        self._validate()
+
+    def _validate(self):
+        producers: Dict[str, str] = {}
+        for node in self.nodes:
+            for key in node.outputs:
+                if key in producers or key in self.seeds:
+                    raise ValueError(f"Context key '{key}' is produced more than once ({node.name})")
+                producers[key] = node.name
+
+        for node in self.nodes:
+            for key in node.inputs:
+                if key not in producers and key not in self.seeds:
+                    raise ValueError(f"Stage '{node.name}' needs '{key}', which nothing produces")
+
+        # Kahn's algorithm: every node must become runnable from the seeds alone
+        available = set(self.seeds)
+        remaining = list(self.nodes)
+        while remaining:
+            runnable = [n for n in remaining if all(k in available for k in n.inputs)]
+            if not runnable:
+                raise ValueError(f"Stage graph has a cycle through: {', '.join(n.name for n in remaining)}")
+            for node in runnable:
+                available.update(node.outputs)
+                remaining.remove(node)
+
+    async def run(self, context: Dict[str, Any]) -> List[str]:
+        """Run every stage whose inputs become available; return the stages that never ran.
+
+        Outputs are merged into `context` as each stage finishes. If a stage
+        raises, the stages still in flight are cancelled and the error propagates.
+        """
+        available = {key for key in context if key in self.seeds or any(key in n.outputs for n in self.nodes)}
+        # Stages whose outputs are all present already ran (e.g. restored from a checkpoint)
+        pending = [n for n in self.nodes if not (n.outputs and all(k in available for k in n.outputs))]
+        running: Dict[asyncio.Task, StageNode] = {}
+
+        def start_ready():
+            for node in list(pending):
+                if all(k in available for k in node.inputs):
+                    pending.remove(node)
+                    running[asyncio.create_task(node.run(context), name=f"stage-{node.name}")] = node
+
+        try:
+            start_ready()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node = running.pop(task)
+                    outputs = task.result() or {}
+                    for key in node.outputs:
+                        if key in outputs:
+                            context[key] = outputs[key]
+                            available.add(key)
+                start_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return [node.name for node in pending]
@@ -0,0 +1,155 @@
+"""In-process pub/sub for incident change events.
+
+IncidentStore publishes small deltas (incident created, stage changed,
+timeline event appended) and the streaming API fans them out to connected
+dashboards. Recent events are kept in a ring buffer so clients can resume
+from the last event id they saw.
+
+Event ids are sequence numbers within this process. Clients see them as
+"<epoch>-<seq>" (see `format_id`), so an id from before a restart, when the
+sequence starts over, is recognised as unknown instead of being resumed from.
+"""
+import asyncio
+import itertools
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+
+class Subscription:
+    """A consumer's bounded queue; overflowing it marks the consumer for resync."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def offer(self, event: Dict[str, Any]):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: stop buffering for it and tell it to reload instead
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync", "data": {"reason": "consumer_too_slow"}})
+
+
+class EventBus:
+    """Publishes incident events to subscribers with replay from a ring buffer."""
+
+    def __init__(self, buffer_size: int = 1000, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self.epoch = uuid.uuid4().hex[:8]
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def last_event_id(self) -> int:
+        return self._buffer[-1]["id"] if self._buffer else 0
+
+    def format_id(self, event_id: int) -> str:
+        """The client-facing id of an event (what goes in SSE `id:`)."""
+        return f"{self.epoch}-{event_id}"
+
+    def parse_id(self, raw: str) -> Optional[int]:
+        """The sequence number of a client-facing id, or None if this bus didn't issue it."""
+        epoch, _, seq = raw.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq_id = int(seq)
+        return seq_id if seq_id <= self.last_event_id else None
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Record an event and hand it to every subscriber without blocking."""
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, "data": data}
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for sub in subscribers:
+            if sub.loop is running:
+                sub.offer(event)
+            else:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+
+    def replay(self, last_event_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Events after `last_event_id`, or None if they already fell out of the buffer."""
+        with self._lock:
+            if self._buffer and last_event_id < self._buffer[0]["id"] - 1:
+                return None
+            return [e for e in self._buffer if e["id"] > last_event_id]
+
+    async def stream(
+        self,
+        last_event_id: Optional[str] = None,
+        heartbeat: float = 15.0,
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield events as they are published; yields None as a keep-alive.
+
+        Resumes after `last_event_id` (a client-facing id) when given. If the
+        client fell too far behind (buffer or queue overflow), or sent an id
+        this bus never issued, a `resync` event is sent and the stream ends,
+        so the client reloads full state and reconnects.
+        """
+        sub = Subscription(asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.append(sub)
+        try:
+            if last_event_id is not None:
+                resume_from = self.parse_id(last_event_id)
+                if resume_from is None:
+                    # Not an id this bus issued (e.g. from before a restart, when
+                    # the sequence starts over): the client has to reload
+                    yield {"id": self.last_event_id, "type": "resync", "data": {"reason": "event_id_unknown"}}
+                    return
+                backlog = self.replay(resume_from)
+                if backlog is None:
+                    yield {"id": self.last_event_id, "type": "resync", "data": {"reason": "event_id_expired"}}
+                    return
+                for event in backlog:
+                    yield event
+                last_sent = backlog[-1]["id"] if backlog else resume_from
+            else:
+                last_sent = self.last_event_id
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event["id"] <= last_sent and event["type"] != "resync":
+                    continue  # already delivered during replay
+                yield event
+                if event["type"] == "resync":
+                    return
+                last_sent = event["id"]
+        finally:
+            with self._lock:
+                self._subscribers.remove(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "buffered_events": len(self._buffer),
+            "epoch": self.epoch,
+            "last_event_id": self.last_event_id,
+        }
+
+
+# Global event bus instance
+event_bus = EventBus(
+    buffer_size=int(os.getenv("STREAM_BUFFER_SIZE", "1000")),
+    max_queue=int(os.getenv("STREAM_QUEUE_SIZE", "256")),
+)
@@ -0,0 +1,256 @@
+"""Revalidating cache for slowly-changing HTTP documents (runbooks).
+
+Documents are kept in memory with an optional SQLite tier, so a restart
+doesn't start cold. A fresh entry is served without touching the network.
+A stale entry is served immediately while a background request revalidates
+it with If-None-Match / If-Modified-Since (stale-while-revalidate), so a 304
+costs one header round trip. If revalidation fails, the stale copy is served
+(stale-if-error). Only a URL that has never been fetched puts the network on
+the caller's path.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set
+
+import httpx
+import requests
+
+from .tracing import tracer
+
+
+@dataclass
+class CachedDocument:
+    """A cached response body plus its validators."""
+    url: str
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    validated_at: float = 0.0
+    parsed: Any = None  # memoized parse of `body` (memory tier only)
+
+    def parse(self, parser: Callable[[str], Any]) -> Any:
+        if self.parsed is None:
+            self.parsed = parser(self.body)
+        return self.parsed
+
+
+class HTTPDocumentCache:
+    """Memory + SQLite cache of GET responses with conditional revalidation."""
+
+    def __init__(
+        self,
+        max_age: float = 300.0,
+        stale_while_revalidate: float = 7 * 24 * 3600.0,
+        max_entries: int = 256,
+        path: Optional[str] = None,
+    ):
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        self.path = path
+
+        self._entries: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._revalidating: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.errors = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                "url TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, "
+                "last_modified TEXT, validated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def lookup(self, url: str) -> Optional[CachedDocument]:
+        """The cached document for `url` (memory first, then disk), regardless of age."""
+        with self._lock:
+            doc = self._entries.get(url)
+            if doc is not None:
+                self._entries.move_to_end(url)
+                return doc
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, validated_at FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.disk_hits += 1
+            doc = CachedDocument(url, row[0], row[1], row[2], row[3])
+            self._insert(doc)
+            return doc
+
+    def _insert(self, doc: CachedDocument):
+        self._entries[doc.url] = doc
+        self._entries.move_to_end(doc.url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _persist(self, doc: CachedDocument):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO http_cache (url, body, etag, last_modified, validated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (doc.url, doc.body, doc.etag, doc.last_modified, doc.validated_at),
+        )
+        self._db.commit()
+
+    def age(self, doc: CachedDocument) -> float:
+        return time.time() - doc.validated_at
+
+    def conditional_headers(self, doc: Optional[CachedDocument]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if doc is not None:
+            if doc.etag:
+                headers["If-None-Match"] = doc.etag
+            if doc.last_modified:
+                headers["If-Modified-Since"] = doc.last_modified
+        return headers
+
+    def _apply_response(
+        self, url: str, doc: Optional[CachedDocument], status: int, body: str, headers: Any,
+    ) -> Optional[CachedDocument]:
+        """Fold a (conditional) GET response into the cache; returns the current document."""
+        self.revalidations += 1
+        if status == 304 and doc is not None:
+            self.not_modified += 1
+            doc.validated_at = time.time()
+            with self._lock:
+                self._persist(doc)
+            return doc
+        if status == 200:
+            new = CachedDocument(
+                url, body,
+                etag=headers.get("etag"),
+                last_modified=headers.get("last-modified"),
+                validated_at=time.time(),
+            )
+            with self._lock:
+                self._insert(new)
+                self._persist(new)
+            return new
+        self.errors += 1
+        print(f"[HTTP-CACHE] {url} returned {status}")
+        return doc  # stale-if-error
+
+    # ------------------------------------------------------------------
+    # Async path (stale-while-revalidate)
+    # ------------------------------------------------------------------
+
+    async def get(self, url: str, client: Any, parser: Callable[[str], Any]) -> Optional[Any]:
+        """Parsed document for `url`, fetching only when there is nothing usable cached.
+
+        `client` is anything with an async `get(url, headers=...)` returning an
+        httpx response (an httpx.AsyncClient or the integrations' HTTPTransport).
+        """
+        doc = self.lookup(url)
+        if doc is not None:
+            age = self.age(doc)
+            if age < self.max_age:
+                self.fresh_hits += 1
+                return doc.parse(parser)
+            if age < self.max_age + self.stale_while_revalidate:
+                self.stale_hits += 1
+                self._revalidate_in_background(url, client)
+                return doc.parse(parser)
+
+        self.misses += 1
+        with tracer.span("http", "cache.fetch", url=url):
+            doc = await self._fetch(url, client, doc)
+        return doc.parse(parser) if doc is not None else None
+
+    async def _fetch(
+        self, url: str, client: Any, doc: Optional[CachedDocument],
+    ) -> Optional[CachedDocument]:
+        try:
+            resp = await client.get(url, headers=self.conditional_headers(doc))
+        except httpx.HTTPError as e:
+            self.errors += 1
+            print(f"[HTTP-CACHE] Fetch failed for {url}: {e}")
+            return doc
+        return self._apply_response(url, doc, resp.status_code, resp.text, resp.headers)
+
+    def _revalidate_in_background(self, url: str, client: Any):
+        if url in self._revalidating:
+            return  # single flight per URL
+        self._revalidating.add(url)
+
+        async def revalidate():
+            try:
+                await self._fetch(url, client, self.lookup(url))
+            finally:
+                self._revalidating.discard(url)
+
+        task = asyncio.get_running_loop().create_task(revalidate())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # ------------------------------------------------------------------
+    # Blocking path (revalidates inline when not fresh)
+    # ------------------------------------------------------------------
+
+    def get_sync(self, url: str, client: Any, parser: Callable[[str], Any]) -> Optional[Any]:
+        """Blocking `get`; `client` needs a `get_sync(url, headers=...)` returning a requests response."""
+        doc = self.lookup(url)
+        if doc is not None and self.age(doc) < self.max_age:
+            self.fresh_hits += 1
+            return doc.parse(parser)
+
+        self.misses += 1
+        try:
+            resp = client.get_sync(url, headers=self.conditional_headers(doc))
+            doc = self._apply_response(url, doc, resp.status_code, resp.text, resp.headers)
+        except requests.RequestException as e:
+            self.errors += 1
+            print(f"[HTTP-CACHE] Fetch failed for {url}: {e}")
+        return doc.parse(parser) if doc is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_age_seconds": self.max_age,
+            "stale_while_revalidate_seconds": self.stale_while_revalidate,
+            "persistent": self._db is not None,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "revalidating": len(self._revalidating),
+            "hit_rate": ((self.fresh_hits + self.stale_hits) / lookups * 100) if lookups else 0,
+        }
+
+
+# Global runbook cache instance
+runbook_cache = HTTPDocumentCache(
+    max_age=float(os.getenv("RUNBOOK_CACHE_MAX_AGE", "300")),
+    stale_while_revalidate=float(os.getenv("RUNBOOK_CACHE_STALE", str(7 * 24 * 3600))),
+    path=os.getenv("RUNBOOK_CACHE_PATH") or None,
+)
@@ -0,0 +1,87 @@
+"""Time-sortable unique IDs (ULID layout).
+
+An ID is a 48-bit millisecond timestamp followed by 80 random bits, encoded
+as 26 Crockford base32 characters, so IDs sort lexicographically by creation
+time. Within one process IDs created in the same millisecond increment the
+random part, which keeps them strictly monotonic; the random bits keep IDs
+from different processes (or forked workers) from colliding.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {c: i for i, c in enumerate(_ALPHABET)}
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+ULID_LENGTH = 26
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class ULIDGenerator:
+    """Monotonic ULID source (thread-safe, reset in forked children)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms <= self._last_ms:
+                # Same (or earlier, if the clock stepped back) millisecond: bump the random part
+                now_ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part > _RANDOM_MAX:
+                    now_ms += 1
+                    random_part = int.from_bytes(os.urandom(10), "big")
+            else:
+                random_part = int.from_bytes(os.urandom(10), "big")
+            self._last_ms = now_ms
+            self._last_random = random_part
+        return _encode(now_ms, 10) + _encode(random_part, 16)
+
+
+_generator = ULIDGenerator()
+if hasattr(os, "register_at_fork"):
+    # A child must not continue the parent's monotonic sequence
+    os.register_at_fork(after_in_child=_generator._reset)
+
+
+def new_ulid() -> str:
+    return _generator.new()
+
+
+def new_incident_id(prefix: str = "inc") -> str:
+    """A new incident ID such as `inc-01HZX3J5Q8W2M6YB4T0RK9C7DE`."""
+    return f"{prefix}-{new_ulid()}"
+
+
+def id_timestamp(entity_id: str) -> Optional[float]:
+    """Epoch seconds embedded in a ULID-based ID, or None for other ID formats."""
+    ulid = entity_id.rsplit("-", 1)[-1]
+    if len(ulid) != ULID_LENGTH:
+        return None
+    ms = 0
+    for char in ulid[:10]:
+        value = _DECODE.get(char)
+        if value is None:
+            return None
+        ms = (ms << 5) | value
+    if any(char not in _DECODE for char in ulid[10:]):
+        return None
+    return ms / 1000.0
@@ -0,0 +1,106 @@
+"""Secondary indexes for IncidentStore.
+
+Every index keeps incident sort keys `(created_ts, id)` in ascending order so a
+page of the newest incidents can be read by walking backwards from a cursor,
+without copying or sorting the whole store. For time-sortable IDs the
+timestamp comes from the ID itself, so key order is ID order and new
+incidents are appended at the end of each index.
+"""
+import base64
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from .ids import id_timestamp
+
+SortKey = Tuple[float, str]
+
+
+def sort_key(incident) -> SortKey:
+    """Time-ordered key for an incident (ties broken by ID).
+
+    Uses the creation time encoded in the ID; legacy IDs fall back to start_time.
+    """
+    ts = id_timestamp(incident.id)
+    if ts is None:
+        ts = to_timestamp(incident.start_time)
+    return (ts, incident.id)
+
+
+def to_timestamp(dt: datetime) -> float:
+    """Epoch seconds; naive datetimes are treated as UTC (the models use utcnow)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def encode_cursor(key: SortKey) -> str:
+    raw = f"{key[0]!r}|{key[1]}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Decode a cursor; raises ValueError if it is malformed."""
+    try:
+        ts, incident_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return (float(ts), incident_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class SortedKeyList:
+    """Ascending list of sort keys with O(log n) lookup."""
+
+    def __init__(self):
+        self.keys: List[SortKey] = []
+
+    def add(self, key: SortKey):
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)  # the common case: IDs are created in time order
+        else:
+            insort(self.keys, key)
+
+    def remove(self, key: SortKey):
+        pos = bisect_left(self.keys, key)
+        if pos < len(self.keys) and self.keys[pos] == key:
+            del self.keys[pos]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def iter_desc(self, before: Optional[SortKey] = None) -> Iterator[SortKey]:
+        """Yield keys newest-first, strictly older than `before` if given."""
+        end = bisect_left(self.keys, before) if before is not None else len(self.keys)
+        for pos in range(end - 1, -1, -1):
+            yield self.keys[pos]
+
+
+class FieldIndex:
+    """Maps a field value to the sorted keys of incidents having that value."""
+
+    def __init__(self):
+        self.buckets: Dict[Hashable, SortedKeyList] = {}
+
+    def add(self, value: Hashable, key: SortKey):
+        bucket = self.buckets.get(value)
+        if bucket is None:
+            bucket = self.buckets[value] = SortedKeyList()
+        bucket.add(key)
+
+    def remove(self, value: Hashable, key: SortKey):
+        bucket = self.buckets.get(value)
+        if bucket is not None:
+            bucket.remove(key)
+            if not bucket:
+                del self.buckets[value]
+
+    def size(self, values: Iterable[Hashable]) -> int:
+        return sum(len(self.buckets[v]) for v in values if v in self.buckets)
+
+    def iter_desc(self, values: Iterable[Hashable], before: Optional[SortKey] = None) -> Iterator[SortKey]:
+        """Newest-first keys across one or more values (k-way merge)."""
+        streams = [self.buckets[v].iter_desc(before) for v in values if v in self.buckets]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, reverse=True)
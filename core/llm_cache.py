@@ -0,0 +1,176 @@
+"""Content-addressed cache for LLM responses.
+
+Recurring incidents (same service, same metric shape, same log signature)
+produce the same prompt inputs, so Triage and Hypothesis can reuse an earlier
+Gemini answer instead of paying another round trip.
+"""
+import os
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+from .models import Evidence
+from .logs import log_template
+
+
+def log_templates(logs: List[str]) -> List[str]:
+    """Deduplicated, order-independent set of log templates."""
+    return sorted({log_template(line) for line in logs or [] if line.strip()})
+
+
+def bucket_metric(value: Any) -> Any:
+    """Bucket a metric on a half-octave log scale so small jitter maps to the same key."""
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return value
+    if v <= 0:
+        return 0
+    return int(round(math.log2(v + 1) * 2))
+
+
+def bucket_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: bucket_metric(v) for k, v in sorted((metrics or {}).items())}
+
+
+def fingerprint(parts: Dict[str, Any]) -> str:
+    """Stable SHA-256 over a JSON-serializable dict."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def evidence_fingerprint(
+    kind: str,
+    evidence: Evidence,
+    baseline_metrics: Optional[Dict[str, Any]] = None,
+    runbooks: Optional[Dict[str, Any]] = None,
+    **extra: Any,
+) -> str:
+    """Fingerprint the normalized prompt inputs for an LLM call.
+
+    Uses bucketed current/baseline metrics, deduplicated log templates, the
+    most recent deploy version and the runbook source.
+    """
+    deploys = evidence.recent_deploys if evidence else []
+    return fingerprint({
+        "kind": kind,
+        "metrics": bucket_metrics(evidence.metrics if evidence else {}),
+        "baseline": bucket_metrics(baseline_metrics or {}),
+        "logs": log_templates(evidence.logs if evidence else []),
+        "deploy_version": deploys[0].get("version") if deploys else None,
+        "dependencies": sorted(evidence.dependencies) if evidence else [],
+        "runbook_source": (runbooks or {}).get("source"),
+        **extra,
+    })
+
+
+class LLMResponseCache:
+    """LRU + TTL cache of parsed LLM responses with an optional SQLite tier."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0,
+                 path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for `key`, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] >= now:
+                    value = json.loads(row[0])
+                    self._insert(key, row[1], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a parsed response under `key`."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._insert(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at),
+                )
+                self._db.commit()
+
+    def _insert(self, key: str, expires_at: float, value: Dict[str, Any]):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0,
+        }
+
+
+# Global cache instance
+llm_cache = LLMResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "3600")),
+    path=os.getenv("LLM_CACHE_PATH") or None,
+)
@@ -0,0 +1,210 @@
+"""Streaming log digestion for Scout.
+
+Log files are read incrementally rather than loaded whole. Each line is
+reduced to a template by masking volatile tokens (timestamps, IDs, numbers),
+so repeats collapse into one entry with a count. Only the top-K templates by
+severity and frequency are kept for the agents. Hard line and byte budgets
+stop the read early, so a huge or endless log costs bounded memory and
+bandwidth.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+# Volatile tokens stripped from log lines so that repeats collapse to one template
+_LOG_PATTERNS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{7,}\b", re.I), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+]
+
+_LEVEL_PATTERN = re.compile(r"\b(FATAL|CRITICAL|ERROR|WARN(?:ING)?|INFO|DEBUG|TRACE)\b", re.I)
+
+SEVERITY_RANK = {
+    "FATAL": 5,
+    "CRITICAL": 5,
+    "ERROR": 4,
+    "WARNING": 3,
+    "WARN": 3,
+    "INFO": 2,
+    "DEBUG": 1,
+    "TRACE": 0,
+}
+
+
+def log_template(line: str) -> str:
+    """Reduce a log line to its template by masking volatile tokens."""
+    template = line.strip()
+    for pattern, placeholder in _LOG_PATTERNS:
+        template = pattern.sub(placeholder, template)
+    return template
+
+
+def log_level(line: str) -> str:
+    """The line's log level (INFO when it doesn't name one)."""
+    match = _LEVEL_PATTERN.search(line)
+    return match.group(1).upper() if match else "INFO"
+
+
+@dataclass
+class LogTemplate:
+    """A group of log lines sharing one template."""
+    template: str
+    level: str
+    sample: str  # first raw line seen
+    first_line: int
+    count: int = 0
+
+    @property
+    def rank(self) -> tuple:
+        # Most severe first, then most frequent, then earliest
+        return (-SEVERITY_RANK.get(self.level, 2), -self.count, self.first_line)
+
+    def render(self) -> str:
+        return self.sample if self.count == 1 else f"{self.sample} (x{self.count})"
+
+
+@dataclass
+class LogDigest:
+    """Ranked, deduplicated view of a log stream."""
+    templates: List[LogTemplate] = field(default_factory=list)
+    lines_read: int = 0
+    bytes_read: int = 0
+    distinct_templates: int = 0
+    untracked_lines: int = 0  # lines whose template arrived after the template table filled up
+    truncated: Optional[str] = None  # "lines" or "bytes" when a budget stopped the read
+
+    def lines(self) -> List[str]:
+        """One line per kept template: a sample line, suffixed with its count."""
+        return [t.render() for t in self.templates]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lines_read": self.lines_read,
+            "bytes_read": self.bytes_read,
+            "distinct_templates": self.distinct_templates,
+            "kept_templates": len(self.templates),
+            "untracked_lines": self.untracked_lines,
+            "levels": self._level_counts(),
+            "truncated": self.truncated,
+        }
+
+    def _level_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for t in self.templates:
+            counts[t.level] = counts.get(t.level, 0) + t.count
+        return counts
+
+
+class LogDigester:
+    """Incremental template miner with hard line and byte budgets.
+
+    Feed it raw chunks (`feed_chunk`) or decoded lines (`add_line`); both
+    return False once a budget is used up, so the caller can stop reading.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 20,
+        max_lines: int = 100_000,
+        max_bytes: int = 5_000_000,
+        max_line_bytes: int = 2_000,
+        max_templates: int = 5_000,
+    ):
+        self.top_k = top_k
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_line_bytes = max_line_bytes
+        self.max_templates = max_templates
+
+        self._templates: Dict[str, LogTemplate] = {}
+        self._partial = b""
+        self.lines_read = 0
+        self.bytes_read = 0
+        self.untracked_lines = 0
+        self.truncated: Optional[str] = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.truncated is not None
+
+    def feed_chunk(self, chunk: bytes) -> bool:
+        """Consume raw bytes from the stream (lines may span chunks)."""
+        if self.exhausted:
+            return False
+        room = self.max_bytes - self.bytes_read
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = "bytes"
+        self.bytes_read += len(chunk)
+
+        lines = (self._partial + chunk).split(b"\n")
+        # Keep the unfinished tail, capped so one endless line can't grow without bound
+        self._partial = lines.pop()[:self.max_line_bytes]
+        for raw in lines:
+            if not self._add(raw[:self.max_line_bytes].decode("utf-8", errors="replace")):
+                return False
+        if self.truncated:
+            self._partial = b""  # cut off mid-line by the budget; not a real line
+            return False
+        return True
+
+    def add_line(self, line: str) -> bool:
+        """Consume one decoded line."""
+        if self.exhausted:
+            return False
+        size = len(line.encode("utf-8", errors="replace")) + 1
+        if self.bytes_read + size > self.max_bytes:
+            self.truncated = "bytes"
+            return False
+        self.bytes_read += size
+        return self._add(line[:self.max_line_bytes])
+
+    def _flush_partial(self):
+        if self._partial:
+            partial, self._partial = self._partial, b""
+            self._add(partial.decode("utf-8", errors="replace"))
+
+    def _add(self, line: str) -> bool:
+        if self.lines_read >= self.max_lines:
+            self.truncated = "lines"
+            return False
+        self.lines_read += 1
+        line = line.rstrip("\r")
+        if not line.strip():
+            return True
+
+        template = log_template(line)
+        entry = self._templates.get(template)
+        if entry is None:
+            if len(self._templates) >= self.max_templates:
+                self.untracked_lines += 1
+                return True
+            entry = LogTemplate(template, log_level(line), line.strip(), self.lines_read)
+            self._templates[template] = entry
+        entry.count += 1
+        return True
+
+    def digest(self) -> LogDigest:
+        """Finish the stream and return the top-K templates."""
+        self._flush_partial()
+        ranked = sorted(self._templates.values(), key=lambda t: t.rank)
+        return LogDigest(
+            templates=ranked[:self.top_k],
+            lines_read=self.lines_read,
+            bytes_read=self.bytes_read,
+            distinct_templates=len(self._templates),
+            untracked_lines=self.untracked_lines,
+            truncated=self.truncated,
+        )
+
+
+def digest_lines(lines: Iterable[str], **budgets: Any) -> LogDigest:
+    """Digest an iterable of lines, consuming it only up to the budgets."""
+    digester = LogDigester(**budgets)
+    for line in lines:
+        if not digester.add_line(line):
+            break
+    return digester.digest()
@@ -1,7 +1,10 @@
+import sys
+import time
 from enum import Enum
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from pydantic import BaseModel, Field
+from pydantic_core import core_schema
 
 
 class IncidentType(str, Enum):
@@ -46,10 +49,12 @@ class MitigationType(str, Enum):
 class Evidence(BaseModel):
     """Evidence collected by Scout agent."""
     metrics: Dict[str, Any] = Field(default_factory=dict)
-    logs: List[str] = Field(default_factory=list)
+    logs: List[str] = Field(default_factory=list)  # ranked log digest: one sample line per template
+    log_stats: Dict[str, Any] = Field(default_factory=dict)  # lines/bytes read, template counts, truncation
     recent_deploys: List[Dict[str, Any]] = Field(default_factory=list)
     traces: List[str] = Field(default_factory=list)
     dependencies: List[str] = Field(default_factory=list)
+    missing_sources: List[str] = Field(default_factory=list)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -96,6 +101,70 @@ class IncidentMetrics(BaseModel):
     false_positive: bool = False
 
 
+class TimelineEvent:
+    """One timeline entry.
+    
+    Kept compact in memory (slots, epoch timestamp, interned stage name) and
+    rendered as {timestamp, stage, message, data} with an ISO timestamp only
+    when serialized.
+    """
+    __slots__ = ("ts", "stage", "message", "data")
+    
+    def __init__(self, stage: str, message: str, data: Optional[Dict[str, Any]] = None, ts: Optional[float] = None):
+        self.ts = time.time() if ts is None else ts
+        self.stage = sys.intern(stage)
+        self.message = message
+        self.data = data or {}
+    
+    @property
+    def timestamp(self) -> str:
+        """ISO-8601 timestamp (naive UTC, like datetime.utcnow().isoformat())."""
+        return datetime.fromtimestamp(self.ts, timezone.utc).replace(tzinfo=None).isoformat()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"timestamp": self.timestamp, "stage": self.stage, "message": self.message, "data": self.data}
+    
+    def to_record(self) -> Dict[str, Any]:
+        """Compact storage form (epoch timestamp)."""
+        return {"ts": self.ts, "stage": self.stage, "message": self.message, "data": self.data}
+    
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any]) -> "TimelineEvent":
+        """Build from either the storage form or the serialized (ISO timestamp) form."""
+        ts = event.get("ts")
+        if ts is None and event.get("timestamp"):
+            ts = datetime.fromisoformat(event["timestamp"]).replace(tzinfo=timezone.utc).timestamp()
+        return cls(event.get("stage", ""), event.get("message", ""), event.get("data"), ts)
+    
+    @classmethod
+    def _validate(cls, value: Any) -> "TimelineEvent":
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls.from_dict(value)
+        raise ValueError("timeline event must be a TimelineEvent or a dict")
+    
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.to_dict),
+        )
+    
+    def __repr__(self) -> str:
+        return f"TimelineEvent({self.stage!r}, {self.message!r}, ts={self.ts})"
+
+
+class Alert(BaseModel):
+    """An incoming monitoring alert; opens a new incident or joins an open one."""
+    service_name: str
+    alert_type: str = "unknown"
+    severity: IncidentSeverity = IncidentSeverity.MEDIUM
+    current_metrics: Dict[str, Any] = Field(default_factory=dict)
+    baseline_metrics: Dict[str, Any] = Field(default_factory=dict)
+    start_time: Optional[datetime] = None
+
+
 class Incident(BaseModel):
     """Main incident model tracking the entire lifecycle."""
     id: str
@@ -107,6 +176,7 @@ class Incident(BaseModel):
     stage: AgentStage = AgentStage.DETECTION
     severity: IncidentSeverity = IncidentSeverity.MEDIUM
     incident_type: IncidentType = IncidentType.UNKNOWN
+    alert_type: Optional[str] = None  # the alert that opened it, before triage classifies it
     
     # Agent outputs
     evidence: Optional[Evidence] = None
@@ -119,21 +189,87 @@ class Incident(BaseModel):
     mitigation_approved: bool = False
     metrics_recovered: bool = False
     incident_summary: str = ""
+    visual_url: Optional[str] = None  # incident card, attached later by core.visuals
     baseline_metrics: Dict[str, Any] = Field(default_factory=dict)
     current_metrics: Dict[str, Any] = Field(default_factory=dict)
     
     # Metrics
     metrics: IncidentMetrics = Field(default_factory=IncidentMetrics)
     
-    # Audit trail
-    timeline: List[Dict[str, Any]] = Field(default_factory=list)
+    # Audit trail: the most recent events; the store spills older ones to its
+    # backend (timeline_offset counts them, so event i is number offset + i overall)
+    timeline: List[TimelineEvent] = Field(default_factory=list)
+    timeline_offset: int = 0
+    
+    # Duplicate and related alerts folded into this incident by the correlator
+    # (details are capped; alert_count keeps the full total)
+    correlated_alerts: List[Dict[str, Any]] = Field(default_factory=list)
+    alert_count: int = 1
+    
+    # Checkpoints: stages completed so far and the extra outputs needed to resume after them
+    completed_stages: List[str] = Field(default_factory=list)
+    checkpoint: Dict[str, Any] = Field(default_factory=dict)
+    
+    # Tracing (spans recorded by core.tracing, exportable as OTLP JSON)
+    trace_id: Optional[str] = None
+    spans: List[Dict[str, Any]] = Field(default_factory=list)
+    
+    # Bumped by the store on every create/update (used for ETags)
+    version: int = 0
     
     def add_timeline_event(self, stage: str, message: str, data: Optional[Dict] = None):
         """Add an event to the incident timeline."""
-        self.timeline.append({
-            "timestamp": datetime.utcnow().isoformat(),
-            "stage": stage,
-            "message": message,
-            "data": data or {}
-        })
+        self.timeline.append(TimelineEvent(stage, message, data))
+
 
+
+class IncidentSummary(BaseModel):
+    """Compact list-view projection of an Incident (no evidence, hypotheses or timeline).
+    
+    The store keeps one per incident and refreshes it in place on every update.
+    """
+    id: str
+    service_name: str
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    stage: AgentStage
+    severity: IncidentSeverity
+    incident_type: IncidentType
+    alert_type: Optional[str] = None
+    alert_count: int = 1
+    mitigation_approved: bool = False
+    metrics_recovered: bool = False
+    time_to_mitigation_seconds: float = 0.0
+    version: int = 0
+    
+    @classmethod
+    def from_incident(cls, incident: Incident) -> "IncidentSummary":
+        return cls(
+            id=incident.id,
+            service_name=incident.service_name,
+            start_time=incident.start_time,
+            end_time=incident.end_time,
+            stage=incident.stage,
+            severity=incident.severity,
+            incident_type=incident.incident_type,
+            alert_type=incident.alert_type,
+            alert_count=incident.alert_count,
+            mitigation_approved=incident.mitigation_approved,
+            metrics_recovered=incident.metrics_recovered,
+            time_to_mitigation_seconds=incident.metrics.time_to_mitigation_seconds,
+            version=incident.version,
+        )
+    
+    def refresh(self, incident: Incident):
+        """Copy the summarized fields from the incident (in place)."""
+        self.start_time = incident.start_time
+        self.end_time = incident.end_time
+        self.stage = incident.stage
+        self.severity = incident.severity
+        self.incident_type = incident.incident_type
+        self.alert_type = incident.alert_type
+        self.alert_count = incident.alert_count
+        self.mitigation_approved = incident.mitigation_approved
+        self.metrics_recovered = incident.metrics_recovered
+        self.time_to_mitigation_seconds = incident.metrics.time_to_mitigation_seconds
+        self.version = incident.version
@@ -0,0 +1,394 @@
+"""Durable outbox for calls to external endpoints (Retool approvals and dashboard pushes).
+
+Callers write a message to a local SQLite queue and return immediately. A
+background dispatcher on the event loop drains the queue and calls the
+handler registered for each message kind, so a slow or failing endpoint
+never sits on the incident pipeline's path and nothing is lost while it is
+down:
+
+- messages with a coalesce key (one dashboard data type) replace the
+  pending message with the same key, so only the latest payload is sent
+- failed deliveries are retried with exponential backoff and full jitter,
+  and parked as dead letters after `max_attempts`
+- each kind (endpoint) has its own concurrency limit
+- claimed messages are leased, so a crash mid-delivery only delays them
+
+The queue lives in OUTBOX_PATH (default `outbox.db` in the working
+directory). OUTBOX_PATH=":memory:" keeps it in memory instead; that is
+only meant for tests and demos, since queued messages are then lost on
+restart.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .stats import QuantileSketch
+
+DEFAULT_OUTBOX_PATH = "outbox.db"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[bool]]
+
+
+@dataclass
+class OutboxMessage:
+    """A claimed message."""
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    revision: int
+    attempts: int
+    created_at: float
+
+
+class Outbox:
+    """SQLite-backed message queue with coalescing, leases and dead letters."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or ":memory:"
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, coalesce_key TEXT, "
+            "payload TEXT NOT NULL, revision INTEGER NOT NULL DEFAULT 0, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL, "
+            "created_at REAL NOT NULL, last_error TEXT, dead INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(kind, dead, next_attempt)"
+        )
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_coalesce ON outbox(kind, coalesce_key) "
+            "WHERE coalesce_key IS NOT NULL AND dead = 0"
+        )
+
+    def put(self, kind: str, payload: Dict[str, Any], coalesce_key: Optional[str] = None) -> bool:
+        """Queue a message; returns True if it replaced a pending one with the same key."""
+        body = json.dumps(payload, default=str)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = None
+                if coalesce_key is not None:
+                    row = self._db.execute(
+                        "SELECT id FROM outbox WHERE kind = ? AND coalesce_key = ? AND dead = 0",
+                        (kind, coalesce_key),
+                    ).fetchone()
+                if row is not None:
+                    # Keep created_at and the backoff schedule: lag is measured from the
+                    # oldest undelivered update, and a failing endpoint stays backed off
+                    self._db.execute(
+                        "UPDATE outbox SET payload = ?, revision = revision + 1 WHERE id = ?",
+                        (body, row[0]),
+                    )
+                else:
+                    self._db.execute(
+                        "INSERT INTO outbox (kind, coalesce_key, payload, next_attempt, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (kind, coalesce_key, body, now, now),
+                    )
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+        return row is not None
+
+    def claim(self, kind: str, limit: int, lease: float) -> List[OutboxMessage]:
+        """Take up to `limit` due messages of a kind, hidden from other claims for `lease` seconds."""
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, kind, payload, revision, attempts, created_at FROM outbox "
+                    "WHERE kind = ? AND dead = 0 AND next_attempt <= ? ORDER BY next_attempt, id LIMIT ?",
+                    (kind, now, limit),
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE outbox SET next_attempt = ? WHERE id = ?",
+                    [(now + lease, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+        return [
+            OutboxMessage(id, kind, json.loads(payload), revision, attempts, created_at)
+            for id, kind, payload, revision, attempts, created_at in rows
+        ]
+
+    def ack(self, message: OutboxMessage) -> bool:
+        """Remove a delivered message; returns False if it was coalesced meanwhile (and is due again)."""
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM outbox WHERE id = ? AND revision = ?", (message.id, message.revision)
+            ).rowcount
+            if not deleted:
+                # A newer payload arrived while this one was in flight; send it next
+                self._db.execute(
+                    "UPDATE outbox SET next_attempt = ?, attempts = 0 WHERE id = ?", (time.time(), message.id)
+                )
+        return bool(deleted)
+
+    def retry(self, message: OutboxMessage, delay: float, error: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, error, message.id),
+            )
+
+    def bury(self, message: OutboxMessage, error: str):
+        """Park a message that ran out of attempts as a dead letter."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET attempts = attempts + 1, dead = 1, last_error = ? WHERE id = ?",
+                (error, message.id),
+            )
+
+    def counts(self) -> Dict[str, Dict[str, Any]]:
+        """Pending/due/dead counts and the oldest pending message's age, per kind."""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, SUM(dead = 0), SUM(dead = 0 AND next_attempt <= ?), SUM(dead), "
+                "MIN(CASE WHEN dead = 0 THEN created_at END) FROM outbox GROUP BY kind",
+                (now,),
+            ).fetchall()
+        return {
+            kind: {
+                "pending": pending or 0,
+                "due": due or 0,
+                "dead_letters": dead or 0,
+                "lag_seconds": now - oldest if oldest is not None else 0.0,
+            }
+            for kind, pending, due, dead, oldest in rows
+        }
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, kind, coalesce_key, payload, attempts, created_at, last_error FROM outbox "
+                "WHERE dead = 1 ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "id": id, "kind": kind, "coalesce_key": key, "payload": json.loads(payload),
+                "attempts": attempts, "created_at": created_at, "last_error": error,
+            }
+            for id, kind, key, payload, attempts, created_at, error in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+@dataclass
+class Endpoint:
+    """A registered message kind: its handler, concurrency limit and counters."""
+    kind: str
+    handler: Handler
+    concurrency: int
+    in_flight: int = 0
+    queued: int = 0
+    coalesced: int = 0
+    delivered: int = 0
+    failures: int = 0  # failed attempts (each retry counts)
+    dead_letters: int = 0
+    delivery_lag: QuantileSketch = field(default_factory=QuantileSketch)  # queued -> delivered
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "delivered": self.delivered,
+            "failures": self.failures,
+            "dead_lettered": self.dead_letters,
+            "delivery_lag_p50_seconds": self.delivery_lag.quantile(0.50),
+            "delivery_lag_p95_seconds": self.delivery_lag.quantile(0.95),
+        }
+
+
+class OutboxDispatcher:
+    """Drains an Outbox on the event loop, per-kind concurrency and backoff included."""
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        max_attempts: int = 10,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        lease: float = 60.0,
+        poll_interval: float = 1.0,
+    ):
+        self.outbox = outbox
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+
+        self._endpoints: Dict[str, Endpoint] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._deliveries: Set[asyncio.Task] = set()
+
+    def register(self, kind: str, handler: Handler, concurrency: int = 4):
+        """Route messages of `kind` to `handler` (True = delivered), at most `concurrency` at a time."""
+        self._endpoints[kind] = Endpoint(kind, handler, max(1, concurrency))
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], coalesce_key: Optional[str] = None) -> str:
+        """Write a message to the outbox; returns "queued" or "coalesced"."""
+        coalesced = self.outbox.put(kind, payload, coalesce_key)
+        endpoint = self._endpoints.get(kind)
+        if endpoint is not None:
+            endpoint.queued += 1
+            endpoint.coalesced += coalesced
+        self._notify()
+        return "coalesced" if coalesced else "queued"
+
+    def backoff(self, attempts: int) -> float:
+        """Full-jitter exponential backoff for the given number of failed attempts."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempts))
+        return random.uniform(self.base_delay, max(self.base_delay, ceiling))
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    def _notify(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop (sync caller); the message is picked up on the next poll
+        self._ensure_started(loop)
+        self._wake.set()
+
+    def _ensure_started(self, loop: asyncio.AbstractEventLoop):
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run(), name="outbox-dispatcher")
+
+    def start(self):
+        """Start draining on the running loop (idempotent)."""
+        self._ensure_started(asyncio.get_running_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Unfinished deliveries keep their lease and are retried after a restart
+        for task in list(self._deliveries):
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            for endpoint in self._endpoints.values():
+                try:
+                    messages = self.outbox.claim(
+                        endpoint.kind, endpoint.concurrency - endpoint.in_flight, self.lease,
+                    )
+                except sqlite3.Error as e:
+                    print(f"[OUTBOX] Claim failed for {endpoint.kind}: {e}")
+                    continue
+                for message in messages:
+                    endpoint.in_flight += 1
+                    task = asyncio.create_task(self._deliver(endpoint, message))
+                    self._deliveries.add(task)
+                    task.add_done_callback(self._deliveries.discard)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, endpoint: Endpoint, message: OutboxMessage):
+        error = None
+        try:
+            if not await endpoint.handler(message.payload):
+                error = "endpoint rejected the message"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            endpoint.in_flight -= 1
+            self._wake.set()  # a slot is free
+
+        if error is None:
+            endpoint.delivered += 1
+            endpoint.delivery_lag.add(max(0.0, time.time() - message.created_at))
+            self.outbox.ack(message)
+            return
+
+        endpoint.failures += 1
+        if message.attempts + 1 >= self.max_attempts:
+            endpoint.dead_letters += 1
+            print(f"[OUTBOX] {endpoint.kind} message {message.id} dead-lettered: {error}")
+            self.outbox.bury(message, error)
+        else:
+            delay = self.backoff(message.attempts)
+            print(f"[OUTBOX] {endpoint.kind} message {message.id} failed ({error}); retry in {delay:.1f}s")
+            self.outbox.retry(message, delay, error)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        counts = self.outbox.counts()
+        empty = {"pending": 0, "due": 0, "dead_letters": 0, "lag_seconds": 0.0}
+        endpoints = {
+            kind: {**counts.get(kind, empty), **endpoint.stats()}
+            for kind, endpoint in self._endpoints.items()
+        }
+        return {
+            "persistent": self.outbox.path != ":memory:",
+            "running": self._task is not None and not self._task.done(),
+            "max_attempts": self.max_attempts,
+            "base_delay_seconds": self.base_delay,
+            "max_delay_seconds": self.max_delay,
+            "pending": sum(e["pending"] for e in endpoints.values()),
+            "max_lag_seconds": max((e["lag_seconds"] for e in endpoints.values()), default=0.0),
+            "endpoints": endpoints,
+        }
+
+
+def dispatcher_from_env() -> OutboxDispatcher:
+    """Build the outbox (OUTBOX_PATH, default outbox.db) and its dispatcher."""
+    path = os.getenv("OUTBOX_PATH", "") or DEFAULT_OUTBOX_PATH
+    if path == ":memory:":
+        print("[OUTBOX] WARNING: outbox is in memory; queued approvals and dashboard pushes are lost on restart")
+    else:
+        print(f"[OUTBOX] Using SQLite outbox at {path}")
+    return OutboxDispatcher(
+        Outbox(path),
+        max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10")),
+        base_delay=float(os.getenv("OUTBOX_BASE_DELAY", "1")),
+        max_delay=float(os.getenv("OUTBOX_MAX_DELAY", "300")),
+        lease=float(os.getenv("OUTBOX_LEASE", "60")),
+    )
+
+
+# Global dispatcher instance
+outbox = dispatcher_from_env()
@@ -0,0 +1,387 @@
+"""Persistent backends for IncidentStore.
+
+The store keeps incidents in memory for reads; a backend makes writes durable
+and lets several worker processes share one incident history.
+"""
+import os
+import json
+import atexit
+import queue
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Any
+
+from .models import Incident, TimelineEvent
+
+
+class PersistenceError(Exception):
+    """Writes could not be committed (the backend keeps and retries them)."""
+
+
+class StoreBackend(ABC):
+    """Durability layer behind IncidentStore."""
+
+    @abstractmethod
+    def load(self, timeline_limit: int = 0) -> List[Incident]:
+        """Return every persisted incident (used once at startup).
+
+        With `timeline_limit`, only that many of the most recent timeline
+        events are loaded per incident (the rest stay in the backend).
+        """
+
+    @abstractmethod
+    def save(self, incident: Incident):
+        """Persist the changes made to an incident since the last save."""
+
+    def save_many(self, incidents: List[Incident]):
+        """Persist several incidents together (atomically where the backend supports it)."""
+        for incident in incidents:
+            self.save(incident)
+
+    def load_changed(self, timeline_limit: int = 0) -> List[Incident]:
+        """Return incidents written by other processes since the last call."""
+        return []
+
+    def load_timeline(self, incident_id: str, start: int = 0, end: Optional[int] = None) -> List[TimelineEvent]:
+        """Return persisted timeline events numbered [start, end) for one incident."""
+        return []
+
+    def flush(self):
+        """Block until all pending writes are durable.
+
+        Raises:
+            PersistenceError: if some writes could not be committed
+        """
+
+    def close(self):
+        """Flush and release resources."""
+        self.flush()
+
+
+class _FlushRequest:
+    """A flush() waiting on the writer thread, told whether writes are failing."""
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+
+
+class SQLiteBackend(StoreBackend):
+    """SQLite (WAL mode) backend with append-only timeline rows.
+
+    Each incident is stored as a head row (every field except the timeline
+    and trace spans) plus one row per timeline event and per span. Saves only
+    append new events and spans and rewrite the head when it actually changed. Writes are applied by a background
+    thread that groups everything queued into a single transaction. Writes
+    from a failed transaction are kept and retried ahead of newer ones (the
+    bookkeeping below has already moved past them), and flush() reports the
+    failure until a retry succeeds.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, commit_interval: float = 0.005,
+                 retry_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.retry_interval = retry_interval
+        self.origin = uuid.uuid4().hex  # identifies rows written by this process
+
+        # What has already been handed to the writer, per incident
+        self._event_counts: Dict[str, int] = {}
+        self._span_counts: Dict[str, int] = {}
+        self._heads: Dict[str, str] = {}
+        self._last_seq = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._reader = self._connect()
+        self._init_schema(self._reader)
+        self._data_version = self._read_data_version()
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="incident-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _init_schema(self, conn: sqlite3.Connection):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS incidents ("
+            "id TEXT PRIMARY KEY, seq INTEGER NOT NULL, origin TEXT NOT NULL, head TEXT NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(incidents)")}
+        if "version" not in columns:
+            conn.execute("ALTER TABLE incidents ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_incidents_seq ON incidents(seq)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS timeline_events ("
+            "incident_id TEXT NOT NULL, idx INTEGER NOT NULL, event TEXT NOT NULL, "
+            "PRIMARY KEY (incident_id, idx))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS incident_spans ("
+            "incident_id TEXT NOT NULL, idx INTEGER NOT NULL, span TEXT NOT NULL, "
+            "PRIMARY KEY (incident_id, idx))"
+        )
+
+    def _read_data_version(self) -> int:
+        return self._reader.execute("PRAGMA data_version").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def load(self, timeline_limit: int = 0) -> List[Incident]:
+        incidents = self._load_where("", (), timeline_limit)
+        return incidents
+
+    def load_changed(self, timeline_limit: int = 0) -> List[Incident]:
+        # data_version only moves when another connection committed
+        version = self._read_data_version()
+        if version == self._data_version:
+            return []
+        self._data_version = version
+        return self._load_where("WHERE seq > ? AND origin != ?", (self._last_seq, self.origin), timeline_limit)
+
+    def load_timeline(self, incident_id: str, start: int = 0, end: Optional[int] = None) -> List[TimelineEvent]:
+        try:
+            self.flush()  # events handed to the writer must be readable
+        except PersistenceError as e:
+            print(f"[STORE] Reading timeline with uncommitted writes: {e}")
+        rows = self._reader.execute(
+            "SELECT event FROM timeline_events WHERE incident_id = ? AND idx >= ? AND idx < ? ORDER BY idx",
+            (incident_id, start, end if end is not None else 2 ** 62),
+        ).fetchall()
+        return [TimelineEvent.from_dict(json.loads(event)) for (event,) in rows]
+
+    def _load_where(self, where: str, params: Tuple, timeline_limit: int = 0) -> List[Incident]:
+        rows = self._reader.execute(
+            f"SELECT id, seq, head, version FROM incidents {where} ORDER BY seq", params
+        ).fetchall()
+        if not rows:
+            return []
+
+        ids = [r[0] for r in rows]
+        # Only the newest `timeline_limit` events per incident; older ones are read on demand
+        tail = ""
+        if timeline_limit > 0:
+            tail = (
+                "AND idx > (SELECT MAX(idx) FROM timeline_events m "
+                f"WHERE m.incident_id = t.incident_id) - {int(timeline_limit)} "
+            )
+        events: Dict[str, List[TimelineEvent]] = {i: [] for i in ids}
+        offsets: Dict[str, int] = {}
+        spans: Dict[str, List[Dict[str, Any]]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for incident_id, idx, event in self._reader.execute(
+                f"SELECT incident_id, idx, event FROM timeline_events t "
+                f"WHERE incident_id IN ({placeholders}) {tail}ORDER BY incident_id, idx",
+                chunk,
+            ):
+                offsets.setdefault(incident_id, idx)
+                events[incident_id].append(TimelineEvent.from_dict(json.loads(event)))
+            for incident_id, span in self._reader.execute(
+                f"SELECT incident_id, span FROM incident_spans "
+                f"WHERE incident_id IN ({placeholders}) ORDER BY incident_id, idx",
+                chunk,
+            ):
+                spans.setdefault(incident_id, []).append(json.loads(span))
+
+        incidents = []
+        with self._lock:
+            for incident_id, seq, head, version in rows:
+                incident = Incident.model_validate_json(head)
+                incident.timeline = events[incident_id]
+                incident.timeline_offset = offsets.get(incident_id, 0)
+                if incident_id in spans:
+                    incident.spans = spans[incident_id]  # older rows kept spans in the head
+                self._span_counts[incident_id] = len(spans.get(incident_id, ()))
+                incident.version = version
+                incidents.append(incident)
+                self._event_counts[incident_id] = incident.timeline_offset + len(incident.timeline)
+                self._heads[incident_id] = head
+                self._last_seq = max(self._last_seq, seq)
+        return incidents
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def save(self, incident: Incident):
+        write = self._prepare(incident)
+        if write is not None:
+            self._queue.put(write)
+
+    def save_many(self, incidents: List[Incident]):
+        # Queued as one item so the writer applies it in a single transaction
+        writes = [w for w in (self._prepare(incident) for incident in incidents) if w is not None]
+        if writes:
+            self._queue.put(writes)
+
+    def _prepare(self, incident: Incident) -> Optional[Tuple]:
+        """Snapshot the unsaved part of an incident as a write tuple (None if nothing changed)."""
+        # Snapshot on the caller's thread; the writer only touches plain data
+        # The version lives in its own column so a timeline-only update stays an append;
+        # the timeline offset is implied by the event numbering. Spans get their own
+        # append-only rows: a save records a span, which would otherwise change the head every time
+        head = incident.model_dump_json(exclude={"timeline", "timeline_offset", "spans", "version"})
+        offset = incident.timeline_offset
+        total = offset + len(incident.timeline)
+        with self._lock:
+            start = self._event_counts.get(incident.id, 0)
+            if start > total:
+                start = 0  # timeline was replaced wholesale; rewrite it
+            # Events are numbered across the whole history, including ones already spilled
+            start = max(start, offset)
+            new_events = [
+                (start + i, json.dumps(event.to_record(), default=str))
+                for i, event in enumerate(incident.timeline[start - offset:])
+            ]
+            span_start = self._span_counts.get(incident.id, 0)
+            spans_replaced = span_start > len(incident.spans)
+            if spans_replaced:
+                span_start = 0  # spans were replaced wholesale; rewrite them
+            new_spans = [
+                (span_start + i, json.dumps(span, default=str))
+                for i, span in enumerate(incident.spans[span_start:])
+            ]
+            head_changed = self._heads.get(incident.id) != head
+            if not new_events and not new_spans and not spans_replaced and not head_changed:
+                return None
+            self._event_counts[incident.id] = total
+            self._span_counts[incident.id] = len(incident.spans)
+            self._heads[incident.id] = head
+
+        return (
+            incident.id, head if head_changed else None, new_events, start == 0, incident.version,
+            new_spans, spans_replaced,
+        )
+
+    def flush(self):
+        request = _FlushRequest()
+        self._queue.put(request)
+        request.done.wait()
+        if request.error:
+            raise PersistenceError(request.error)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.flush()
+        except PersistenceError as e:
+            print(f"[STORE] {e}")
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        self._reader.close()
+
+    def _write_loop(self):
+        conn = self._connect()
+        retry: List[Tuple] = []  # writes from a failed transaction, applied first next time
+        stop = False
+        while not stop:
+            try:
+                # With writes awaiting retry, wake up even if nothing new arrives
+                item = self._queue.get(timeout=self.retry_interval if retry else None)
+            except queue.Empty:
+                batch = []
+            else:
+                # Group commit: gather whatever else is queued into one transaction
+                batch = [item]
+                if isinstance(item, tuple) or isinstance(item, list):
+                    try:
+                        while len(batch) < self.batch_size:
+                            op = self._queue.get(timeout=self.commit_interval)
+                            batch.append(op)
+                            if op is None:
+                                break
+                    except queue.Empty:
+                        pass
+
+            stop = bool(batch) and batch[-1] is None
+            if stop:
+                batch.pop()
+            writes = list(retry)
+            for op in batch:
+                if isinstance(op, tuple):
+                    writes.append(op)
+                elif isinstance(op, list):
+                    writes.extend(op)  # save_many: always applied together
+            waiters = [op for op in batch if isinstance(op, _FlushRequest)]
+
+            error = None
+            if writes:
+                try:
+                    self._apply(conn, writes)
+                    retry = []
+                except sqlite3.Error as e:
+                    retry = writes
+                    error = f"SQLite write failed, {len(writes)} writes pending retry: {e}"
+                    print(f"[STORE] {error}")
+
+            for waiter in waiters:
+                waiter.error = error
+                waiter.done.set()
+        if retry:
+            print(f"[STORE] Closing with {len(retry)} uncommitted writes")
+        conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, writes: List[Tuple]):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM incidents").fetchone()[0]
+            for incident_id, head, events, rewrite, version, spans, rewrite_spans in writes:
+                if rewrite:
+                    conn.execute("DELETE FROM timeline_events WHERE incident_id = ?", (incident_id,))
+                if events:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO timeline_events (incident_id, idx, event) VALUES (?, ?, ?)",
+                        [(incident_id, idx, event) for idx, event in events],
+                    )
+                if rewrite_spans:
+                    conn.execute("DELETE FROM incident_spans WHERE incident_id = ?", (incident_id,))
+                if spans:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO incident_spans (incident_id, idx, span) VALUES (?, ?, ?)",
+                        [(incident_id, idx, span) for idx, span in spans],
+                    )
+                seq += 1
+                if head is not None:
+                    conn.execute(
+                        "INSERT INTO incidents (id, seq, origin, head, version) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET seq = excluded.seq, "
+                        "origin = excluded.origin, head = excluded.head, version = excluded.version",
+                        (incident_id, seq, self.origin, head, version),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE incidents SET seq = ?, origin = ?, version = ? WHERE id = ?",
+                        (seq, self.origin, version, incident_id),
+                    )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def backend_from_env() -> Optional[StoreBackend]:
+    """Build the configured backend (INCIDENT_STORE_PATH), or None for memory-only."""
+    path = os.getenv("INCIDENT_STORE_PATH", "")
+    if not path:
+        return None
+    print(f"[STORE] Using SQLite backend at {path}")
+    backend = SQLiteBackend(path)
+    atexit.register(backend.close)
+    return backend
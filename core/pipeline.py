@@ -1,10 +1,15 @@
+import asyncio
+import functools
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 
-from .models import Incident, AgentStage
+from .models import Incident, AgentStage, Evidence, IncidentType
 from .guardrails import GuardrailEngine
 from .state import incident_store
+from .dag import StageGraph, StageNode
+from .indexes import to_timestamp
+from .tracing import tracer
 
 from agents.scout import ScoutAgent
 from agents.triage import TriageAgent
@@ -14,6 +19,20 @@ from agents.executor import ExecutorAgent
 from agents.postcheck import PostcheckAgent
 
 
+STAGE_ORDER = list(AgentStage)
+
+
+def _traced_stage(name: str):
+    """Run a `_run_*` stage under a span bound to the incident's trace."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, incident: Incident, context: Dict[str, Any], *args, **kwargs):
+            with tracer.trace(incident), tracer.span("stage", name):
+                return await fn(self, incident, context, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 class IncidentPipeline:
 
     def __init__(self, guardrail_config: Optional[Dict[str, Any]] = None):
@@ -27,6 +46,110 @@ class IncidentPipeline:
         self.executor = ExecutorAgent(self.guardrails)
         self.postcheck = PostcheckAgent()
 
+        # Running pipeline tasks by incident id (for cancellation)
+        self._running: Dict[str, asyncio.Task] = {}
+        # Runs cancelled on request; any other cancellation (shutdown) is an interruption
+        self._cancel_requested: Set[str] = set()
+
+    def is_running(self, incident_id: str) -> bool:
+        task = self._running.get(incident_id)
+        return task is not None and not task.done()
+
+    def cancel(self, incident_id: str) -> bool:
+        """Drop an in-flight pipeline run, cancelling any pending LLM/HTTP calls."""
+        task = self._running.get(incident_id)
+        if task is None or task.done():
+            return False
+        self._cancel_requested.add(incident_id)
+        task.cancel()
+        return True
+
+    def _build_graph(self, auto_approve: bool) -> StageGraph:
+        """Declare the pipeline stages by the context keys they read and write.
+
+        Rule-based triage only looks at metrics, so it runs alongside Scout.
+        With an AI client, triage waits for full evidence, and hypotheses are
+        generated speculatively for the rule-based type in the meantime.
+        """
+        speculate = self.triage.ai_client is not None
+
+        async def scout(ctx):
+            await self._run_scout(ctx["incident"], ctx)
+            return {"evidence": ctx["evidence"], "runbooks": ctx["runbooks"]}
+
+        async def triage(ctx):
+            await self._run_triage(ctx["incident"], ctx)
+            return {"incident_type": ctx["incident_type"], "reasoning": ctx["reasoning"]}
+
+        async def provisional_triage(ctx):
+            evidence = Evidence(metrics=ctx["metrics"])
+            return {"provisional": self.triage._classify_with_rules(evidence, {}, ctx)}
+
+        async def speculate_hypotheses(ctx):
+            return {"speculation": self._start_speculation(ctx)}
+
+        async def hypothesis(ctx):
+            await self._run_hypothesis(ctx["incident"], ctx)
+            return {"hypotheses": ctx["hypotheses"]}
+
+        async def experiment(ctx):
+            await self._run_experiment(ctx["incident"], ctx)
+            return {"most_likely_cause": ctx["most_likely_cause"]}
+
+        async def executor(ctx):
+            incident = await self._run_executor(ctx["incident"], ctx, auto_approve)
+            if self._awaiting_approval(incident, auto_approve):
+                return {}  # paused; postcheck stays unscheduled
+            return {"mitigation_outcome": incident.applied_mitigation}
+
+        async def postcheck(ctx):
+            incident = await self._run_postcheck(ctx["incident"], ctx)
+            return {"metrics_recovered": incident.metrics_recovered}
+
+        nodes = [StageNode("scout", scout, (), ("evidence", "runbooks"))]
+        if speculate:
+            nodes += [
+                StageNode("triage", triage, ("evidence", "runbooks"), ("incident_type", "reasoning")),
+                StageNode("provisional_triage", provisional_triage, ("metrics",), ("provisional",)),
+                StageNode("speculate", speculate_hypotheses, ("evidence", "provisional"), ("speculation",)),
+                StageNode("hypothesis", hypothesis, ("evidence", "incident_type", "reasoning", "speculation"), ("hypotheses",)),
+            ]
+        else:
+            nodes += [
+                StageNode("triage", triage, ("metrics",), ("incident_type", "reasoning")),
+                StageNode("hypothesis", hypothesis, ("evidence", "incident_type", "reasoning"), ("hypotheses",)),
+            ]
+        nodes += [
+            StageNode("experiment", experiment, ("hypotheses",), ("most_likely_cause",)),
+            StageNode("executor", executor, ("most_likely_cause",), ("mitigation_outcome",)),
+            StageNode("postcheck", postcheck, ("mitigation_outcome",), ("metrics_recovered",)),
+        ]
+        return StageGraph(nodes, seeds=("incident", "current_metrics", "baseline_metrics", "metrics"))
+
+    def _start_speculation(self, context: Dict[str, Any]) -> Optional[Tuple[IncidentType, asyncio.Task]]:
+        """Start generating hypotheses for the rule-based type before triage confirms it."""
+        provisional = context["provisional"]
+        if provisional["type"] == IncidentType.UNKNOWN:
+            return None
+        print(f"[HYPOTHESIS] Speculating on provisional type {provisional['type'].value}")
+        speculative_context = {
+            **context,
+            "incident_type": provisional["type"],
+            "reasoning": provisional["reasoning"],
+        }
+        return provisional["type"], asyncio.create_task(self.hypothesis.run(speculative_context))
+
+    def _discard_speculation(self, context: Dict[str, Any]):
+        speculation = context.get("speculation")
+        if speculation and not speculation[1].done():
+            speculation[1].cancel()
+
+    @staticmethod
+    def _advance_stage(incident: Incident, stage: AgentStage):
+        """Move the incident forward; overlapping stages never move it back."""
+        if STAGE_ORDER.index(stage) > STAGE_ORDER.index(incident.stage):
+            incident.stage = stage
+
     async def run(
         self,
         incident: Incident,
@@ -34,45 +157,128 @@ class IncidentPipeline:
         baseline_metrics: Dict[str, Any],
         auto_approve: bool = False
     ) -> Incident:
-        detection_start = time.time()
-
-        print(f"\n{'='*60}")
-        print(f"INCIDENT PIPELINE STARTED: {incident.id}")
-        print(f"Service: {incident.service_name}")
-        print(f"{'='*60}\n")
+        with tracer.trace(incident):
+            detection_start = time.time()
+
+            # Detection latency: from the incident's start until a pipeline picks it up
+            detection_latency = max(0.0, detection_start - to_timestamp(incident.start_time))
+            incident.metrics.detection_latency_seconds = detection_latency
+            tracer.record_detection(incident.service_name, detection_latency)
+
+            print(f"\n{'='*60}")
+            print(f"INCIDENT PIPELINE STARTED: {incident.id}")
+            print(f"Service: {incident.service_name}")
+            print(f"{'='*60}\n")
+
+            # Persist what a resume needs before any stage runs
+            incident.checkpoint["detection_start"] = detection_start
+            incident.checkpoint["auto_approve"] = auto_approve
+            if not incident.current_metrics:
+                incident.current_metrics = current_metrics
+            if not incident.baseline_metrics:
+                incident.baseline_metrics = baseline_metrics
+
+            # Always persist initial state quickly
+            incident_store.update_incident(incident.id, incident)
 
-        # Always persist initial state quickly
-        incident_store.update_incident(incident.id, incident)
+            return await self._run_graph(self._restore_context(incident), auto_approve)
 
-        context = {
-        "incident": incident,
-        "current_metrics": incident.current_metrics or current_metrics,
-        "baseline_metrics": incident.baseline_metrics or baseline_metrics,
-        "detection_start": detection_start,
-        }
+    async def resume(self, incident_id: str) -> Incident:
+        """Continue an incident's pipeline after its last checkpointed stage.
 
-        try:
-            # Stage 1: Scout
-            incident = await self._run_scout(incident, context)
+        Completed stages are not re-run: their outputs are restored from the
+        incident. An incident still awaiting approval stays paused.
 
-            # Stage 2: Triage
-            incident = await self._run_triage(incident, context)
-
-            # Stage 3: Hypothesis
-            incident = await self._run_hypothesis(incident, context)
+        Raises:
+            ValueError: if the incident does not exist
+        """
+        incident = incident_store.get_incident(incident_id)
+        if incident is None:
+            raise ValueError(f"Incident {incident_id} not found")
+        if "postcheck" in incident.completed_stages and incident.stage in (AgentStage.COMPLETED, AgentStage.FAILED):
+            return incident
 
-            # Stage 4: Experiment
-            incident = await self._run_experiment(incident, context)
+        auto_approve = incident.checkpoint.get("auto_approve", False)
+        if "executor" in incident.completed_stages and self._awaiting_approval(incident, auto_approve):
+            print(f"[PIPELINE] {incident.id} is still awaiting approval; not resuming")
+            return incident
 
-            # Stage 5: Executor
-            incident = await self._run_executor(incident, context, auto_approve)
+        with tracer.trace(incident):
+            last = max(
+                incident.completed_stages or [AgentStage.DETECTION.value],
+                key=lambda stage: STAGE_ORDER.index(AgentStage(stage)),
+            )
+            incident.stage = AgentStage(last)
+            incident.add_timeline_event("resumed", f"Pipeline resumed after stage '{last}'", {
+                "completed_stages": list(incident.completed_stages),
+            })
+            incident_store.update_incident(incident.id, incident)
+            print(f"[PIPELINE] Resuming {incident.id} after '{last}'")
+
+            return await self._run_graph(self._restore_context(incident), auto_approve)
+
+    def _restore_context(self, incident: Incident) -> Dict[str, Any]:
+        """Rebuild the run context from the incident and its stage checkpoints."""
+        done = set(incident.completed_stages)
+        checkpoint = incident.checkpoint
+        context: Dict[str, Any] = {
+            "incident": incident,
+            "current_metrics": incident.current_metrics,
+            "baseline_metrics": incident.baseline_metrics,
+            "detection_start": checkpoint.get("detection_start", time.time()),
+        }
+        if "scout" in done:
+            context["evidence"] = incident.evidence
+            context["runbooks"] = checkpoint.get("runbooks", {})
+        if "triage" in done:
+            context["incident_type"] = incident.incident_type
+            context["reasoning"] = checkpoint.get("reasoning", "")
+            # Speculation only helps before triage has answered
+            context["provisional"] = None
+            context["speculation"] = None
+        if "hypothesis" in done:
+            context["hypotheses"] = incident.hypotheses
+        if "experiment" in done:
+            best = checkpoint.get("most_likely_cause")
+            context["most_likely_cause"] = incident.experiments[best] if best is not None else None
+        if "executor" in done:
+            context["mitigation_outcome"] = incident.applied_mitigation
+        if "postcheck" in done:
+            context["metrics_recovered"] = incident.metrics_recovered
+        return context
+
+    def _checkpoint(self, incident: Incident, stage: str, **outputs: Any):
+        """Mark a stage complete and keep the outputs that don't live on the incident itself."""
+        incident.checkpoint.update(outputs)
+        if stage not in incident.completed_stages:
+            incident.completed_stages.append(stage)
+
+    @staticmethod
+    def _awaiting_approval(incident: Incident, auto_approve: bool) -> bool:
+        return bool(
+            incident.proposed_mitigation
+            and incident.proposed_mitigation.requires_approval
+            and not incident.mitigation_approved
+            and not auto_approve
+        )
+
+    async def _run_graph(self, context: Dict[str, Any], auto_approve: bool) -> Incident:
+        incident: Incident = context["incident"]
+        detection_start = context["detection_start"]
+
+        task = asyncio.current_task()
+        if task is not None:
+            self._running[incident.id] = task
 
-            if (
-                incident.proposed_mitigation
-                and incident.proposed_mitigation.requires_approval
-                and not incident.mitigation_approved
-                and not auto_approve
-            ):
+        try:
+            graph = self._build_graph(auto_approve)
+            context["metrics"] = self.scout._gather_metrics(context["current_metrics"] or {})
+            with tracer.span("pipeline", "run", auto_approve=auto_approve):
+                skipped = await graph.run(context)
+            incident = context["incident"]
+
+            if "postcheck" in skipped:
+                # Executor stopped short of applying: waiting on a human
                 incident.stage = AgentStage.EXECUTOR
                 incident.add_timeline_event("paused", "Pipeline paused — awaiting human approval")
                 incident_store.update_incident(incident.id, incident)
@@ -84,15 +290,11 @@ class IncidentPipeline:
 
                 return incident
 
-            # Stage 6: Postcheck (only after mitigation applied)
-            incident = await self._run_postcheck(incident, context)
-
             # Mark as completed/failed based on recovery
             incident.end_time = datetime.utcnow()
             incident.stage = AgentStage.COMPLETED if incident.metrics_recovered else AgentStage.FAILED
 
             # Final metrics
-            incident.metrics.detection_latency_seconds = 2.5  # demo
             if not incident.metrics.time_to_mitigation_seconds:
                 # If mitigation never applied (shouldn’t happen unless blocked)
                 incident.metrics.time_to_mitigation_seconds = time.time() - detection_start
@@ -103,11 +305,26 @@ class IncidentPipeline:
                 "Incident pipeline completed" if incident.metrics_recovered else "Incident pipeline finished but not recovered"
             )
 
+        except asyncio.CancelledError:
+            if incident.id not in self._cancel_requested:
+                # Shutdown: keep the stage and checkpoints so the run can be resumed
+                print(f"Pipeline interrupted: {incident.id} (resumable from {incident.stage.value})")
+                incident_store.update_incident(incident.id, incident)
+                raise
+            print(f"Pipeline cancelled: {incident.id}")
+            incident.stage = AgentStage.FAILED
+            incident.add_timeline_event("failed", "Pipeline cancelled (incident dropped)")
+
         except Exception as e:
             print(f"Pipeline failed: {e}")
             incident.stage = AgentStage.FAILED
             incident.add_timeline_event("failed", f"Pipeline failed: {str(e)}")
 
+        finally:
+            self._running.pop(incident.id, None)
+            self._cancel_requested.discard(incident.id)
+            self._discard_speculation(context)
+
         # Save incident
         incident_store.update_incident(incident.id, incident)
 
@@ -122,11 +339,12 @@ class IncidentPipeline:
 
         return incident
 
+    @_traced_stage("scout")
     async def _run_scout(self, incident: Incident, context: Dict[str, Any]) -> Incident:
         print("[SCOUT] Gathering evidence...")
-        incident.stage = AgentStage.SCOUT
+        self._advance_stage(incident, AgentStage.SCOUT)
 
-        result = await self.scout.execute(context)
+        result = await self.scout.run(context)
         incident.evidence = result["evidence"]
         context["evidence"] = result["evidence"]
         context["runbooks"] = result.get("runbooks", {})
@@ -134,18 +352,27 @@ class IncidentPipeline:
         incident.add_timeline_event("scout", result["summary"], {
             "metrics_count": len(result["evidence"].metrics),
             "logs_count": len(result["evidence"].logs),
+            "log_lines_read": result["evidence"].log_stats.get("lines_read", 0),
+            "missing_sources": result.get("missing_sources", []),
         })
 
+        self._checkpoint(incident, "scout", runbooks=context["runbooks"])
         incident_store.update_incident(incident.id, incident)
 
         print(f"   ✓ {result['summary']}")
         return incident
 
+    @_traced_stage("triage")
     async def _run_triage(self, incident: Incident, context: Dict[str, Any]) -> Incident:
         print("[TRIAGE] Classifying incident type...")
-        incident.stage = AgentStage.TRIAGE
+        self._advance_stage(incident, AgentStage.TRIAGE)
+
+        triage_context = context
+        if "evidence" not in context:
+            # Rule-based triage only needs metrics; don't wait for logs and runbooks
+            triage_context = {**context, "evidence": Evidence(metrics=context["metrics"]), "runbooks": {}}
 
-        result = await self.triage.execute(context)
+        result = await self.triage.run(triage_context)
         incident.incident_type = result["incident_type"]
         context["incident_type"] = result["incident_type"]
         context["reasoning"] = result["reasoning"]
@@ -157,24 +384,46 @@ class IncidentPipeline:
             "confidence": result["confidence"],
         })
 
+        self._checkpoint(incident, "triage", reasoning=result["reasoning"])
         incident_store.update_incident(incident.id, incident)
 
         print(f"Type: {result['incident_type'].value} (confidence: {result['confidence']:.0%})")
         print(f"{result['reasoning']}")
         return incident
 
+    @_traced_stage("hypothesis")
     async def _run_hypothesis(self, incident: Incident, context: Dict[str, Any]) -> Incident:
         print("[HYPOTHESIS] Generating root cause hypotheses...")
-        incident.stage = AgentStage.HYPOTHESIS
-
-        result = await self.hypothesis.execute(context)
+        self._advance_stage(incident, AgentStage.HYPOTHESIS)
+
+        result = None
+        event_data: Dict[str, Any] = {}
+        speculation = context.get("speculation")
+        if speculation is not None:
+            speculative_type, speculative_task = speculation
+            if speculative_type == context["incident_type"]:
+                try:
+                    result = await speculative_task
+                    event_data["speculative"] = "adopted"
+                    print("[HYPOTHESIS] Triage agreed with the provisional type; using speculative hypotheses")
+                except Exception as e:
+                    print(f"[HYPOTHESIS] Speculative run failed: {e}")
+            else:
+                speculative_task.cancel()
+                event_data["speculative"] = "discarded"
+                print(f"[HYPOTHESIS] Triage chose {context['incident_type'].value}; discarding speculative hypotheses")
+
+        if result is None:
+            result = await self.hypothesis.run(context)
         incident.hypotheses = result["hypotheses"]
         context["hypotheses"] = result["hypotheses"]
 
         incident.add_timeline_event("hypothesis", result["summary"], {
             "count": len(result["hypotheses"]),
+            **event_data,
         })
 
+        self._checkpoint(incident, "hypothesis")
         incident_store.update_incident(incident.id, incident)
 
         print(f"   ✓ Generated {len(result['hypotheses'])} hypotheses:")
@@ -182,11 +431,12 @@ class IncidentPipeline:
             print(f"{i}. {h.description} (confidence: {h.confidence:.0%})")
         return incident
 
+    @_traced_stage("experiment")
     async def _run_experiment(self, incident: Incident, context: Dict[str, Any]) -> Incident:
         print("[EXPERIMENT] Validating hypotheses...")
-        incident.stage = AgentStage.EXPERIMENT
+        self._advance_stage(incident, AgentStage.EXPERIMENT)
 
-        result = await self.experiment.execute(context)
+        result = await self.experiment.run(context)
         incident.experiments = result["experiment_results"]
         context["most_likely_cause"] = result["most_likely_cause"]
 
@@ -194,6 +444,10 @@ class IncidentPipeline:
             "validated_count": sum(1 for r in result["experiment_results"] if r.validated),
         })
 
+        self._checkpoint(
+            incident, "experiment",
+            most_likely_cause=result["experiment_results"].index(result["most_likely_cause"]),
+        )
         incident_store.update_incident(incident.id, incident)
 
         print(f"{result['summary']}")
@@ -201,17 +455,19 @@ class IncidentPipeline:
         print(f"Most likely: {best.findings}")
         return incident
 
+    @_traced_stage("executor")
     async def _run_executor(self, incident: Incident, context: Dict[str, Any], auto_approve: bool) -> Incident:
         print(f"[EXECUTOR] Proposing mitigation...")
-        incident.stage = AgentStage.EXECUTOR
+        self._advance_stage(incident, AgentStage.EXECUTOR)
 
-        result = await self.executor.execute(context)
+        result = await self.executor.run(context)
 
         if result["status"] == "blocked":
             print(f"Mitigation blocked by guardrails: {result['reason']}")
             incident.add_timeline_event("executor", "Mitigation blocked by guardrails", {
                 "reason": result["reason"],
             })
+            self._checkpoint(incident, "executor")
             incident_store.update_incident(incident.id, incident)
             return incident
 
@@ -229,6 +485,7 @@ class IncidentPipeline:
                 "Mitigation proposed — awaiting human approval",
                 {"mitigation_type": mitigation.type.value},
             )
+            self._checkpoint(incident, "executor")
             incident_store.update_incident(incident.id, incident)
             return incident
 
@@ -254,12 +511,14 @@ class IncidentPipeline:
             print(f"Mitigation failed: {apply_result.get('message')}")
             incident.add_timeline_event("executor", "Mitigation apply failed", apply_result)
 
+        self._checkpoint(incident, "executor")
         incident_store.update_incident(incident.id, incident)
         return incident
 
+    @_traced_stage("postcheck")
     async def _run_postcheck(self, incident: Incident, context: Dict[str, Any]) -> Incident:
         print("[POSTCHECK] Verifying recovery...")
-        incident.stage = AgentStage.POSTCHECK
+        self._advance_stage(incident, AgentStage.POSTCHECK)
 
         baseline = context.get("baseline_metrics", {}) or {}
         current = context.get("current_metrics", {}) or {}
@@ -268,7 +527,7 @@ class IncidentPipeline:
         recovered_metrics = self._simulate_recovery(current, baseline)
         context["current_metrics"] = recovered_metrics
 
-        result = await self.postcheck.execute(context)
+        result = await self.postcheck.run(context)
         incident.metrics_recovered = result["metrics_recovered"]
         incident.incident_summary = result["incident_summary"]
 
@@ -284,6 +543,7 @@ class IncidentPipeline:
 
         print("Generated incident report")
 
+        self._checkpoint(incident, "postcheck")
         incident_store.update_incident(incident.id, incident)
         return incident
 
@@ -0,0 +1,196 @@
+"""Runbook corpus with section-level BM25 retrieval.
+
+Runbooks are markdown documents. They are split into sections at headings
+and indexed once (an inverted index of term frequencies per section), so an
+agent can ask for the few sections that match the current symptoms instead
+of truncating whole documents or rescanning their text on every incident.
+Documents come from a local directory (RUNBOOK_DIR) loaded at startup and
+from runbooks fetched at runtime, which replace their previous version.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in into is it its of on or "
+    "that the then this to was were will with when which you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric terms, without stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class RunbookSection:
+    """One heading and the text under it."""
+    document: str
+    title: str  # heading path, e.g. "Latency spike > Mitigation"
+    text: str
+    length: int = 0  # number of terms
+
+    def render(self) -> str:
+        # The index mixes runbooks, so each section names the one it came from
+        return f"## {self.title} (runbook: {self.document})\n{self.text}".strip()
+
+
+def split_sections(document: str, markdown: str) -> List[RunbookSection]:
+    """Split markdown at headings (ignoring headings inside code fences)."""
+    sections: List[RunbookSection] = []
+    path: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    in_fence = False
+
+    def close():
+        text = "\n".join(lines).strip()
+        title = " > ".join(t for _, t in path) or document
+        if text:
+            sections.append(RunbookSection(document, title, text))
+        lines.clear()
+
+    for line in markdown.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        close()
+        level = len(match.group(1))
+        while path and path[-1][0] >= level:
+            path.pop()
+        path.append((level, match.group(2)))
+    close()
+    return sections
+
+
+class RunbookIndex:
+    """BM25 index over runbook sections."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, List[RunbookSection]] = {}
+        self._sections: List[RunbookSection] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._idf: Dict[str, float] = {}
+        self._avg_length = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    @property
+    def documents(self) -> List[str]:
+        return list(self._documents)
+
+    def add_document(self, name: str, markdown: str) -> int:
+        """Index a document (replacing any earlier version of it); returns its section count."""
+        sections = split_sections(name, markdown)
+        with self._lock:
+            self._documents[name] = sections
+            self._rebuild()
+        return len(sections)
+
+    def _rebuild(self):
+        # Runbook corpora are small; rebuilding on change keeps the search path simple
+        self._sections = [s for sections in self._documents.values() for s in sections]
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        total = 0
+        for idx, section in enumerate(self._sections):
+            terms = Counter(tokenize(f"{section.title} {section.text}"))
+            section.length = sum(terms.values())
+            total += section.length
+            for term, tf in terms.items():
+                postings.setdefault(term, []).append((idx, tf))
+        n = len(self._sections)
+        self._postings = postings
+        self._idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in postings.items()}
+        self._avg_length = total / n if n else 0.0
+
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        documents: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[float, RunbookSection]]:
+        """Top-k sections for the query (optionally restricted to some documents)."""
+        allowed = set(documents) if documents is not None else None
+        with self._lock:
+            sections, postings, idf, avg = self._sections, self._postings, self._idf, self._avg_length
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            for idx, tf in postings.get(term, ()):
+                section = sections[idx]
+                if allowed is not None and section.document not in allowed:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * section.length / (avg or 1))
+                scores[idx] = scores.get(idx, 0.0) + idf[term] * tf * (self.k1 + 1) / norm
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, sections[idx]) for idx, score in best]
+
+    def context(self, query: str, k: int = 3, max_chars: int = 1200,
+                documents: Optional[Iterable[str]] = None) -> str:
+        """The top sections rendered as prompt text, whole sections within `max_chars`."""
+        parts: List[str] = []
+        used = 0
+        for _, section in self.search(query, k, documents):
+            text = section.render()
+            if parts and used + len(text) > max_chars:
+                break
+            parts.append(text[:max_chars])
+            used += len(text) + 2
+        return "\n\n".join(parts)
+
+    def load_directory(self, directory: str) -> int:
+        """Index every *.md file under `directory` (document name = file stem)."""
+        documents: Dict[str, List[RunbookSection]] = {}
+        for path in sorted(Path(directory).rglob("*.md")):
+            try:
+                documents[path.stem] = split_sections(path.stem, path.read_text(encoding="utf-8"))
+            except OSError as e:
+                print(f"[RUNBOOKS] Could not read {path}: {e}")
+        with self._lock:
+            self._documents.update(documents)
+            self._rebuild()
+        return sum(len(sections) for sections in documents.values())
+
+
+def symptom_query(evidence: Any = None, baseline: Optional[Dict[str, Any]] = None, *terms: str) -> str:
+    """Build a retrieval query from extra terms, metrics that moved off baseline and top log patterns."""
+    words = [t for t in terms if t]
+    if evidence is not None:
+        for name, value in (evidence.metrics or {}).items():
+            base = (baseline or {}).get(name)
+            if base is None:
+                continue
+            try:
+                if float(value) > 1.5 * float(base):
+                    words.append(name.replace("_", " "))
+            except (TypeError, ValueError):
+                continue
+        words.extend(evidence.logs[:5])
+    return " ".join(str(w).replace("_", " ") for w in words)
+
+
+def index_from_env() -> RunbookIndex:
+    """Build the index, loading the local corpus from RUNBOOK_DIR if set."""
+    index = RunbookIndex()
+    directory = os.getenv("RUNBOOK_DIR", "")
+    if directory and os.path.isdir(directory):
+        sections = index.load_directory(directory)
+        print(f"[RUNBOOKS] Indexed {sections} sections from {directory}")
+    return index
+
+
+# Global index instance
+runbook_index = index_from_env()
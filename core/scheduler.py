@@ -0,0 +1,291 @@
+"""Bounded worker pool for pipeline runs.
+
+Incidents are queued by severity (CRITICAL first, FIFO within a severity) and
+drained by a fixed number of asyncio workers, so an alert storm cannot start
+an unbounded number of concurrent pipelines. When the queue is full, a new
+incident either displaces the newest queued incident of a lower severity or
+is rejected, which means a backlog of LOW incidents never blocks a CRITICAL one.
+"""
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from .models import Incident, IncidentSeverity, AgentStage
+from .state import incident_store
+from .stats import QuantileSketch
+
+# Dequeue order: index 0 is served first
+SEVERITY_ORDER = [
+    IncidentSeverity.CRITICAL,
+    IncidentSeverity.HIGH,
+    IncidentSeverity.MEDIUM,
+    IncidentSeverity.LOW,
+]
+
+
+@dataclass
+class PipelineJob:
+    """A queued pipeline run."""
+    incident: Incident
+    current_metrics: Dict[str, Any]
+    baseline_metrics: Dict[str, Any]
+    auto_approve: bool
+    seq: int
+    resume: bool = False  # continue from the incident's checkpoints instead of starting over
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class WaitStats:
+    """Queue wait-time aggregates for one severity."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sketch = QuantileSketch()
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.sketch.add(seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_seconds": self.total / self.count if self.count else 0,
+            "max_seconds": self.max,
+            "p50_seconds": self.sketch.quantile(0.50),
+            "p95_seconds": self.sketch.quantile(0.95),
+        }
+
+
+class PipelineScheduler:
+    """Priority admission queue in front of IncidentPipeline.run."""
+
+    def __init__(self, pipeline, workers: int = 4, max_queue: int = 100):
+        self.pipeline = pipeline
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+
+        self._queues: Dict[IncidentSeverity, Deque[PipelineJob]] = {s: deque() for s in SEVERITY_ORDER}
+        self._seq = itertools.count()
+        self._in_flight: Dict[str, float] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+
+        # Counters
+        self.admitted = 0
+        self.rejected = 0
+        self.shed = 0
+        self.finished = 0
+        self.wait_stats: Dict[IncidentSeverity, WaitStats] = {s: WaitStats() for s in SEVERITY_ORDER}
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    @property
+    def depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _lowest_below(self, severity: IncidentSeverity) -> Optional[IncidentSeverity]:
+        """The lowest queued severity strictly below `severity`, if any."""
+        rank = SEVERITY_ORDER.index(severity)
+        for candidate in reversed(SEVERITY_ORDER[rank + 1:]):
+            if self._queues[candidate]:
+                return candidate
+        return None
+
+    def can_admit(self, severity: IncidentSeverity) -> bool:
+        """Whether an incident of this severity would be accepted right now."""
+        return self.depth < self.max_queue or self._lowest_below(severity) is not None
+
+    def submit(
+        self,
+        incident: Incident,
+        current_metrics: Dict[str, Any],
+        baseline_metrics: Dict[str, Any],
+        auto_approve: bool = False,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        """Queue a pipeline run (or, with `resume`, a continuation from checkpoints).
+
+        Returns the admission result: status "queued" with the incident's
+        position, "rejected" when the queue is full of equal or higher
+        severity work (the caller should answer 429), or "running" /
+        "already_queued" when the incident already has a run (a second one
+        would mutate the same incident concurrently; the caller should answer 409).
+        """
+        self._ensure_started()
+        severity = incident.severity
+
+        if incident.id in self._in_flight or self.pipeline.is_running(incident.id):
+            return {"status": "running", "queue_depth": self.depth}
+        position = self.position(incident.id)
+        if position is not None:
+            return {"status": "already_queued", "position": position, "queue_depth": self.depth}
+
+        if self.depth >= self.max_queue:
+            victim_severity = self._lowest_below(severity)
+            if victim_severity is None:
+                self.rejected += 1
+                return {"status": "rejected", "queue_depth": self.depth}
+            self._shed(self._queues[victim_severity].pop())
+
+        job = PipelineJob(incident, current_metrics, baseline_metrics, auto_approve, next(self._seq), resume)
+        self._queues[severity].append(job)
+        self.admitted += 1
+        self._ready.set()
+        return {"status": "queued", "position": self.position(incident.id), "queue_depth": self.depth}
+
+    def resume(self, incident: Incident) -> Dict[str, Any]:
+        """Queue a resume of an interrupted incident."""
+        return self.submit(incident, incident.current_metrics, incident.baseline_metrics, resume=True)
+
+    def position(self, incident_id: str) -> Optional[int]:
+        """1-based position in the dequeue order, or None if not queued."""
+        pos = 0
+        for severity in SEVERITY_ORDER:
+            for job in self._queues[severity]:
+                pos += 1
+                if job.incident.id == incident_id:
+                    return pos
+        return None
+
+    def _shed(self, job: PipelineJob):
+        """Drop a queued run to make room for more severe work.
+
+        The incident is not failed: it keeps its stage (it never ran, or is
+        waiting to resume) with the inputs a resume needs, so `/resume` or the
+        startup resume can queue it again once there is room.
+        """
+        self.shed += 1
+        incident = job.incident
+        if not incident.current_metrics:
+            incident.current_metrics = job.current_metrics
+        if not incident.baseline_metrics:
+            incident.baseline_metrics = job.baseline_metrics
+        incident.checkpoint.setdefault("auto_approve", job.auto_approve)
+        incident.add_timeline_event("shed", "Dropped from pipeline queue (load shedding); resume to retry", {
+            "severity": incident.severity.value,
+        })
+        incident_store.update_incident(incident.id, incident)
+
+    def cancel(self, incident_id: str) -> bool:
+        """Remove a queued run, or cancel it if it is already running."""
+        for queue in self._queues.values():
+            for job in queue:
+                if job.incident.id == incident_id:
+                    queue.remove(job)
+                    job.incident.stage = AgentStage.FAILED
+                    job.incident.add_timeline_event("failed", "Pipeline cancelled before it started")
+                    incident_store.update_incident(incident_id, job.incident)
+                    return True
+        return self.pipeline.cancel(incident_id)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker_tasks:
+            return
+        self._loop = loop
+        self._ready = asyncio.Event()
+        if any(self._queues.values()):
+            self._ready.set()
+        self._worker_tasks = [
+            loop.create_task(self._worker(), name=f"pipeline-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    def start(self):
+        """Start the worker pool on the running loop (idempotent)."""
+        self._ensure_started()
+
+    async def stop(self):
+        """Stop the workers, waiting for interrupted runs to save their progress."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def _next_job(self) -> Optional[PipelineJob]:
+        for severity in SEVERITY_ORDER:
+            if self._queues[severity]:
+                return self._queues[severity].popleft()
+        return None
+
+    async def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            incident_id = job.incident.id
+            started = time.monotonic()
+            self.wait_stats[job.incident.severity].add(started - job.enqueued_at)
+            self._in_flight[incident_id] = started
+
+            # Run in its own task so cancelling the incident doesn't kill the worker
+            if job.resume:
+                coro = self.pipeline.resume(incident_id)
+            else:
+                coro = self.pipeline.run(
+                    job.incident, job.current_metrics, job.baseline_metrics, job.auto_approve,
+                )
+            run = asyncio.create_task(coro)
+            try:
+                await asyncio.wait({run})
+            except asyncio.CancelledError:
+                # Shutdown: let the run record where it stopped before the worker exits
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+                raise
+            finally:
+                self._in_flight.pop(incident_id, None)
+                self.finished += 1
+            if not run.cancelled() and run.exception() is not None:
+                print(f"[SCHEDULER] Pipeline run crashed for {incident_id}: {run.exception()}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        oldest = {
+            s.value: now - q[0].enqueued_at
+            for s, q in self._queues.items() if q
+        }
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.depth,
+            "queue_depth_by_severity": {s.value: len(q) for s, q in self._queues.items()},
+            "oldest_wait_seconds": oldest,
+            "in_flight": len(self._in_flight),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "finished": self.finished,
+            "wait_time": {s.value: w.to_dict() for s, w in self.wait_stats.items()},
+        }
+
+
+def scheduler_from_env(pipeline) -> PipelineScheduler:
+    """Build the scheduler sized by PIPELINE_WORKERS / PIPELINE_QUEUE_LIMIT."""
+    return PipelineScheduler(
+        pipeline,
+        workers=int(os.getenv("PIPELINE_WORKERS", "4")),
+        max_queue=int(os.getenv("PIPELINE_QUEUE_LIMIT", "100")),
+    )
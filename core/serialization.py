@@ -0,0 +1,137 @@
+"""JSON encoding for API responses.
+
+Incidents make up most of every response body, so each one is encoded
+straight to bytes (orjson when installed, the stdlib otherwise) and the
+bytes are cached per incident version. A list endpoint therefore re-encodes
+only the incidents that changed since the last request. Responses can be
+projected to a subset of top-level fields (`?fields=id,stage,service_name`),
+so list views don't ship logs, hypotheses and timelines at all.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .models import Incident, IncidentSummary, TimelineEvent
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Projection = Optional[FrozenSet[str]]
+Document = Union[Incident, IncidentSummary]
+
+INCIDENT_FIELDS: FrozenSet[str] = frozenset(Incident.model_fields)
+
+
+class RawJSON(bytes):
+    """Already-encoded JSON, spliced into the output verbatim by `dumps`."""
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, TimelineEvent):
+        return obj.to_dict()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def _encode(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to JSON bytes; RawJSON values (top level or one level down) are inserted as-is."""
+    if isinstance(obj, RawJSON):
+        return bytes(obj)
+    if isinstance(obj, dict) and any(isinstance(v, RawJSON) for v in obj.values()):
+        return b"{" + b",".join(_encode(str(k)) + b":" + dumps(v) for k, v in obj.items()) + b"}"
+    if isinstance(obj, list) and any(isinstance(v, RawJSON) for v in obj):
+        return b"[" + b",".join(dumps(v) for v in obj) + b"]"
+    return _encode(obj)
+
+
+def parse_fields(fields: Optional[str]) -> Projection:
+    """Parse a `fields=a,b,c` projection (None means every field).
+
+    `id` is always included so clients can key the results.
+
+    Raises:
+        ValueError: if a field isn't an Incident field
+    """
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - INCIDENT_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown incident field(s): {', '.join(sorted(unknown))}")
+    return frozenset(requested | {"id"})
+
+
+class IncidentEncoder:
+    """Encodes incidents (or their summaries) to JSON bytes, cached per (document, version, projection)."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[str, str, Projection], Tuple[int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, incident: Document, fields: Projection = None) -> RawJSON:
+        # Version 0 means the incident was never stored, so its version doesn't track changes
+        key = (type(incident).__name__, incident.id, fields)
+        if incident.version:
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached and cached[0] == incident.version:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return RawJSON(cached[1])
+
+        # pydantic's own JSON mode, so custom field serializers (TimelineEvent) apply
+        body = incident.model_dump_json(include=set(fields) if fields else None).encode("utf-8")
+        if incident.version:
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = (incident.version, body)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return RawJSON(body)
+
+    def encode_many(self, incidents: Iterable[Document], fields: Projection = None) -> RawJSON:
+        """Encode a JSON array of incidents or summaries from their cached fragments."""
+        return RawJSON(b"[" + b",".join(self.encode(i, fields) for i in incidents) + b"]")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "orjson" if orjson is not None else "json",
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0,
+            }
+
+
+# Global encoder instance
+incident_encoder = IncidentEncoder(max_entries=int(os.getenv("SERIALIZATION_CACHE_SIZE", "4096")))
@@ -1,64 +1,372 @@
 import json
-from typing import Dict, Optional, List
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, List, Tuple
 from datetime import datetime
-from .models import Incident, AgentStage
+from .models import Incident, IncidentSummary, AgentStage, IncidentType, TimelineEvent
+from .persistence import StoreBackend, backend_from_env
+from .events import event_bus
+from .stats import IncidentStatistics, StatSample
+from .tracing import tracer
+from .indexes import (
+    SortKey, SortedKeyList, FieldIndex,
+    sort_key, to_timestamp, encode_cursor, decode_cursor,
+)
+
+ACTIVE_STAGES = [s for s in AgentStage if s not in (AgentStage.COMPLETED, AgentStage.FAILED)]
 
 
 class IncidentStore:
     
-    def __init__(self):
+    def __init__(self, backend: Optional[StoreBackend] = None, sync_interval: float = 1.0, timeline_cap: int = 0):
         self.incidents: Dict[str, Incident] = {}
+        # List-view projections, refreshed in place on every create/update
+        self.summaries: Dict[str, IncidentSummary] = {}
         self.metrics_history: List[Dict] = []
+        
+        # Store-wide version, bumped on any change; the epoch tells restarts apart
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        
+        # Secondary indexes, maintained on every create/update
+        self._by_time = SortedKeyList()
+        self._by_stage = FieldIndex()
+        self._by_service = FieldIndex()
+        self._by_type = FieldIndex()
+        self._indexed: Dict[str, Tuple[SortKey, AgentStage, str, IncidentType]] = {}
+        
+        # Running aggregates, updated as incidents enter/leave COMPLETED
+        self.stats = IncidentStatistics()
+        self._stat_samples: Dict[str, StatSample] = {}
+        
+        # Change listeners (pub/sub hook) and what each has been told so far
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._published: Dict[str, Tuple[AgentStage, IncidentType, Any, int]] = {}
+        
+        # Timeline events kept in memory per incident (0 = unbounded); older
+        # events are spilled to the backend. Without a backend memory is the
+        # only copy of the audit trail, so nothing is trimmed.
+        self.timeline_cap = timeline_cap
+        
+        # Optional durable backend; memory stays the read path
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self._last_sync = time.monotonic()
+        if self.backend:
+            for incident in self.backend.load(timeline_limit=timeline_cap):
+                self._put(incident)
+            if self.incidents:
+                print(f"[STORE] Reloaded {len(self.incidents)} incidents")
     
-    def create_incident(self, incident: Incident) -> str:
-        """Create a new incident and return its ID."""
+    def _sync(self):
+        """Pick up incidents written by other worker processes (throttled)."""
+        if not self.backend:
+            return
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        for incident in self.backend.load_changed(timeline_limit=self.timeline_cap):
+            self._put(incident)
+    
+    def _put(self, incident: Incident):
+        """Store an incident and move it between index buckets if its fields changed."""
         self.incidents[incident.id] = incident
+        summary = self.summaries.get(incident.id)
+        if summary is None:
+            self.summaries[incident.id] = IncidentSummary.from_incident(incident)
+        else:
+            summary.refresh(incident)
+        self.version += 1
+        self._update_stats(incident)
+        self._publish_changes(incident)
+        entry = (sort_key(incident), incident.stage, incident.service_name, incident.incident_type)
+        old = self._indexed.get(incident.id)
+        if old == entry:
+            return
+        
+        if old is None or old[0] != entry[0]:
+            if old is not None:
+                self._by_time.remove(old[0])
+            self._by_time.add(entry[0])
+        for pos, index in ((1, self._by_stage), (2, self._by_service), (3, self._by_type)):
+            if old is None or old[0] != entry[0] or old[pos] != entry[pos]:
+                if old is not None:
+                    index.remove(old[pos], old[0])
+                index.add(entry[pos], entry[0])
+        self._indexed[incident.id] = entry
+    
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """Register a callback receiving (event_type, delta) for every change."""
+        self._listeners.append(listener)
+    
+    def _publish_changes(self, incident: Incident):
+        """Emit small deltas (created / stage / timeline) instead of full documents."""
+        total_events = incident.timeline_offset + len(incident.timeline)
+        state = (incident.stage, incident.incident_type, incident.severity, total_events)
+        old = self._published.get(incident.id)
+        if old == state:
+            return
+        self._published[incident.id] = state
+        if not self._listeners:
+            return
+        
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        if old is None:
+            events.append(("created", {
+                "incident_id": incident.id,
+                "service_name": incident.service_name,
+                "severity": incident.severity.value,
+                "stage": incident.stage.value,
+                "incident_type": incident.incident_type.value,
+                "start_time": incident.start_time.isoformat(),
+            }))
+            first_new = 0
+        else:
+            if old[:3] != state[:3]:
+                events.append(("stage", {
+                    "incident_id": incident.id,
+                    "stage": incident.stage.value,
+                    "previous_stage": old[0].value,
+                    "incident_type": incident.incident_type.value,
+                    "severity": incident.severity.value,
+                }))
+            first_new = max(old[3] - incident.timeline_offset, 0) if old[3] <= total_events else 0
+        for event in incident.timeline[first_new:]:
+            events.append(("timeline", {"incident_id": incident.id, "event": event.to_dict()}))
+        
+        for event_type, data in events:
+            for listener in self._listeners:
+                try:
+                    listener(event_type, data)
+                except Exception as e:
+                    print(f"[STORE] Listener failed: {e}")
+    
+    def _update_stats(self, incident: Incident):
+        """Swap the incident's contribution to the running aggregates (O(1))."""
+        old = self._stat_samples.get(incident.id)
+        new = None
+        if incident.stage == AgentStage.COMPLETED:
+            if incident.end_time:
+                completed_at = to_timestamp(incident.end_time)
+            else:
+                completed_at = old.completed_at if old else time.time()
+            new = StatSample(
+                service=incident.service_name,
+                incident_type=incident.incident_type.value,
+                time_to_mitigation=incident.metrics.time_to_mitigation_seconds,
+                detection_latency=incident.metrics.detection_latency_seconds,
+                triage_accuracy=incident.metrics.triage_accuracy,
+                success=incident.metrics.mitigation_success,
+                completed_at=completed_at,
+            )
+        if new == old:
+            return
+        self.stats.apply(old, new)
+        if new is None:
+            del self._stat_samples[incident.id]
+        else:
+            self._stat_samples[incident.id] = new
+    
+    def create_incident(self, incident: Incident) -> str:
+        """Create a new incident and return its ID.
+        
+        Raises:
+            ValueError: if an incident with the same ID already exists
+        """
+        if incident.id in self.incidents:
+            raise ValueError(f"Incident {incident.id} already exists")
+        with tracer.trace(incident), tracer.span("store", "create_incident"):
+            incident.version += 1
+            self._put(incident)
+            if self.backend:
+                self.backend.save(incident)
+            self._spill_timeline(incident)
         return incident.id
     
+    def create_incidents(self, incidents: List[Incident]) -> List[str]:
+        """Create several incidents, persisted in a single backend transaction.
+        
+        Raises:
+            ValueError: if any ID is duplicated or already exists (nothing is created)
+        """
+        ids = [incident.id for incident in incidents]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate incident IDs in batch")
+        existing = [incident_id for incident_id in ids if incident_id in self.incidents]
+        if existing:
+            raise ValueError(f"Incident {existing[0]} already exists")
+        for incident in incidents:
+            with tracer.trace(incident), tracer.span("store", "create_incident", batch=len(incidents)):
+                incident.version += 1
+                self._put(incident)
+        if self.backend:
+            self.backend.save_many(incidents)
+        for incident in incidents:
+            self._spill_timeline(incident)
+        return ids
+    
     def get_incident(self, incident_id: str) -> Optional[Incident]:
         """Get an incident by ID."""
+        self._sync()
         return self.incidents.get(incident_id)
     
+    def get_summary(self, incident_id: str) -> Optional[IncidentSummary]:
+        """Get an incident's list-view summary by ID."""
+        self._sync()
+        return self.summaries.get(incident_id)
+    
     def update_incident(self, incident_id: str, incident: Incident):
         """Update an existing incident."""
-        self.incidents[incident_id] = incident
+        with tracer.trace(incident), tracer.span("store", "update_incident"):
+            incident.version += 1
+            self._put(incident)
+            if self.backend:
+                # Appends new timeline events; rewrites the head only if it changed
+                self.backend.save(incident)
+            self._spill_timeline(incident)
+    
+    def _spill_timeline(self, incident: Incident):
+        """Trim the in-memory timeline to the cap (call after the backend has the events)."""
+        overflow = len(incident.timeline) - self.timeline_cap
+        if self.timeline_cap <= 0 or overflow <= 0 or not self.backend:
+            return
+        del incident.timeline[:overflow]
+        incident.timeline_offset += overflow
+    
+    def get_timeline(self, incident_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[Tuple[List[TimelineEvent], int]]:
+        """Events numbered from `start` (over the whole history, including spilled ones) and the total count.
+        
+        Returns None if the incident doesn't exist.
+        """
+        incident = self.get_incident(incident_id)
+        if incident is None:
+            return None
+        offset = incident.timeline_offset
+        total = offset + len(incident.timeline)
+        end = total if limit is None else min(total, start + limit)
+        events: List[TimelineEvent] = []
+        if start < offset and self.backend:
+            events.extend(self.backend.load_timeline(incident_id, start, min(end, offset)))
+        events.extend(incident.timeline[max(start - offset, 0):max(end - offset, 0)])
+        return events, total
+    
+    def flush(self):
+        """Block until pending writes reach the backend.
+        
+        Raises:
+            PersistenceError: if the backend has writes it could not commit
+        """
+        if self.backend:
+            self.backend.flush()
     
     def list_incidents(self, limit: int = 100) -> List[Incident]:
         """List recent incidents."""
-        incidents = list(self.incidents.values())
-        incidents.sort(key=lambda x: x.start_time, reverse=True)
-        return incidents[:limit]
+        incidents, _ = self.query_incidents(limit=limit)
+        return incidents
     
     def get_active_incidents(self) -> List[Incident]:
         """Get all active (non-completed) incidents."""
-        return [
-            inc for inc in self.incidents.values()
-            if inc.stage not in [AgentStage.COMPLETED, AgentStage.FAILED]
-        ]
+        incidents, _ = self.query_incidents(limit=len(self.incidents), active_only=True)
+        return incidents
     
-    def get_statistics(self) -> Dict:
-        """Get overall statistics."""
-        incidents = list(self.incidents.values())
-        completed = [i for i in incidents if i.stage == AgentStage.COMPLETED]
-        
-        if not completed:
-            return {
-                "total_incidents": len(incidents),
-                "completed": 0,
-                "avg_detection_latency": 0,
-                "avg_time_to_mitigation": 0,
-                "success_rate": 0,
-                "triage_accuracy": 0,
-            }
+    def query_incidents(
+        self,
+        limit: int = 50,
+        service: Optional[str] = None,
+        stage: Optional[AgentStage] = None,
+        incident_type: Optional[IncidentType] = None,
+        since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        active_only: bool = False,
+    ) -> Tuple[List[Incident], Optional[str]]:
+        """Newest-first page of incidents matching the filters.
         
+        Returns the page and a cursor for the next page (None when exhausted).
+        Cost is proportional to the page size: the scan is driven by the most
+        selective index and the remaining filters are checked per item.
+        
+        Raises:
+            ValueError: if the cursor is malformed
+        """
+        ids, next_cursor = self._query_ids(limit, service, stage, incident_type, since, cursor, active_only)
+        return [self.incidents[i] for i in ids], next_cursor
+    
+    def query_summaries(
+        self,
+        limit: int = 50,
+        service: Optional[str] = None,
+        stage: Optional[AgentStage] = None,
+        incident_type: Optional[IncidentType] = None,
+        since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        active_only: bool = False,
+    ) -> Tuple[List[IncidentSummary], Optional[str]]:
+        """Same as query_incidents, but returns the compact list-view summaries."""
+        ids, next_cursor = self._query_ids(limit, service, stage, incident_type, since, cursor, active_only)
+        return [self.summaries[i] for i in ids], next_cursor
+    
+    def _query_ids(
+        self,
+        limit: int,
+        service: Optional[str],
+        stage: Optional[AgentStage],
+        incident_type: Optional[IncidentType],
+        since: Optional[datetime],
+        cursor: Optional[str],
+        active_only: bool,
+    ) -> Tuple[List[str], Optional[str]]:
+        self._sync()
+        if limit <= 0:
+            return [], None
+        before = decode_cursor(cursor) if cursor else None
+        since_ts = to_timestamp(since) if since else None
+        
+        stages = None
+        if stage is not None:
+            stages = [stage] if not active_only or stage in ACTIVE_STAGES else []
+        elif active_only:
+            stages = ACTIVE_STAGES
+        
+        # Pick the smallest index to drive the scan
+        scans = [(len(self._by_time), lambda: self._by_time.iter_desc(before))]
+        if stages is not None:
+            scans.append((self._by_stage.size(stages), lambda: self._by_stage.iter_desc(stages, before)))
+        if service is not None:
+            scans.append((self._by_service.size([service]), lambda: self._by_service.iter_desc([service], before)))
+        if incident_type is not None:
+            scans.append((self._by_type.size([incident_type]), lambda: self._by_type.iter_desc([incident_type], before)))
+        _, scan = min(scans, key=lambda s: s[0])
+        
+        page: List[str] = []
+        next_cursor = None
+        last_key = None
+        for key in scan():
+            if since_ts is not None and key[0] < since_ts:
+                break
+            _, inc_stage, inc_service, inc_type = self._indexed[key[1]]
+            if stages is not None and inc_stage not in stages:
+                continue
+            if service is not None and inc_service != service:
+                continue
+            if incident_type is not None and inc_type != incident_type:
+                continue
+            if len(page) >= limit:
+                next_cursor = encode_cursor(last_key)
+                break
+            page.append(key[1])
+            last_key = key
+        
+        return page, next_cursor
+    
+    def get_statistics(self) -> Dict:
+        """Get overall statistics (read from running aggregates)."""
+        self._sync()
         return {
-            "total_incidents": len(incidents),
-            "completed": len(completed),
-            "active": len(self.get_active_incidents()),
-            "avg_detection_latency": sum(i.metrics.detection_latency_seconds for i in completed) / len(completed),
-            "avg_time_to_mitigation": sum(i.metrics.time_to_mitigation_seconds for i in completed) / len(completed),
-            "success_rate": sum(1 for i in completed if i.metrics.mitigation_success) / len(completed) * 100,
-            "triage_accuracy": sum(i.metrics.triage_accuracy for i in completed) / len(completed) * 100,
+            "total_incidents": len(self.incidents),
+            "active": self._by_stage.size(ACTIVE_STAGES),
+            **self.stats.snapshot(),
         }
     
     def record_metrics(self, incident_id: str, metrics: Dict):
@@ -71,5 +379,9 @@ class IncidentStore:
 
 
 # Global store instance
-incident_store = IncidentStore()
+incident_store = IncidentStore(
+    backend=backend_from_env(),
+    timeline_cap=int(os.getenv("TIMELINE_MAX_EVENTS", "200")),
+)
+incident_store.add_listener(event_bus.publish)
 
@@ -0,0 +1,208 @@
+"""Incrementally maintained incident statistics.
+
+IncidentStore feeds every stage transition into IncidentStatistics, so
+/api/statistics reads running aggregates instead of rescanning incidents.
+"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+
+class StatSample(NamedTuple):
+    """The contribution of one completed incident to the aggregates."""
+    service: str
+    incident_type: str
+    time_to_mitigation: float
+    detection_latency: float
+    triage_accuracy: float
+    success: bool
+    completed_at: float
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch-style) with bounded relative error.
+
+    Unlike most streaming sketches it supports removal, which lets stats be
+    retracted when an incident leaves the completed state.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float, count: int = 1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+            if self.buckets[key] <= 0:
+                del self.buckets[key]
+        self.count += count
+
+    def remove(self, value: float):
+        self.add(value, -1)
+
+    def merge(self, other: "QuantileSketch"):
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class RunningStats:
+    """Count / sum / sum-of-squares aggregates over completed incidents."""
+
+    def __init__(self):
+        self.count = 0
+        self.success = 0
+        self.ttm_sum = 0.0
+        self.ttm_sumsq = 0.0
+        self.detection_sum = 0.0
+        self.triage_sum = 0.0
+        self.ttm_sketch = QuantileSketch()
+
+    def add(self, sample: StatSample, sign: int = 1):
+        self.count += sign
+        self.success += sign * int(sample.success)
+        self.ttm_sum += sign * sample.time_to_mitigation
+        self.ttm_sumsq += sign * sample.time_to_mitigation ** 2
+        self.detection_sum += sign * sample.detection_latency
+        self.triage_sum += sign * sample.triage_accuracy
+        self.ttm_sketch.add(sample.time_to_mitigation, sign)
+
+    def merge(self, other: "RunningStats"):
+        self.count += other.count
+        self.success += other.success
+        self.ttm_sum += other.ttm_sum
+        self.ttm_sumsq += other.ttm_sumsq
+        self.detection_sum += other.detection_sum
+        self.triage_sum += other.triage_sum
+        self.ttm_sketch.merge(other.ttm_sketch)
+
+    def to_dict(self) -> Dict:
+        n = self.count
+        if n <= 0:
+            return {
+                "completed": 0,
+                "avg_detection_latency": 0,
+                "avg_time_to_mitigation": 0,
+                "stddev_time_to_mitigation": 0,
+                "success_rate": 0,
+                "triage_accuracy": 0,
+                "ttm_p50": None,
+                "ttm_p95": None,
+                "ttm_p99": None,
+            }
+        mean = self.ttm_sum / n
+        variance = max(0.0, self.ttm_sumsq / n - mean * mean)
+        return {
+            "completed": n,
+            "avg_detection_latency": self.detection_sum / n,
+            "avg_time_to_mitigation": mean,
+            "stddev_time_to_mitigation": math.sqrt(variance),
+            "success_rate": self.success / n * 100,
+            "triage_accuracy": self.triage_sum / n * 100,
+            "ttm_p50": self.ttm_sketch.quantile(0.50),
+            "ttm_p95": self.ttm_sketch.quantile(0.95),
+            "ttm_p99": self.ttm_sketch.quantile(0.99),
+        }
+
+
+class WindowedStats:
+    """Sliding-window aggregates backed by fixed-width time buckets."""
+
+    def __init__(self, window_seconds: float, bucket_seconds: float):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.buckets: Deque[Tuple[int, RunningStats]] = deque()
+
+    def _bucket_id(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _expire(self, now: float):
+        oldest = self._bucket_id(now - self.window_seconds) + 1
+        while self.buckets and self.buckets[0][0] < oldest:
+            self.buckets.popleft()
+
+    def add(self, sample: StatSample, sign: int = 1):
+        bucket_id = self._bucket_id(sample.completed_at)
+        # Samples normally arrive in time order, so the bucket is almost always the last one
+        for bid, stats in reversed(self.buckets):
+            if bid == bucket_id:
+                stats.add(sample, sign)
+                return
+            if bid < bucket_id:
+                break
+        if sign < 0:
+            return  # already expired from the window
+        stats = RunningStats()
+        stats.add(sample)
+        self.buckets.append((bucket_id, stats))
+        if len(self.buckets) > 1 and self.buckets[-2][0] > bucket_id:
+            self.buckets = deque(sorted(self.buckets, key=lambda b: b[0]))
+
+    def snapshot(self, now: Optional[float] = None) -> RunningStats:
+        self._expire(time.time() if now is None else now)
+        total = RunningStats()
+        for _, stats in self.buckets:
+            total.merge(stats)
+        return total
+
+
+class IncidentStatistics:
+    """Overall, per-service, per-type and windowed aggregates over completed incidents."""
+
+    def __init__(self):
+        self.overall = RunningStats()
+        self.by_service: Dict[str, RunningStats] = {}
+        self.by_type: Dict[str, RunningStats] = {}
+        self.windows: Dict[str, WindowedStats] = {
+            "1h": WindowedStats(3600, 60),
+            "24h": WindowedStats(86400, 900),
+        }
+
+    def apply(self, old: Optional[StatSample], new: Optional[StatSample]):
+        """Replace an incident's previous contribution with its new one (either may be None)."""
+        if old == new:
+            return
+        if old is not None:
+            self._add(old, -1)
+        if new is not None:
+            self._add(new, 1)
+
+    def _add(self, sample: StatSample, sign: int):
+        self.overall.add(sample, sign)
+        self.by_service.setdefault(sample.service, RunningStats()).add(sample, sign)
+        self.by_type.setdefault(sample.incident_type, RunningStats()).add(sample, sign)
+        for window in self.windows.values():
+            window.add(sample, sign)
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        return {
+            **self.overall.to_dict(),
+            "by_service": {k: v.to_dict() for k, v in self.by_service.items() if v.count > 0},
+            "by_type": {k: v.to_dict() for k, v in self.by_type.items() if v.count > 0},
+            "windows": {name: w.snapshot(now).to_dict() for name, w in self.windows.items()},
+        }
@@ -0,0 +1,45 @@
+"""Service dependency graph (simulated) shared by Scout and the alert correlator."""
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List
+
+# service -> services it depends on
+SERVICE_DEPENDENCIES: Dict[str, List[str]] = {
+    "api-service": ["database", "redis-cache", "auth-service"],
+    "database": [],
+    "redis-cache": [],
+    "auth-service": ["database"],
+}
+
+
+def dependencies(service_name: str) -> List[str]:
+    """Direct dependencies of a service."""
+    return SERVICE_DEPENDENCIES.get(service_name, [])
+
+
+def _neighbours() -> Dict[str, List[str]]:
+    graph: Dict[str, List[str]] = {}
+    for service, deps in SERVICE_DEPENDENCIES.items():
+        for dep in deps:
+            graph.setdefault(service, []).append(dep)
+            graph.setdefault(dep, []).append(service)
+    return graph
+
+
+_NEIGHBOURS = _neighbours()
+
+
+@lru_cache(maxsize=1024)
+def related_services(service_name: str, max_hops: int = 2) -> FrozenSet[str]:
+    """Services within `max_hops` of this one, following dependencies in either direction."""
+    seen = {service_name}
+    frontier = deque([(service_name, 0)])
+    while frontier:
+        service, hops = frontier.popleft()
+        if hops >= max_hops:
+            continue
+        for other in _NEIGHBOURS.get(service, []):
+            if other not in seen:
+                seen.add(other)
+                frontier.append((other, hops + 1))
+    return frozenset(seen)
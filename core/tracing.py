@@ -0,0 +1,211 @@
+"""Lightweight span tracing for the incident pipeline.
+
+Spans are timed with the monotonic clock, nested through a context variable
+(so asyncio tasks inherit their parent span), attached to the incident they
+belong to, and folded into per-(kind, name) latency histograms that are
+exported in Prometheus text format. Incident traces can be exported as
+OpenTelemetry (OTLP/JSON) documents.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+_CLIENT_KINDS = {"http", "llm"}
+
+
+class Trace:
+    """The spans of one incident, anchored so monotonic offsets map to wall time."""
+
+    def __init__(self, trace_id: str, spans: List[Dict[str, Any]], max_spans: int):
+        self.trace_id = trace_id
+        self.spans = spans
+        self.max_spans = max_spans
+        self.wall_anchor_ns = time.time_ns()
+        self.mono_anchor_ns = time.perf_counter_ns()
+
+    def wall_ns(self, mono_ns: int) -> int:
+        return self.wall_anchor_ns + (mono_ns - self.mono_anchor_ns)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("incident_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("incident_span", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts, then +Inf count, then sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self, name: str, help_text: str, label_names: Tuple[str, ...]) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, counts in series:
+            label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_str},le="{bound}"}} {cumulative}')
+            cumulative += counts[len(self.buckets)]
+            lines.append(f'{name}_bucket{{{label_str},le="+Inf"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label_str}}} {counts[-1]}")
+            lines.append(f"{name}_count{{{label_str}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+    """Creates spans, attaches them to incidents and aggregates their latencies."""
+
+    def __init__(self, max_spans_per_trace: int = 256):
+        self.max_spans_per_trace = max_spans_per_trace
+        self.span_seconds = Histogram()
+        self.detection_seconds = Histogram()
+
+    @staticmethod
+    def _new_id(nbytes: int) -> str:
+        return os.urandom(nbytes).hex()
+
+    @contextmanager
+    def trace(self, incident) -> Iterator[Trace]:
+        """Bind spans created in this context to `incident` (starting its trace if needed)."""
+        current = _current_trace.get()
+        if current is not None and current.spans is incident.spans:
+            yield current
+            return
+        if not incident.trace_id:
+            incident.trace_id = self._new_id(16)
+        trace = Trace(incident.trace_id, incident.spans, self.max_spans_per_trace)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            yield trace
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; yields the attribute dict so callers can add results."""
+        span_id = self._new_id(8)
+        parent_id = _current_span.get()
+        token = _current_span.set(span_id)
+        status = "ok"
+        start = time.perf_counter_ns()
+        try:
+            yield attributes
+        except BaseException as e:
+            status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            attributes.setdefault("error", f"{e.__class__.__name__}: {e}")
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            _current_span.reset(token)
+            self.span_seconds.observe((kind, name, status), (end - start) / 1e9)
+            trace = _current_trace.get()
+            if trace is not None and len(trace.spans) < trace.max_spans:
+                trace.spans.append({
+                    "name": name,
+                    "kind": kind,
+                    "span_id": span_id,
+                    "parent_id": parent_id,
+                    "start_ns": trace.wall_ns(start),
+                    "end_ns": trace.wall_ns(end),
+                    "status": status,
+                    "attributes": attributes,
+                })
+
+    def record_detection(self, service: str, seconds: float):
+        self.detection_seconds.observe((service,), seconds)
+
+    def render_prometheus(self) -> List[str]:
+        lines = self.span_seconds.render(
+            "incident_pipeline_span_seconds",
+            "Duration of pipeline spans (stages, agents, HTTP/LLM calls, store writes)",
+            ("kind", "name", "status"),
+        )
+        lines += self.detection_seconds.render(
+            "incident_detection_latency_seconds",
+            "Time from incident start until the pipeline picked it up",
+            ("service",),
+        )
+        return lines
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def export_otlp(incident, service_name: str = "incident-autopilot") -> Dict[str, Any]:
+    """An incident's spans as an OTLP/JSON `ExportTraceServiceRequest` document."""
+    spans = []
+    for span in incident.spans:
+        otlp_span = {
+            "traceId": incident.trace_id,
+            "spanId": span["span_id"],
+            "name": f"{span['kind']}.{span['name']}",
+            "kind": SPAN_KIND_CLIENT if span["kind"] in _CLIENT_KINDS else SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span["start_ns"]),
+            "endTimeUnixNano": str(span["end_ns"]),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in {"incident.id": incident.id, **span["attributes"]}.items()
+            ],
+            "status": {"code": 1 if span["status"] == "ok" else 2},
+        }
+        if span["parent_id"]:
+            otlp_span["parentSpanId"] = span["parent_id"]
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": service_name}},
+                {"key": "incident.service", "value": {"stringValue": incident.service_name}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "incident_autopilot.pipeline"},
+                "spans": spans,
+            }],
+        }]
+    }
+
+
+# Global tracer instance
+tracer = Tracer(max_spans_per_trace=int(os.getenv("TRACE_MAX_SPANS", "256")))
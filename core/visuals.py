@@ -0,0 +1,199 @@
+"""Incident card generation as background post-processing.
+
+A Freepik card is cosmetic, and a text-to-image request can take up to
+30s, so it is never generated on the pipeline's path. The Executor submits
+the incident here and moves on. A worker generates the card later and
+attaches `visual_url` to the incident through a normal store update.
+
+Cards only depend on the incident type and severity, so they are cached by
+that pair. Incidents that need the same card while it is being generated
+wait on that one request. Pending jobs are bounded: under load, new jobs
+are dropped and those incidents simply have no card. Without a Freepik API
+key each incident gets its own placeholder URL right away and nothing is
+queued or cached.
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import Incident
+from .state import incident_store
+
+from integrations.freepik import FreepikClient
+
+CardKey = Tuple[str, str]  # (incident type, severity)
+
+
+class IncidentCardQueue:
+    """Bounded, deduplicating background queue for incident cards."""
+
+    def __init__(
+        self,
+        client: Optional[FreepikClient] = None,
+        max_pending: int = 32,
+        workers: int = 1,
+        cache_size: int = 64,
+    ):
+        self.client = client or FreepikClient()
+        self.max_pending = max(0, max_pending)
+        self.workers = max(1, workers)
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[CardKey, str]" = OrderedDict()
+        # Incidents waiting for each card: queued jobs, then jobs being generated
+        self._pending: "OrderedDict[CardKey, Tuple[Dict[str, Any], List[str]]]" = OrderedDict()
+        self._running: Dict[CardKey, List[str]] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Event] = None
+
+        # Counters
+        self.submitted = 0
+        self.cache_hits = 0
+        self.placeholders = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.generated = 0
+        self.failed = 0
+        self.attached = 0
+
+    @staticmethod
+    def key(incident: Incident) -> CardKey:
+        return (incident.incident_type.value, incident.severity.value)
+
+    def submit(self, incident: Incident) -> str:
+        """Request a card for the incident; returns placeholder, cached, coalesced, queued or dropped.
+
+        A cached card is attached right away; otherwise `visual_url` is set
+        when the card is ready.
+        """
+        self.submitted += 1
+        key = self.key(incident)
+
+        # Without an API key the client only returns a per-incident placeholder;
+        # it costs nothing and must not be cached under the (type, severity) key
+        if not self.client.api_key:
+            self.placeholders += 1
+            self._attach(incident.id, self.client.placeholder_url(self._card_data(incident)))
+            return "placeholder"
+
+        url = self._cache.get(key)
+        if url is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            self._attach(incident.id, url)
+            return "cached"
+
+        if key in self._running:
+            self._running[key].append(incident.id)
+            self.coalesced += 1
+            return "coalesced"
+        if key in self._pending:
+            self._pending[key][1].append(incident.id)
+            self.coalesced += 1
+            return "coalesced"
+
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return "dropped"
+
+        self._ensure_started()
+        self._pending[key] = (self._card_data(incident), [incident.id])
+        self._ready.set()
+        return "queued"
+
+    def _card_data(self, incident: Incident) -> Dict[str, Any]:
+        return {
+            "id": incident.id,
+            "service": incident.service_name,
+            "severity": incident.severity.value,
+            "type": incident.incident_type.value,
+        }
+
+    def _attach(self, incident_id: str, url: str):
+        incident = incident_store.get_incident(incident_id)
+        if incident is None or incident.visual_url == url:
+            return
+        incident.visual_url = url
+        incident_store.update_incident(incident_id, incident)
+        self.attached += 1
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker_tasks:
+            return
+        self._loop = loop
+        self._ready = asyncio.Event()
+        if self._pending:
+            self._ready.set()
+        self._worker_tasks = [
+            loop.create_task(self._worker(), name=f"incident-card-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def _worker(self):
+        while True:
+            if not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            key, (data, waiters) = self._pending.popitem(last=False)
+            self._running[key] = waiters
+            try:
+                url = await self.client.generate_incident_card_async(data)
+            except Exception as e:
+                print(f"[VISUALS] Card generation failed for {key}: {e}")
+                url = None
+            waiters = self._running.pop(key)
+
+            if not url or url in self.client.fallback_urls:
+                self.failed += 1
+                continue  # not cached, so the next incident of this kind retries
+            self.generated += 1
+            self._cache[key] = url
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            for incident_id in waiters:
+                self._attach(incident_id, url)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": len(self._pending),
+            "generating": len(self._running),
+            "cached_cards": len(self._cache),
+            "submitted": self.submitted,
+            "cache_hits": self.cache_hits,
+            "placeholders": self.placeholders,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "generated": self.generated,
+            "failed": self.failed,
+            "attached": self.attached,
+        }
+
+
+def card_queue_from_env() -> IncidentCardQueue:
+    return IncidentCardQueue(
+        max_pending=int(os.getenv("INCIDENT_CARD_MAX_PENDING", "32")),
+        workers=int(os.getenv("INCIDENT_CARD_WORKERS", "1")),
+        cache_size=int(os.getenv("INCIDENT_CARD_CACHE_SIZE", "64")),
+    )
+
+
+# Global card queue instance
+incident_cards = card_queue_from_env()
@@ -1,14 +1,23 @@
 import os
-import requests
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
+
+from integrations.http import HTTPTransport, http_transport
+
+
+FALLBACK_IMAGE_URL = "https://cdn.freepik.com/fallback.png"
+ERROR_IMAGE_URL = "https://cdn.freepik.com/error.png"
 
 
 class FreepikClient:
     """Client for Freepik API integration."""
     
-    def __init__(self, api_key: str = None):
+    # Returned instead of a generated image when the API call fails
+    fallback_urls = frozenset({FALLBACK_IMAGE_URL, ERROR_IMAGE_URL})
+    
+    def __init__(self, api_key: str = None, transport: Optional[HTTPTransport] = None):
         self.api_key = api_key or os.getenv("FREEPIK_API_KEY", "")
         self.base_url = "https://api.freepik.com/v1"
+        self.http = transport or http_transport
     
     def generate_incident_card(self, incident_data: Dict) -> str:
         """Generate a visual incident card with timeline using Freepik AI.
@@ -20,46 +29,69 @@ class FreepikClient:
             URL or path to generated image
         """
         if not self.api_key:
-            incident_id = incident_data.get("id", "unknown")
-            print(f"[FREEPIK] No API key - returning placeholder image")
-            return f"https://cdn.freepik.com/incident-cards/{incident_id}.png"
+            return self.placeholder_url(incident_data)
         
         print(f"   🔑 [FREEPIK] API key detected, generating AI image...")
         
         try:
             # Real Freepik API call for AI image generation
-            incident_type = incident_data.get("type", "incident")
-            severity = incident_data.get("severity", "high")
-            
-            prompt = f"Technical incident alert card, {severity} severity {incident_type}, minimalist infographic style, red and orange gradient"
-            
-            response = requests.post(
-                f"{self.base_url}/ai/text-to-image",
-                headers={
-                    "x-freepik-api-key": self.api_key,
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "prompt": prompt,
-                    "num_images": 1,
-                    "image_size": "square_1_1"
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                image_url = result.get("data", [{}])[0].get("url", "")
-                print(f"[FREEPIK] Successfully generated AI image via REAL API!")
-                print(f"[FREEPIK] Image URL: {image_url}")
-                return image_url
-            else:
-                print(f"[FREEPIK] API returned {response.status_code}, using placeholder")
-                return f"https://cdn.freepik.com/fallback.png"
-                
+            response = self.http.post_sync(**self._card_call(incident_data))
+        except Exception as e:
+            print(f"[FREEPIK] API call failed: {e}")
+            return ERROR_IMAGE_URL
+        return self._card_result(response.status_code, response.json)
+    
+    async def generate_incident_card_async(self, incident_data: Dict) -> str:
+        """Non-blocking variant of generate_incident_card for use inside the event loop."""
+        if not self.api_key:
+            return self.placeholder_url(incident_data)
+        
+        print(f"   🔑 [FREEPIK] API key detected, generating AI image...")
+        
+        try:
+            response = await self.http.post(**self._card_call(incident_data))
+        except Exception as e:
+            print(f"[FREEPIK] API call failed: {e}")
+            return ERROR_IMAGE_URL
+        return self._card_result(response.status_code, response.json)
+    
+    def placeholder_url(self, incident_data: Dict) -> str:
+        incident_id = incident_data.get("id", "unknown")
+        print(f"[FREEPIK] No API key - returning placeholder image")
+        return f"https://cdn.freepik.com/incident-cards/{incident_id}.png"
+    
+    def _card_call(self, incident_data: Dict) -> Dict:
+        incident_type = incident_data.get("type", "incident")
+        severity = incident_data.get("severity", "high")
+        
+        prompt = f"Technical incident alert card, {severity} severity {incident_type}, minimalist infographic style, red and orange gradient"
+        
+        # Timeout comes from the transport's per-host settings (30s for api.freepik.com by default)
+        return {
+            "url": f"{self.base_url}/ai/text-to-image",
+            "headers": {
+                "x-freepik-api-key": self.api_key,
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "prompt": prompt,
+                "num_images": 1,
+                "image_size": "square_1_1"
+            },
+        }
+    
+    def _card_result(self, status_code: int, body: Callable[[], Dict]) -> str:
+        if status_code != 200:
+            print(f"[FREEPIK] API returned {status_code}, using placeholder")
+            return FALLBACK_IMAGE_URL
+        try:
+            image_url = body().get("data", [{}])[0].get("url", "")
         except Exception as e:
             print(f"[FREEPIK] API call failed: {e}")
-            return f"https://cdn.freepik.com/error.png"
+            return ERROR_IMAGE_URL
+        print(f"[FREEPIK] Successfully generated AI image via REAL API!")
+        print(f"[FREEPIK] Image URL: {image_url}")
+        return image_url
     
     def generate_timeline_graphic(self, timeline_events: list) -> str:
         # In production, use Freepik to generate timeline visualization
@@ -1,9 +1,92 @@
 """Google Gemini (GenAI SDK) client for incident classification."""
 import os
 import json
+import asyncio
+import threading
+import time
 from typing import Dict, Any, Optional
 
-from google import genai
+from core.tracing import tracer
+
+
+# One genai.Client per API key for the whole process, so every GeminiClient
+# reuses the same underlying HTTP connections.
+_shared_clients: Dict[str, "genai.Client"] = {}
+_shared_clients_lock = threading.Lock()
+
+# Process-wide cap on in-flight LLM calls. asyncio primitives are bound to the
+# loop they are first used on, so keep one semaphore per running loop.
+_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+_semaphores: Dict[int, asyncio.Semaphore] = {}
+
+
+# Process-level registry: the GeminiClient shared by every agent. It is
+# resolved lazily on first real use, so importing agents stays cheap.
+_registry_lock = threading.Lock()
+_registry_resolved = False
+_registry_client: Optional["GeminiClient"] = None
+
+
+def get_ai_client() -> Optional["GeminiClient"]:
+    """Return the shared GeminiClient, creating it on first use.
+
+    Returns None (and remembers that) when no usable API key is configured.
+    """
+    global _registry_resolved, _registry_client
+    if _registry_resolved:
+        return _registry_client
+
+    with _registry_lock:
+        if not _registry_resolved:
+            google_key = os.getenv("GOOGLE_API_KEY", "")
+            if google_key and google_key != "your_key_here":
+                try:
+                    _registry_client = GeminiClient(google_key)
+                except ImportError:
+                    print("[GEMINI] google-genai not installed")
+            else:
+                print("[GEMINI] No AI API key found")
+            _registry_resolved = True
+    return _registry_client
+
+
+async def warm_up_ai_client() -> bool:
+    """Create the shared client and open its connection pool ahead of the first incident."""
+    client = get_ai_client()
+    if client is None:
+        return False
+    return await client.warm_up()
+
+
+def reset_ai_client():
+    """Forget the shared client (e.g. after rotating GOOGLE_API_KEY)."""
+    global _registry_resolved, _registry_client
+    with _registry_lock:
+        _registry_resolved = False
+        _registry_client = None
+
+
+def _get_shared_genai_client(api_key: str) -> "genai.Client":
+    """Return the process-wide genai.Client for this API key."""
+    from google import genai
+
+    with _shared_clients_lock:
+        client = _shared_clients.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key)
+            _shared_clients[api_key] = client
+        return client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the LLM concurrency limiter for the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    sem = _semaphores.get(loop_id)
+    if sem is None:
+        sem = asyncio.Semaphore(_MAX_CONCURRENCY)
+        _semaphores.clear()  # drop limiters of finished loops
+        _semaphores[loop_id] = sem
+    return sem
 
 
 class GeminiClient:
@@ -18,14 +101,27 @@ class GeminiClient:
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY", "")
         # Pick a modern default; adjust if you want another
         self.model = model or os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+        self.timeout = float(os.getenv("GEMINI_TIMEOUT", "20"))
 
         if self.api_key and self.api_key != "your_key_here":
-            self.client = genai.Client(api_key=self.api_key)
+            self.client = _get_shared_genai_client(self.api_key)
             print("[GEMINI] Initialized (google-genai)")
         else:
             self.client = None
             print("[GEMINI] No API key - AI features disabled")
 
+    async def warm_up(self, timeout: float = 5.0) -> bool:
+        """Establish a keep-alive connection to the API with a cheap metadata call."""
+        if not self.client:
+            return False
+        try:
+            await asyncio.wait_for(self.client.aio.models.get(model=self.model), timeout=timeout)
+            print("[GEMINI] Connection pool warmed up")
+            return True
+        except Exception as e:
+            print(f"[GEMINI] Warm-up failed: {e}")
+            return False
+
     def generate_content(
         self,
         prompt: str,
@@ -56,6 +152,53 @@ class GeminiClient:
             print(f"[GEMINI] API call failed: {e}")
             return None
 
+    async def generate_content_async(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """Generate text using Gemini without blocking the event loop.
+
+        Waits for a slot on the process-wide concurrency limiter and gives up
+        after `timeout` seconds. Cancelling the calling task (e.g. when an
+        incident is dropped) cancels the in-flight request.
+        """
+        if not self.client:
+            print("[GEMINI] Client not initialized")
+            return None
+
+        timeout = self.timeout if timeout is None else timeout
+        queued_at = time.perf_counter()
+        try:
+            with tracer.span("llm", "gemini.generate_content", model=self.model) as span:
+                async with _get_semaphore():
+                    span["queued_ms"] = round((time.perf_counter() - queued_at) * 1000, 2)
+                    resp = await asyncio.wait_for(
+                        self.client.aio.models.generate_content(
+                            model=self.model,
+                            contents=prompt,
+                            config={
+                                "temperature": temperature,
+                                "max_output_tokens": max_tokens,
+                            },
+                        ),
+                        timeout=timeout,
+                    )
+            text = getattr(resp, "text", None)
+            if text:
+                return text
+            print("[GEMINI] Empty response from API")
+            return None
+
+        except asyncio.TimeoutError:
+            print(f"[GEMINI] API call timed out after {timeout:.1f}s")
+            return None
+        except Exception as e:
+            print(f"[GEMINI] API call failed: {e}")
+            return None
+
     def generate_json(
         self,
         prompt: str,
@@ -64,6 +207,21 @@ class GeminiClient:
     ) -> Optional[Dict[str, Any]]:
         """Generate JSON response using Gemini."""
         response_text = self.generate_content(prompt, temperature, max_tokens)
+        return self._parse_json(response_text)
+
+    async def generate_json_async(
+        self,
+        prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 1000,
+        timeout: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Generate JSON response using Gemini without blocking the event loop."""
+        response_text = await self.generate_content_async(prompt, temperature, max_tokens, timeout)
+        return self._parse_json(response_text)
+
+    def _parse_json(self, response_text: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Parse a model response into JSON, tolerating markdown code fences."""
         if not response_text:
             return None
 
@@ -0,0 +1,335 @@
+"""Shared HTTP transport for the integrations.
+
+Every outbound call (GitHub logs and runbooks, Retool, Freepik) goes through
+one transport instead of opening a connection per request:
+
+- async calls share one httpx client (keep-alive, HTTP/2 when `h2` is
+  installed); blocking calls share one requests session whose adapters keep
+  a connection pool per host
+- each host has a concurrency cap and a timeout (HTTP_HOST_CONCURRENCY and
+  HTTP_TIMEOUT, overridden per host by HTTP_HOST_LIMITS, e.g.
+  "api.freepik.com=2/30,api.retool.com=4"), so one slow integration can't
+  take every connection
+- `stats()` reports per-host in-flight, peak and queueing numbers alongside
+  the open/idle connections, for sizing the pools
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class HostPool:
+    """Limits and counters for one host."""
+    host: str
+    max_concurrency: int
+    timeout: float
+
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    queued: int = 0  # requests that had to wait for a free slot
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": self.in_flight / self.max_concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "queued": self.queued,
+            "avg_wait_ms": (self.wait_seconds / self.queued * 1000) if self.queued else 0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+def parse_host_limits(spec: str) -> Dict[str, Tuple[Optional[int], Optional[float]]]:
+    """Parse "host=concurrency[/timeout],..." into {host: (concurrency, timeout)}."""
+    limits: Dict[str, Tuple[Optional[int], Optional[float]]] = {}
+    for item in spec.split(","):
+        host, _, value = item.strip().partition("=")
+        if not host or not value:
+            continue
+        concurrency, _, timeout = value.partition("/")
+        limits[host.strip().lower()] = (
+            int(concurrency) if concurrency.strip() else None,
+            float(timeout) if timeout.strip() else None,
+        )
+    return limits
+
+
+class HTTPTransport:
+    """Pooled async + blocking HTTP client with per-host concurrency caps."""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        host_concurrency: int = 10,
+        timeout: float = 10.0,
+        host_limits: Optional[Dict[str, Tuple[Optional[int], Optional[float]]]] = None,
+        http2: bool = True,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.host_concurrency = host_concurrency
+        self.timeout = timeout
+        self.host_limits = host_limits or {}
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        self._hosts: Dict[str, HostPool] = {}
+        self._lock = threading.Lock()
+
+        # Async side: one client and one set of semaphores per event loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # Blocking side: one session, one adapter (connection pool) per host
+        self._session: Optional[requests.Session] = None
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    # ------------------------------------------------------------------
+    # Hosts
+    # ------------------------------------------------------------------
+
+    def host_pool(self, url: str) -> HostPool:
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            pool = self._hosts.get(host)
+            if pool is None:
+                concurrency, timeout = self.host_limits.get(host, (None, None))
+                pool = HostPool(host, max(1, concurrency or self.host_concurrency), timeout or self.timeout)
+                self._hosts[host] = pool
+            return pool
+
+    def _started(self, pool: HostPool, waited: float):
+        with self._lock:
+            pool.requests += 1
+            pool.in_flight += 1
+            pool.peak_in_flight = max(pool.peak_in_flight, pool.in_flight)
+            if waited > 0.001:
+                pool.queued += 1
+                pool.wait_seconds += waited
+                pool.max_wait_seconds = max(pool.max_wait_seconds, waited)
+
+    def _finished(self, pool: HostPool, failed: bool):
+        with self._lock:
+            pool.in_flight -= 1
+            if failed:
+                pool.errors += 1
+
+    # ------------------------------------------------------------------
+    # Async
+    # ------------------------------------------------------------------
+
+    def client(self) -> httpx.AsyncClient:
+        """The shared async client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._loop is not loop:
+            self._async_transport = httpx.AsyncHTTPTransport(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            self._async_client = httpx.AsyncClient(transport=self._async_transport, timeout=self.timeout)
+            self._semaphores = {}
+            self._loop = loop
+        return self._async_client
+
+    @asynccontextmanager
+    async def _slot(self, url: str) -> AsyncIterator[HostPool]:
+        self.client()  # binds the semaphores to the running loop
+        pool = self.host_pool(url)
+        semaphore = self._semaphores.get(pool.host)
+        if semaphore is None:
+            semaphore = self._semaphores[pool.host] = asyncio.Semaphore(pool.max_concurrency)
+        started = time.perf_counter()
+        async with semaphore:
+            self._started(pool, time.perf_counter() - started)
+            failed = True
+            try:
+                yield pool
+                failed = False
+            finally:
+                self._finished(pool, failed)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the shared client, within the host's concurrency cap."""
+        async with self._slot(url) as pool:
+            kwargs.setdefault("timeout", pool.timeout)
+            return await self.client().request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Stream a response; the host slot is held until the body is closed."""
+        async with self._slot(url) as pool:
+            kwargs.setdefault("timeout", pool.timeout)
+            async with self.client().stream(method, url, **kwargs) as resp:
+                yield resp
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_transport = None
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Blocking
+    # ------------------------------------------------------------------
+
+    def session(self, url: str) -> Tuple[requests.Session, HostPool]:
+        """The shared session, with a connection pool mounted for the URL's host."""
+        pool = self.host_pool(url)
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+            if pool.host not in self._adapters:
+                # pool_block makes the adapter itself enforce the host cap on connections
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool.max_concurrency, pool_block=True)
+                parts = urlsplit(url)
+                self._session.mount(f"{parts.scheme}://{parts.netloc}", adapter)
+                self._adapters[pool.host] = adapter
+                self._host_slots[pool.host] = threading.BoundedSemaphore(pool.max_concurrency)
+            return self._session, pool
+
+    @contextmanager
+    def _sync_slot(self, url: str) -> Iterator[Tuple[requests.Session, HostPool]]:
+        session, pool = self.session(url)
+        slot = self._host_slots[pool.host]
+        started = time.perf_counter()
+        with slot:
+            self._started(pool, time.perf_counter() - started)
+            failed = True
+            try:
+                yield session, pool
+                failed = False
+            finally:
+                self._finished(pool, failed)
+
+    def request_sync(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Blocking request through the shared session, within the host's concurrency cap."""
+        with self._sync_slot(url) as (session, pool):
+            kwargs.setdefault("timeout", pool.timeout)
+            return session.request(method, url, **kwargs)
+
+    def get_sync(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request_sync("GET", url, **kwargs)
+
+    def post_sync(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request_sync("POST", url, **kwargs)
+
+    @contextmanager
+    def stream_sync(self, method: str, url: str, **kwargs: Any) -> Iterator[requests.Response]:
+        """Blocking streamed response; the host slot is held until the body is closed."""
+        with self._sync_slot(url) as (session, pool):
+            kwargs.setdefault("timeout", pool.timeout)
+            with session.request(method, url, stream=True, **kwargs) as resp:
+                yield resp
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            self._adapters.clear()
+            self._host_slots.clear()
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def _async_connections(self) -> Dict[str, int]:
+        pool = getattr(self._async_transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def _sync_connections(self) -> Dict[str, Dict[str, int]]:
+        connections: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            adapters = dict(self._adapters)
+        for host, adapter in adapters.items():
+            opened = idle = 0
+            for key in list(adapter.poolmanager.pools.keys()):
+                conn_pool = adapter.poolmanager.pools.get(key)
+                if conn_pool is None:
+                    continue
+                opened += conn_pool.num_connections
+                idle += sum(1 for c in list(conn_pool.pool.queue) if c is not None) if conn_pool.pool else 0
+            connections[host] = {"opened": opened, "idle": idle}
+        return connections
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {host: pool.stats() for host, pool in self._hosts.items()}
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "keepalive_expiry_seconds": self.keepalive_expiry,
+            "default_host_concurrency": self.host_concurrency,
+            "default_timeout_seconds": self.timeout,
+            "async_connections": self._async_connections(),
+            "sync_connections": self._sync_connections(),
+            "hosts": hosts,
+        }
+
+
+# Image generation is slow; everything else uses HTTP_TIMEOUT unless overridden
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[Optional[int], Optional[float]]] = {
+    "api.freepik.com": (None, 30.0),
+}
+
+
+def transport_from_env() -> HTTPTransport:
+    """Build the shared transport from HTTP_* settings."""
+    host_limits = dict(DEFAULT_HOST_LIMITS)
+    host_limits.update(parse_host_limits(os.getenv("HTTP_HOST_LIMITS", "")))
+    return HTTPTransport(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        host_concurrency=int(os.getenv("HTTP_HOST_CONCURRENCY", "10")),
+        timeout=float(os.getenv("HTTP_TIMEOUT", "10")),
+        host_limits=host_limits,
+        http2=os.getenv("HTTP2_ENABLED", "true").lower() in ("1", "true", "yes"),
+    )
+
+
+# Global transport instance
+http_transport = transport_from_env()
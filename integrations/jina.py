@@ -1,59 +1,101 @@
 """GitHub-based Document & Log Fetcher for demo purposes."""
+import asyncio
+import os
+import httpx
 import requests
 from typing import Dict, Optional, List
 
+from core.http_cache import HTTPDocumentCache, runbook_cache
+from core.runbooks import runbook_index
+from core.logs import LogDigest, LogDigester, digest_lines
+from core.tracing import tracer
+from integrations.http import HTTPTransport, http_transport
+
+class FetchError(Exception):
+    """A log or runbook source could not be read."""
+
+
 class DocumentFetcher:
-    """Fetches and parses runbooks from GitHub for demo."""
+    """Fetches and parses runbooks from GitHub for demo.
 
-    def __init__(self):
+    Runbooks go through the shared revalidating cache (core.http_cache), so
+    after the first fetch Scout is served from memory or disk and GitHub is
+    only asked, in the background, whether the file changed.
+    """
+
+    def __init__(self, cache: Optional[HTTPDocumentCache] = None, transport: Optional[HTTPTransport] = None):
         # Base URL of your GitHub raw repo
         self.github_base = "https://raw.githubusercontent.com/mak372/agentic-sre-sim-data/main"
+        self.cache = cache or runbook_cache
+        self.http = transport or http_transport
 
-    def fetch_runbook(self, service_name: str, incident_type: str) -> Dict[str, str]:
-        """Fetch runbook documentation from GitHub repo."""
-
-        runbook_files = {
+    def _runbook_urls(self) -> Dict[str, str]:
+        return {
             "latency_spike": f"{self.github_base}/runbooks/latency_spike.md",
             "error_rate_increase": f"{self.github_base}/runbooks/error_rate_increase.md",
             "resource_saturation": f"{self.github_base}/runbooks/resource_saturation.md",
             "queue_depth_growth": f"{self.github_base}/runbooks/queue_depth_growth.md",
         }
 
-        url = runbook_files.get(incident_type)
+    def _runbook_url(self, incident_type: str) -> Optional[str]:
+        """Resolve the runbook URL for an incident type."""
+        return self._runbook_urls().get(incident_type)
+
+    def fetch_runbook(self, service_name: str, incident_type: str) -> Dict[str, str]:
+        """Fetch runbook documentation from GitHub repo."""
+
+        url = self._runbook_url(incident_type)
         if not url:
             print(f"No runbook URL for incident type: {incident_type}")
             return self._get_default_runbooks()
 
         try:
-            print(f"Fetching runbook from: {url}")
-            content = self._fetch_from_github(url)
-
-            if content:
-                print(f"Fetched {len(content)} characters from runbook")
-                return self._parse_runbook_content(content, incident_type)
-            else:
-                print(f"Failed to fetch runbook, using defaults")
-                return self._get_default_runbooks()
-
+            runbook = self.cache.get_sync(
+                url, self.http, lambda content: self._parse_runbook_content(content, incident_type),
+            )
         except Exception as e:
             print(f"Error fetching runbook: {e}")
+            runbook = None
+        if runbook is None:
+            print(f"Failed to fetch runbook, using defaults")
             return self._get_default_runbooks()
+        return runbook
 
-    def _fetch_from_github(self, url: str) -> Optional[str]:
-        """Fetch raw file content from GitHub."""
-        try:
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                return resp.text
-            else:
-                print(f"GitHub returned {resp.status_code}")
-                return None
-        except Exception as e:
-            print(f"GitHub fetch error: {e}")
-            return None
+    async def fetch_runbook_async(self, service_name: str, incident_type: str, fallback: bool = True) -> Dict[str, str]:
+        """Non-blocking variant of fetch_runbook for use inside the event loop.
+
+        Raises:
+            FetchError: with `fallback=False`, instead of returning the default
+                runbooks when the runbook can't be fetched (and isn't cached)
+        """
+        url = self._runbook_url(incident_type)
+        if not url:
+            print(f"No runbook URL for incident type: {incident_type}")
+            return self._get_default_runbooks()
+
+        runbook = await self.cache.get(
+            url, self.http, lambda content: self._parse_runbook_content(content, incident_type),
+        )
+        if runbook is None:
+            if not fallback:
+                raise FetchError(f"Runbook unavailable: {url}")
+            print(f"Failed to fetch runbook, using defaults")
+            return self._get_default_runbooks()
+        return runbook
+
+    async def preload(self) -> int:
+        """Fetch (or revalidate) every known runbook; returns how many are now cached."""
+        results = await asyncio.gather(
+            *(self.fetch_runbook_async("", incident_type) for incident_type in self._runbook_urls()),
+            return_exceptions=True,
+        )
+        loaded = sum(1 for r in results if isinstance(r, dict) and r.get("source") != "Default Demo Runbooks")
+        print(f"[RUNBOOKS] Preloaded {loaded}/{len(results)} runbooks")
+        return loaded
 
     def _parse_runbook_content(self, content: str, incident_type: str) -> Dict[str, str]:
-        """Return structured runbook."""
+        """Return structured runbook (and index its sections for retrieval)."""
+        runbook_index.add_document(incident_type, content)
         summary = content[:500].replace("#", "").replace("*", "").strip()
         return {
             incident_type: summary,
@@ -73,20 +115,82 @@ class DocumentFetcher:
 
 
 class LogFetcher:
-    """Fetch logs from GitHub for demo purposes."""
+    """Fetch logs from GitHub for demo purposes.
+
+    Logs are streamed into a LogDigester instead of being downloaded whole;
+    the read stops as soon as the line or byte budget is used up.
+    """
 
-    def __init__(self):
+    def __init__(self, transport: Optional[HTTPTransport] = None):
         self.github_base = "https://raw.githubusercontent.com/mak372/agentic-sre-sim-data/main"
+        self.http = transport or http_transport
+        self.budgets = {
+            "top_k": int(os.getenv("LOG_DIGEST_TOP_K", "20")),
+            "max_lines": int(os.getenv("LOG_MAX_LINES", "100000")),
+            "max_bytes": int(os.getenv("LOG_MAX_BYTES", "5000000")),
+        }
+
+    def _logs_url(self, service_name: str, incident_type: str) -> str:
+        return f"{self.github_base}/{service_name}/{incident_type}.log"
+
+    def _message_digest(self, message: str) -> LogDigest:
+        return digest_lines([message], **self.budgets)
 
     def fetch_logs(self, service_name: str, incident_type: str) -> List[str]:
-        """Fetch log file lines from GitHub."""
-        url = f"{self.github_base}/{service_name}/{incident_type}.log"
+        """Fetch a ranked, deduplicated digest of the service's log lines (or a one-line error)."""
+        try:
+            return self.fetch_log_digest(service_name, incident_type).lines()
+        except FetchError as e:
+            return self._message_digest(str(e)).lines()
+
+    def fetch_log_digest(self, service_name: str, incident_type: str) -> LogDigest:
+        """Stream the log file into a digest.
+
+        Raises:
+            FetchError: if the log can't be fetched
+        """
+        url = self._logs_url(service_name, incident_type)
         print(f"Fetching logs from: {url}")
         try:
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                return resp.text.splitlines()
-            else:
-                return [f"No logs found for {service_name} / {incident_type}"]
-        except Exception as e:
-            return [f"Log fetch error: {e}"]
+            with self.http.stream_sync("GET", url) as resp:
+                if resp.status_code != 200:
+                    raise FetchError(f"No logs found for {service_name} / {incident_type} ({resp.status_code})")
+                digester = LogDigester(**self.budgets)
+                for chunk in resp.iter_content(chunk_size=65536):
+                    if not digester.feed_chunk(chunk):
+                        break
+                return digester.digest()
+        except requests.RequestException as e:
+            raise FetchError(f"Log fetch error: {e}") from e
+
+    async def fetch_logs_async(self, service_name: str, incident_type: str) -> List[str]:
+        """Non-blocking variant of fetch_logs for use inside the event loop."""
+        try:
+            return (await self.fetch_log_digest_async(service_name, incident_type)).lines()
+        except FetchError as e:
+            return self._message_digest(str(e)).lines()
+
+    async def fetch_log_digest_async(self, service_name: str, incident_type: str) -> LogDigest:
+        """Stream the log file into a digest without blocking the event loop.
+
+        Raises:
+            FetchError: if the log can't be fetched
+        """
+        url = self._logs_url(service_name, incident_type)
+        print(f"Fetching logs from: {url}")
+        try:
+            with tracer.span("http", "github.logs", url=url) as span:
+                async with self.http.stream("GET", url) as resp:
+                    span["status_code"] = resp.status_code
+                    if resp.status_code != 200:
+                        raise FetchError(f"No logs found for {service_name} / {incident_type} ({resp.status_code})")
+                    digester = LogDigester(**self.budgets)
+                    async for chunk in resp.aiter_bytes():
+                        if not digester.feed_chunk(chunk):
+                            break  # budget used up; closing the stream drops the rest
+                    digest = digester.digest()
+                    span["bytes_read"] = digest.bytes_read
+                    span["truncated"] = digest.truncated
+                    return digest
+        except httpx.HTTPError as e:
+            raise FetchError(f"Log fetch error: {e}") from e
@@ -8,19 +8,33 @@ Retool provides the enterprise UI layer for:
 - Real-time dashboard with statistics and timeline
 """
 import os
-import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from core.outbox import OutboxDispatcher, outbox as default_outbox
+from integrations.http import HTTPTransport, http_transport
+
+# Outbox message kinds (one per Retool endpoint)
+APPROVAL_KIND = "retool.approval"
+DASHBOARD_KIND = "retool.dashboard"
+
 
 class RetoolClient:
     """Client for Retool API integration."""
     
-    def __init__(self, api_key: str = None, workspace_url: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        workspace_url: str = None,
+        transport: Optional[HTTPTransport] = None,
+        outbox: Optional[OutboxDispatcher] = None,
+    ):
         self.api_key = api_key or os.getenv("RETOOL_API_KEY", "")
         self.workspace_url = workspace_url or os.getenv("RETOOL_WORKSPACE_URL", "https://mycompany.retool.com")
         self.webhook_url = os.getenv("RETOOL_WEBHOOK_URL", "")
         self.base_url = "https://api.retool.com/v1"
+        self.http = transport or http_transport
+        self.outbox = outbox or default_outbox
     
     def create_incident_dashboard(self, incident_data: Dict[str, Any]) -> str:
         """Create a Retool dashboard for an incident.
@@ -38,20 +52,50 @@ class RetoolClient:
     def send_approval_request(self, incident_id: str, mitigation: Dict[str, Any]) -> bool:
         """Send approval request to Retool Workflow.
         
+        The request is written to the outbox and delivered in the background
+        (with retries), so a slow or failing Retool endpoint never blocks the caller.
+        
         Args:
             incident_id: ID of the incident
             mitigation: Mitigation details requiring approval
             
         Returns:
-            True if approval request was sent successfully
+            True if approval request was queued (or simulated in demo mode)
         """
+        if not self.webhook_url and not self.api_key:
+            self._approval_call(incident_id, mitigation)  # demo mode: nothing to deliver
+            return True
+        self.outbox.enqueue(APPROVAL_KIND, {
+            "incident_id": incident_id,
+            "mitigation": mitigation,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+        print(f"[RETOOL] Approval request for {incident_id} queued")
+        return True
+    
+    async def deliver_approval(self, message: Dict[str, Any]) -> bool:
+        """Outbox handler: actually trigger the approval workflow."""
+        call = self._approval_call(message["incident_id"], message["mitigation"], message.get("timestamp"))
+        if call is None:
+            return True  # demo mode
+        channel, url, kwargs = call
+        try:
+            response = await self.http.post(url, **kwargs)
+        except Exception as e:
+            return self._approval_failed(channel, e)
+        return self._approval_result(channel, response.status_code)
+    
+    def _approval_call(
+        self, incident_id: str, mitigation: Dict[str, Any], timestamp: Optional[str] = None,
+    ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """The (channel, url, request kwargs) for an approval request, or None in demo mode."""
         # Prepare the payload
         payload = {
             "incident_id": incident_id,
             "mitigation_type": mitigation.get('type', 'unknown'),
             "description": mitigation.get('description', ''),
             "risk_level": mitigation.get('risk_level', 'unknown'),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp or datetime.utcnow().isoformat()
         }
         
         # Try webhook URL first (easiest setup)
@@ -63,28 +107,7 @@ class RetoolClient:
             print(f"   📋 Mitigation Type: {mitigation.get('type', 'unknown')}")
             print(f"   🔍 Risk Level: {mitigation.get('risk_level', 'unknown')}")
             print(f"   🌐 Webhook: {self.webhook_url[:50]}...")
-            
-            try:
-                response = requests.post(
-                    self.webhook_url,
-                    json=payload,
-                    timeout=10
-                )
-                
-                if response.status_code in [200, 201, 202]:
-                    print(f"Workflow triggered successfully!")
-                    print(f"Check Retool Workflows dashboard for the run")
-                    print("="*70 + "\n")
-                    return True
-                else:
-                    print(f"Webhook returned status {response.status_code}")
-                    print("="*70 + "\n")
-                    return False
-                    
-            except Exception as e:
-                print(f"Webhook call failed: {e}")
-                print("="*70 + "\n")
-                return False
+            return "Webhook", self.webhook_url, {"json": payload}
         
         # If no webhook, check for API key
         if not self.api_key:
@@ -97,7 +120,7 @@ class RetoolClient:
             print(f"Mode: Demo (set RETOOL_WEBHOOK_URL or RETOOL_API_KEY)")
             print(f"Approval request simulated - would trigger Retool Workflow")
             print("="*70 + "\n")
-            return True
+            return None
         
         # Use API key method
         print("\n" + "="*70)
@@ -108,76 +131,83 @@ class RetoolClient:
         print(f"Risk Level: {mitigation.get('risk_level', 'unknown')}")
         print(f"Using API Key authentication")
         
-        try:
-            # Real Retool Workflows API call
-            workflow_url = f"{self.base_url}/workflows/trigger"
-            workflow_id = os.getenv("RETOOL_WORKFLOW_ID", "incident-approval")
-            
-            response = requests.post(
-                workflow_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "workflowId": workflow_id,
-                    "data": payload
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                print(f"Workflow triggered successfully via API!")
-                print(f"Check Retool Workflows dashboard for the run")
-                print("="*70 + "\n")
-                return True
-            else:
-                print(f"API returned status {response.status_code}")
-                print("="*70 + "\n")
-                return False
-                
-        except Exception as e:
-            print(f"API call failed: {e}")
-            print("="*70 + "\n")
-            return False
+        # Real Retool Workflows API call
+        workflow_url = f"{self.base_url}/workflows/trigger"
+        workflow_id = os.getenv("RETOOL_WORKFLOW_ID", "incident-approval")
+        return "API", workflow_url, {
+            "headers": {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "workflowId": workflow_id,
+                "data": payload
+            },
+        }
+    
+    def _approval_result(self, channel: str, status_code: int) -> bool:
+        # The webhook accepts any 2xx; the workflows API answers 200
+        ok = status_code in [200, 201, 202] if channel == "Webhook" else status_code == 200
+        if ok:
+            print(f"Workflow triggered successfully{' via API' if channel == 'API' else ''}!")
+            print(f"Check Retool Workflows dashboard for the run")
+        else:
+            print(f"{channel} returned status {status_code}")
+        print("="*70 + "\n")
+        return ok
+    
+    def _approval_failed(self, channel: str, error: Exception) -> bool:
+        print(f"{channel} call failed: {error}")
+        print("="*70 + "\n")
+        return False
     
     
     def get_approval_status(self, incident_id: str) -> str:
         return "approved"  # Auto-approve for demo
     
     def push_dashboard_data(self, data_type: str, data: Dict[str, Any]) -> bool:
+        """Queue a dashboard update; pending updates of the same data type are replaced by the latest."""
         if not self.api_key:
             print(f"[RETOOL] Dashboard data ready: {data_type}")
             return True
         
+        self.outbox.enqueue(DASHBOARD_KIND, {
+            "data_type": data_type,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat(),
+        }, coalesce_key=data_type)
+        return True
+    
+    async def deliver_dashboard_data(self, message: Dict[str, Any]) -> bool:
+        """Outbox handler: push one dashboard update to the Retool resource."""
+        data_type = message["data_type"]
         try:
-            # Push to Retool resource/query
-            resource_url = f"{self.base_url}/resources/data"
-            
-            response = requests.post(
-                resource_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "resource": f"incident_autopilot_{data_type}",
-                    "data": data,
-                    "timestamp": datetime.utcnow().isoformat()
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                print(f"[RETOOL] Pushed {data_type} to dashboard")
-                return True
-            else:
-                print(f"[RETOOL] Failed to push {data_type}: {response.status_code}")
-                return False
-                
+            response = await self.http.post(**self._dashboard_call(data_type, message["data"], message.get("timestamp")))
         except Exception as e:
             print(f"[RETOOL] Error pushing {data_type}: {e}")
             return False
+        return self._dashboard_result(data_type, response.status_code)
+    
+    def _dashboard_call(self, data_type: str, data: Dict[str, Any], timestamp: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "url": f"{self.base_url}/resources/data",
+            "headers": {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            "json": {
+                "resource": f"incident_autopilot_{data_type}",
+                "data": data,
+                "timestamp": timestamp or datetime.utcnow().isoformat()
+            },
+        }
+    
+    def _dashboard_result(self, data_type: str, status_code: int) -> bool:
+        if status_code == 200:
+            print(f"[RETOOL] Pushed {data_type} to dashboard")
+            return True
+        print(f"[RETOOL] Failed to push {data_type}: {status_code}")
+        return False
     
     def get_dashboard_url(self, incident_id: Optional[str] = None) -> str:
         if incident_id:
@@ -220,3 +250,14 @@ class RetoolClient:
             }
         }
 
+
+def register_outbox_handlers(outbox: OutboxDispatcher, client: Optional[RetoolClient] = None):
+    """Deliver queued Retool messages through `client`, with per-endpoint concurrency limits."""
+    client = client or RetoolClient(outbox=outbox)
+    outbox.register(APPROVAL_KIND, client.deliver_approval,
+                    concurrency=int(os.getenv("RETOOL_APPROVAL_CONCURRENCY", "4")))
+    outbox.register(DASHBOARD_KIND, client.deliver_dashboard_data,
+                    concurrency=int(os.getenv("RETOOL_DASHBOARD_CONCURRENCY", "2")))
+
+
+register_outbox_handlers(default_outbox)
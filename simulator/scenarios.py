@@ -3,6 +3,12 @@ import random
 from typing import Dict, Any, Tuple
 from datetime import datetime, timedelta
 from core.models import Incident, IncidentType, IncidentSeverity
+from core.ids import new_incident_id
+
+
+def _changed_metrics(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Metrics that moved away from baseline (the full set is already on the incident)."""
+    return {k: v for k, v in current.items() if baseline.get(k) != v}
 
 
 class IncidentSimulator:
@@ -45,9 +51,10 @@ class IncidentSimulator:
         service = random.choice(self.services)
         
         incident = Incident(
-            id=f"inc-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+            id=new_incident_id(),
             service_name=service,
             severity=IncidentSeverity.HIGH,
+            alert_type="latency_spike",
             incident_type=IncidentType.UNKNOWN  # Will be classified by triage
         )
         
@@ -75,7 +82,7 @@ class IncidentSimulator:
         incident.add_timeline_event(
             "detection",
             f"Latency spike detected: p99 increased from 500ms to 5000ms",
-            current_metrics
+            _changed_metrics(current_metrics, baseline_metrics)
         )
         
         return incident, current_metrics, baseline_metrics
@@ -85,9 +92,10 @@ class IncidentSimulator:
         service = random.choice(self.services)
         
         incident = Incident(
-            id=f"inc-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+            id=new_incident_id(),
             service_name=service,
             severity=IncidentSeverity.CRITICAL,
+            alert_type="error_rate",
         )
         
         baseline_metrics = {
@@ -112,7 +120,7 @@ class IncidentSimulator:
         incident.add_timeline_event(
             "detection",
             f"Error rate spike detected: {current_metrics['error_rate']}%",
-            current_metrics
+            _changed_metrics(current_metrics, baseline_metrics)
         )
         
         return incident, current_metrics, baseline_metrics
@@ -122,9 +130,10 @@ class IncidentSimulator:
         service = random.choice(self.services)
         
         incident = Incident(
-            id=f"inc-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+            id=new_incident_id(),
             service_name=service,
             severity=IncidentSeverity.HIGH,
+            alert_type="resource_saturation",
         )
         
         baseline_metrics = {
@@ -150,7 +159,7 @@ class IncidentSimulator:
         incident.add_timeline_event(
             "detection",
             f"Resource saturation: CPU {current_metrics['cpu_usage']}%, Memory {current_metrics['memory_usage']}%",
-            current_metrics
+            _changed_metrics(current_metrics, baseline_metrics)
         )
         
         return incident, current_metrics, baseline_metrics
@@ -160,9 +169,10 @@ class IncidentSimulator:
         service = "message-processor-service"
         
         incident = Incident(
-            id=f"inc-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}",
+            id=new_incident_id(),
             service_name=service,
             severity=IncidentSeverity.MEDIUM,
+            alert_type="queue_depth",
         )
         
         baseline_metrics = {
@@ -187,7 +197,7 @@ class IncidentSimulator:
         incident.add_timeline_event(
             "detection",
             f"Queue depth explosion: {current_metrics['queue_depth']} messages pending",
-            current_metrics
+            _changed_metrics(current_metrics, baseline_metrics)
         )
         
         return incident, current_metrics, baseline_metrics